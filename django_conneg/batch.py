@@ -0,0 +1,194 @@
+"""
+A view that dispatches several sub-requests in-process and returns all their
+responses at once.
+
+POST a JSON list of sub-requests (or an object with a "requests" key holding
+one), each an object with keys:
+
+    path     required, and may include a query string
+    method   defaults to GET
+    headers  an object of extra request headers
+    body     sent as JSON, unless it's a string
+    id       echoed back in the response
+
+Each sub-request is resolved through the URLconf and dispatched directly to
+its view, asking for the format the batch response itself will be rendered
+in. Middleware isn't run for sub-requests, but attributes it set on the batch
+request (such as user and session) are shared with them.
+
+The response context has a "responses" list with, for each sub-request in
+order, its "id", "status", "content_type" and "body". JSON bodies are
+included as values rather than strings.
+"""
+
+from __future__ import unicode_literals
+
+import concurrent.futures
+import io
+import json
+import logging
+
+import http.client as http_client
+
+from django import http
+from django.core import exceptions
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import resolve, Resolver404
+
+from django_conneg.http import HttpBadRequest, HttpError
+from django_conneg.parsers import JSONParser
+from django_conneg.views import BaseContentNegotiatedView, JSONView
+
+logger = logging.getLogger(__name__)
+
+# Request attributes commonly set by middleware, which sub-requests share.
+_SHARED_ATTRIBUTES = ('user', 'auth', 'session', 'urlconf', 'LANGUAGE_CODE')
+
+class BatchView(JSONParser, JSONView):
+    # The most sub-requests allowed in one batch
+    _batch_max_requests = 20
+    # The number of threads used to run GET and HEAD sub-requests
+    # concurrently. Other sub-requests always run in order on the batch's
+    # thread, and GET and HEAD sub-requests don't overtake them.
+    _batch_workers = None
+    _batch_methods = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+    def post(self, request):
+        sub_requests = self.get_sub_requests()
+        renderers = self.set_renderers(early=True)
+        format = renderers[0].format if renderers else None
+
+        responses, concurrent_batch = [None] * len(sub_requests), []
+        executor = None
+        if self._batch_workers and self._batch_workers > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(self._batch_workers)
+        try:
+            for i, sub_request in enumerate(sub_requests):
+                if executor and sub_request['method'] in ('GET', 'HEAD'):
+                    concurrent_batch.append((i, executor.submit(self.run_in_thread, request, sub_request, format)))
+                    continue
+                for j, future in concurrent_batch:
+                    responses[j] = future.result()
+                concurrent_batch = []
+                responses[i] = self.dispatch_sub_request(request, sub_request, format)
+            for j, future in concurrent_batch:
+                responses[j] = future.result()
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self.context['responses'] = responses
+        return self.render()
+
+    def get_sub_requests(self):
+        data = self.parse()
+        if isinstance(data, dict):
+            data = data.get('requests')
+        if not isinstance(data, list):
+            raise HttpBadRequest(message="Expected a list of requests")
+        if len(data) > self._batch_max_requests:
+            raise HttpBadRequest(message="No more than %d requests may be batched" % self._batch_max_requests)
+        sub_requests = []
+        for item in data:
+            if not isinstance(item, dict) or not isinstance(item.get('path'), str) or \
+               not item['path'].startswith('/'):
+                raise HttpBadRequest(message="Each request must have an absolute path")
+            method = (item.get('method') or 'GET').upper()
+            if method not in self._batch_methods:
+                raise HttpBadRequest(message="Method %s can't be batched" % method)
+            if not isinstance(item.get('headers', {}), dict):
+                raise HttpBadRequest(message="Request headers must be an object")
+            sub_requests.append(dict(item, method=method))
+        return sub_requests
+
+    def build_sub_request(self, request, sub_request):
+        path, _, query_string = sub_request['path'].partition('?')
+        body = sub_request.get('body')
+        if body is None:
+            body, content_type = b'', ''
+        elif isinstance(body, str):
+            body, content_type = body.encode('utf-8'), 'text/plain; charset=utf-8'
+        else:
+            body, content_type = json.dumps(body).encode('utf-8'), 'application/json'
+
+        environ = dict((key, value) for key, value in request.META.items()
+                       if not key.startswith('HTTP_') and key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'))
+        for key in ('HTTP_HOST', 'HTTP_AUTHORIZATION', 'HTTP_COOKIE', 'HTTP_ACCEPT_LANGUAGE'):
+            if key in request.META:
+                environ[key] = request.META[key]
+        for name, value in sub_request.get('headers', {}).items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = '%s' % value
+        environ.update({'REQUEST_METHOD': sub_request['method'],
+                        'PATH_INFO': path,
+                        'QUERY_STRING': query_string,
+                        'CONTENT_TYPE': environ.pop('HTTP_CONTENT_TYPE', content_type),
+                        'CONTENT_LENGTH': str(len(body)),
+                        'wsgi.input': io.BytesIO(body)})
+        environ.setdefault('SCRIPT_NAME', '')
+        environ.setdefault('SERVER_NAME', request.get_host().split(':')[0] or 'localhost')
+        environ.setdefault('SERVER_PORT', request.get_port())
+        environ.setdefault('wsgi.url_scheme', request.scheme)
+
+        new_request = WSGIRequest(environ)
+        for name in _SHARED_ATTRIBUTES:
+            if hasattr(request, name):
+                setattr(new_request, name, getattr(request, name))
+        return new_request
+
+    def dispatch_sub_request(self, request, sub_request, format):
+        """
+        Returns a dict describing the response to a sub-request.
+        """
+        sub_request_obj = self.build_sub_request(request, sub_request)
+        try:
+            match = resolve(sub_request_obj.path_info, getattr(request, 'urlconf', None))
+            view_class = getattr(match.func, 'view_class', None)
+            if not (isinstance(view_class, type) and issubclass(view_class, BaseContentNegotiatedView)):
+                raise HttpBadRequest(message="%s isn't a content-negotiated view" % sub_request['path'])
+            if issubclass(view_class, BatchView):
+                raise HttpBadRequest(message="Batches can't be nested")
+            kwargs = dict(match.kwargs)
+            if format:
+                kwargs[view_class._format_url_parameter] = format
+            response = match.func(sub_request_obj, *match.args, **kwargs)
+        except Resolver404:
+            return self.sub_response(sub_request, http_client.NOT_FOUND)
+        except http.Http404:
+            return self.sub_response(sub_request, http_client.NOT_FOUND)
+        except exceptions.PermissionDenied:
+            return self.sub_response(sub_request, http_client.FORBIDDEN)
+        except HttpError as e:
+            return self.sub_response(sub_request, e.status_code, body=e.args[0] if e.args else None)
+        except Exception:
+            logger.exception("Batched request for %s failed", sub_request['path'])
+            return self.sub_response(sub_request, http_client.INTERNAL_SERVER_ERROR)
+
+        content_type = response.get('Content-Type')
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        response.close()
+        if sub_request['method'] == 'HEAD':
+            body = None
+        else:
+            body = content.decode(response.charset, 'replace')
+            if content_type and content_type.split(';')[0].strip() == 'application/json':
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    pass
+        return self.sub_response(sub_request, response.status_code, content_type, body)
+
+    def run_in_thread(self, request, sub_request, format):
+        try:
+            return self.dispatch_sub_request(request, sub_request, format)
+        finally:
+            connections.close_all()
+
+    def sub_response(self, sub_request, status, content_type=None, body=None):
+        return {'id': sub_request.get('id'),
+                'status': int(status),
+                'content_type': content_type,
+                'body': body}
@@ -1,30 +1,50 @@
 from collections import defaultdict
 import inspect
-import weakref
 
 from django_conneg.http import MediaType
+from django_conneg.support import negotiation_cache
 
-class Renderer(object):
-    def __init__(self, func, format, mimetypes=(), priority=0, name=None, test=None, instance=None, owner=None):
+class Handler(object):
+    """
+    Base class for view methods that handle a particular format, i.e.
+    renderers and parsers.
+    """
+    kind = 'handler'
+
+    def __init__(self, func, format, mimetypes=(), priority=0, name=None, test=None, instance=None, owner=None,
+                 budget=None, deferred=False):
         self.func = func
         self.test = test or (lambda s,r,c,t: True)
         if instance:
             self.func = func.__get__(instance, owner)
             self.test = test.__get__(instance, owner)
 
-        self.is_renderer = True
         self.format = format
         self.mimetypes = set(MediaType(mimetype, priority) for mimetype in mimetypes)
         self.name = name
         self.priority = priority
+        # The number of seconds a call should take; see
+        # django_conneg.support.breaker.
+        self.budget = budget
+        # Whether GET requests are rendered in the background; see
+        # django_conneg.support.deferred.
+        self.deferred = deferred
 
         self.is_bound = instance is not None
 
     def __get__(self, instance, owner=None):
-        return Renderer(self.func, self.format, self.mimetypes, self.priority, self.name, self.test, instance, owner)
+        return type(self)(self.func, self.format, self.mimetypes, self.priority, self.name, self.test, instance, owner,
+                          budget=self.budget, deferred=self.deferred)
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
 
+    def with_mimetypes(self, mimetypes):
+        """
+        Returns an unbound copy of this handler with the given mimetypes.
+        """
+        return type(self)(self.func, self.format, mimetypes, self.priority, self.name, self.test,
+                          budget=self.budget, deferred=self.deferred)
+
     @property
     def __name__(self):
         return self.func.__name__
@@ -34,40 +54,87 @@ class Renderer(object):
 
     def __repr__(self):
         if self.is_bound:
-            return "<bound renderer {0}.{1} of {2}>".format(self.func.im_class.__name__ or '?',
-                                                            self.func.__name__,
-                                                            self.func.__self__)
+            return "<bound {0} {1}.{2} of {3}>".format(self.kind,
+                                                      type(self.func.__self__).__name__ or '?',
+                                                      self.func.__name__,
+                                                      self.func.__self__)
         else:
-            return "<unbound renderer {0}>".format(self.func.__name__)
+            return "<unbound {0} {1}>".format(self.kind, self.func.__name__)
+
+class Renderer(Handler):
+    kind = 'renderer'
+    is_renderer = True
+
+class Parser(Handler):
+    kind = 'parser'
+    is_renderer = False
+
+def _inherited_mimetypes(mro, format, kind):
+    for klass in mro:
+        for value in vars(klass).values():
+            if isinstance(value, kind) and value.format == format and value.mimetypes:
+                return value.mimetypes
+    return ()
+
+def collect_renderers(cls, kind=Renderer):
+    """
+    Returns a tuple of the unbound renderers defined on cls and its bases.
+    Pass kind=Parser to collect parsers instead.
+
+    Names are resolved along the MRO just as attribute lookup would, so a
+    subclass can override a renderer by defining one with the same name, or
+    remove it by assigning something that isn't a renderer to that name. A
+    renderer declared without mimetypes inherits those of the previous
+    renderer for its format in the MRO.
+    """
+    mro = inspect.getmro(cls)
+    names = set()
+    for klass in mro:
+        names.update(vars(klass))
+
+    renderers = []
+    for name in sorted(names):
+        for i, klass in enumerate(mro):
+            if name in vars(klass):
+                value = vars(klass)[name]
+                break
+        if not isinstance(value, kind):
+            continue
+        if not value.mimetypes:
+            mimetypes = _inherited_mimetypes(mro[i+1:], value.format, kind)
+            if mimetypes:
+                value = value.with_mimetypes(mimetypes)
+        renderers.append(value)
+    return tuple(renderers)
 
 class Conneg(object):
-    _memo_by_class = weakref.WeakKeyDictionary()
-
-    def __init__(self, renderers=None, obj=None):
+    def __init__(self, renderers=None, obj=None, parsers=None):
         self.renderers_by_format = defaultdict(list)
         self.renderers_by_mimetype = defaultdict(list)
+        # The class whose renderers these are, if any, under which Accept
+        # header resolutions are cached.
+        self.cls = None
 
         if renderers is not None:
             renderers = list(renderers)
+            parsers = list(parsers or ())
         elif obj:
             cls = type(obj) if not isinstance(obj, type) else obj
-            renderers = self._memo_by_class.get(cls)
+            # Views collect their renderers and parsers when the class is
+            # created (see BaseContentNegotiatedView.__init_subclass__);
+            # anything else has them collected on demand.
+            renderers = getattr(cls, '_conneg_renderers', None)
             if renderers is None:
-                # This is about as much memoization as we can do. We keep
-                # the renderers unbound for now
-                renderers = []
-                for name in dir(cls):
-                    try:
-                        value = getattr(obj, name)
-                    except AttributeError:
-                        continue
-                    if isinstance(value, Renderer):
-                        renderers.append(value)
-                self._memo_by_class[cls] = renderers
+                renderers = collect_renderers(cls)
+            parsers = getattr(cls, '_conneg_parsers', None)
+            if parsers is None:
+                parsers = collect_renderers(cls, Parser)
 
             # Bind the renderers to this instance. See
             # http://stackoverflow.com/a/1015405/613023 for an explanation.
             renderers = [r.__get__(obj, cls) for r in renderers]
+            parsers = [p.__get__(obj, cls) for p in parsers]
+            self.cls = cls
 
         for renderer in renderers:
             if renderer.mimetypes is not None:
@@ -78,6 +145,8 @@ class Conneg(object):
         # Order all the renderers by priority
         renderers.sort(key=lambda renderer:-renderer.priority)
         self.renderers = tuple(renderers)
+        parsers.sort(key=lambda parser:-parser.priority)
+        self.parsers = tuple(parsers)
 
     def get_renderers(self, request, context=None, template_name=None,
                       accept_header=None, formats=None, default_format=None, fallback_formats=None,
@@ -93,6 +162,7 @@ class Conneg(object):
         a serialization. This is useful if we're trying to find all relevant
         serializers before we've built a context which they will accept. 
         """
+        renderers = None
         if formats:
             renderers, seen_formats = [], set()
             for format in formats:
@@ -100,12 +170,13 @@ class Conneg(object):
                     renderers.extend(self.renderers_by_format[format])
                     seen_formats.add(format)
         elif accept_header:
-            accepts = MediaType.parse_accept_header(accept_header)
-            renderers = MediaType.resolve(accepts, self.renderers)
-        elif default_format:
-            renderers = self.renderers_by_format[default_format]
-        else:
-            renderers = []
+            renderers = self.resolve_accept_header(accept_header)
+
+        if renderers is None:
+            if default_format:
+                renderers = list(self.renderers_by_format[default_format])
+            else:
+                renderers = []
 
         fallback_formats = fallback_formats if isinstance(fallback_formats, (list, tuple)) else (fallback_formats,)
         for format in fallback_formats:
@@ -118,7 +189,64 @@ class Conneg(object):
 
         return renderers
 
+    def resolve_accept_header(self, accept_header):
+        """
+        Returns a list of the renderers acceptable for an Accept header, in
+        order of preference, or None if it contains no parseable media types.
+
+        Results are cached for each view class; see
+        django_conneg.support.negotiation_cache.
+        """
+        cache = negotiation_cache.get_cache() if self.cls else None
+        if cache is not None:
+            version = cache.version(self.cls, self.renderers)
+            indexes = cache.get(version, accept_header)
+            if indexes is not negotiation_cache.MISSING:
+                return None if indexes is None else [self.renderers[i] for i in indexes]
+
+        accepts = MediaType.parse_accept_header(accept_header)
+        renderers = MediaType.resolve(accepts, self.renderers) if accepts else None
+
+        if cache is not None:
+            indexes = None if renderers is None else tuple(self.renderers.index(r) for r in renderers)
+            cache.set(version, accept_header, indexes)
+        return renderers
+
+    def canonical_format(self, accept_header, default_format=None):
+        """
+        Returns the format that would be preferred for accept_header, or None
+        if nothing would be acceptable.
+
+        Many distinct Accept headers map onto the same format, so this makes a
+        much better cache key than the header itself.
+        """
+        renderers = self.get_renderers(request=None,
+                                       accept_header=accept_header,
+                                       default_format=default_format,
+                                       fallback_formats=(),
+                                       early=True)
+        return renderers[0].format if renderers else None
+
+    def get_parser(self, content_type):
+        """
+        Returns the parser for a Content-Type header, or None if there isn't
+        one that can handle it.
+
+        Parsers whose mimetypes match more specifically are preferred, and
+        then those with a higher priority.
+        """
+        try:
+            media_type = MediaType(content_type)
+        except ValueError:
+            return None
+        best, best_specifity = None, -1
+        for parser in self.parsers:
+            for mimetype in parser.mimetypes:
+                if media_type.provides(mimetype) and mimetype.specifity > best_specifity:
+                    best, best_specifity = parser, mimetype.specifity
+        return best
+
     def __add__(self, other):
         if not isinstance(other, Conneg):
             other = Conneg(obj=other)
-        return Conneg(self.renderers + other.renderers)
\ No newline at end of file
+        return Conneg(self.renderers + other.renderers, parsers=self.parsers + other.parsers)
\ No newline at end of file
@@ -1,6 +1,6 @@
-from django_conneg.conneg import Renderer
+from django_conneg.conneg import Parser, Renderer
 
-def renderer(format, mimetypes=(), priority=0, name=None, test=None):
+def renderer(format, mimetypes=(), priority=0, name=None, test=None, budget=None, deferred=False):
     """
     Decorates a view method to say that it renders a particular format and mimetypes.
 
@@ -16,8 +16,36 @@ def renderer(format, mimetypes=(), priority=0, name=None, test=None):
     tuple.
 
     Takes an optional priority argument to resolve ties between renderers.
+
+    budget is the number of seconds the renderer should take. A renderer with
+    a budget that often overruns it, or raises exceptions, is skipped in
+    favour of the next acceptable renderer for a while; see
+    django_conneg.support.breaker.
+
+    A deferred renderer is called in the background for GET requests, which
+    get a 202 Accepted response until it's finished; see
+    django_conneg.support.deferred.
+    """
+
+    def g(f):
+        return Renderer(f, format, mimetypes, priority, name, test, budget=budget, deferred=deferred)
+    return g
+
+
+def parser(format, mimetypes=(), priority=0, name=None):
+    """
+    Decorates a view method to say that it parses request bodies of a
+    particular format and mimetypes.
+
+    Use as:
+        @parser(format="foo", mimetypes=("application/x-foo",))
+        def parse_foo(self, request, media_type): ...
+
+    media_type is the parsed Content-Type of the request, so that parameters
+    such as charset are available. As with renderer, mimetypes are inherited
+    from the previous parser for that format in the MRO if not given.
     """
 
     def g(f):
-        return Renderer(f, format, mimetypes, priority, name, test)
+        return Parser(f, format, mimetypes, priority, name)
     return g
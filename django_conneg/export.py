@@ -0,0 +1,218 @@
+"""
+Renders many contexts to many formats outside the request/response cycle.
+
+This is for pre-generating static exports. Each job is a (context,
+template_name, formats) tuple, optionally followed by a name for the job, and
+is rendered with the view's render_to_format() for each of its formats.
+Jobs are spread across a thread or process pool, with only a bounded number
+in flight at once so that neither the inputs nor the rendered output pile up
+in memory.
+
+An exception raised while rendering a job is logged and recorded as a 500
+for that format, rather than abandoning the rest of the batch.
+"""
+
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import traceback
+
+import django
+from django.apps import apps
+from django.db import connections
+from django.test.client import RequestFactory
+from django.utils.module_loading import import_string
+
+from django_conneg.conneg import Conneg
+from django_conneg.http import HttpError
+
+logger = logging.getLogger(__name__)
+
+class RenderStats(object):
+    """
+    Accumulates per-format counts, sizes and timings for a batch.
+    """
+    def __init__(self):
+        self.renders = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.render_time = defaultdict(float)
+        # (name, format, traceback) for each rendering that raised an
+        # exception other than an HttpError
+        self.failures = []
+        self.started = time.time()
+        self.finished = None
+
+    def add(self, format, status_code, size, render_time, name=None, failure=None):
+        self.renders[format] += 1
+        self.bytes[format] += size
+        self.render_time[format] += render_time
+        if status_code != 200:
+            self.errors[format] += 1
+        if failure is not None:
+            self.failures.append((name, format, failure))
+
+    @property
+    def wall_time(self):
+        return (self.finished or time.time()) - self.started
+
+    def summary(self):
+        """
+        Returns a list of dicts, one per format, sorted by format.
+        """
+        wall_time = self.wall_time or 1e-9
+        return [{'format': format,
+                 'renders': self.renders[format],
+                 'errors': self.errors[format],
+                 'bytes': self.bytes[format],
+                 'render_time': self.render_time[format],
+                 'renders_per_second': self.renders[format] / wall_time,
+                 'bytes_per_second': self.bytes[format] / wall_time}
+                for format in sorted(self.renders)]
+
+def _init_worker():
+    if not apps.ready:
+        django.setup()
+
+def get_view(view_class, path='/', initkwargs=None):
+    """
+    Returns an instance of view_class set up as dispatch() would have done for
+    a GET request to path.
+    """
+    request = RequestFactory().get(path)
+    view = view_class(**(initkwargs or {}))
+    view.request, view.args, view.kwargs = request, (), {}
+    view.format_override = None
+    view.context = {'additional_headers': {}}
+    view.conneg = Conneg(obj=view)
+    return view
+
+def render_job(view_class, job, path='/', initkwargs=None):
+    """
+    Renders a single job, returning a list of (format, status_code,
+    content_type, content, render_time, failure) tuples, where failure is the
+    traceback of any exception other than an HttpError, or None.
+
+    view_class may be given as a dotted path, so that jobs can be sent to
+    other processes.
+    """
+    if not isinstance(view_class, type):
+        view_class = import_string(view_class)
+    context, template_name, formats = job[:3]
+    results = []
+    for format in formats:
+        view = get_view(view_class, path, initkwargs)
+        start = time.time()
+        try:
+            response = view.render_to_format(view.request, dict(context), template_name, format)
+            if response.streaming:
+                content = b''.join(response.streaming_content)
+            else:
+                content = response.content
+        except HttpError as e:
+            results.append((format, e.status_code, None, b'', time.time() - start, None))
+        except Exception:
+            logger.exception("Failed to render job to %s", format)
+            results.append((format, 500, None, b'', time.time() - start, traceback.format_exc()))
+        else:
+            results.append((format, response.status_code, response.get('Content-Type'),
+                            content, time.time() - start, None))
+    return results
+
+def _close_connections(barrier):
+    # Each thread holds its own connections. Once a thread has closed them it
+    # waits for the others, so that every thread picks up one of these.
+    connections.close_all()
+    try:
+        barrier.wait(60)
+    except threading.BrokenBarrierError:
+        pass
+
+def _is_path_component(name):
+    return name not in ('', os.curdir, os.pardir) and os.sep not in name and \
+        not (os.altsep and os.altsep in name) and '\0' not in name
+
+def file_writer(directory):
+    """
+    Returns a callback for render_batch() that writes each successful
+    rendering to <directory>/<name>.<format>.
+
+    Raises ValueError for names that aren't a single path component, so that
+    jobs can't write outside directory.
+    """
+    def write(name, format, status_code, content_type, content):
+        if not 200 <= status_code < 300:
+            return
+        basename = '{0}.{1}'.format(name, format)
+        if not _is_path_component(str(name)) or not _is_path_component(basename):
+            raise ValueError("Job name {0!r} isn't a single path component".format(name))
+        filename = os.path.join(directory, basename)
+        with open(filename, 'wb') as f:
+            f.write(content)
+    return write
+
+def render_batch(view_class, jobs, callback, workers=None, processes=False,
+                 max_pending=None, path='/', initkwargs=None):
+    """
+    Renders each job in jobs, passing each result to callback.
+
+    callback is called (in the calling thread) as callback(name, format,
+    status_code, content_type, content), where name is the job's name, or its
+    index if it wasn't given one. If callback is a string it's taken to be a
+    directory, and results are written there with file_writer().
+
+    At most max_pending jobs (by default, twice the number of workers) are
+    submitted to the pool at once. When processes is true, view_class should
+    be a dotted path and contexts must be picklable.
+
+    Failed renderings are passed to callback with a status code of 500, and
+    recorded in the returned RenderStats instance.
+    """
+    if not callable(callback):
+        callback = file_writer(callback)
+    workers = workers or os.cpu_count() or 1
+    if processes:
+        executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker)
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+    max_pending = max_pending or 2 * workers
+
+    stats, pending = RenderStats(), {}
+
+    def collect(done):
+        for future in done:
+            name, formats = pending.pop(future)
+            try:
+                results = future.result()
+            except Exception:
+                # e.g. the job couldn't be sent to a worker process
+                logger.exception("Failed to render job %r", name)
+                failure = traceback.format_exc()
+                results = [(format, 500, None, b'', 0.0, failure) for format in formats]
+            for format, status_code, content_type, content, render_time, failure in results:
+                stats.add(format, status_code, len(content), render_time, name, failure)
+                callback(name, format, status_code, content_type, content)
+
+    with executor:
+        try:
+            for i, job in enumerate(jobs):
+                name = job[3] if len(job) > 3 else i
+                future = executor.submit(render_job, view_class, job[:3], path, initkwargs)
+                pending[future] = name, job[2]
+                if len(pending) >= max_pending:
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+            collect(concurrent.futures.wait(pending)[0])
+        finally:
+            if not processes:
+                barrier = threading.Barrier(workers)
+                for i in range(workers):
+                    executor.submit(_close_connections, barrier)
+
+    stats.finished = time.time()
+    return stats
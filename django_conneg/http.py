@@ -1,6 +1,5 @@
 from __future__ import unicode_literals
 
-import re
 
 from django.http import HttpResponseRedirect
 
@@ -24,6 +23,14 @@ class HttpNotAcceptable(HttpError):
     def __init__(self, tried_mimetypes):
         self.tried_mimetypes = tried_mimetypes
 
+class HttpUnsupportedMediaType(HttpError):
+    status_code = 415
+    def __init__(self, content_type, supported_mimetypes):
+        self.content_type = content_type
+        self.supported_mimetypes = supported_mimetypes
+        super(HttpUnsupportedMediaType, self).__init__(
+            message="Unsupported request content type: %s" % (content_type or '(none)'))
+
 class HttpBadRequest(HttpError):
     status_code = 400
 
@@ -38,28 +45,78 @@ class MediaType(object):
     Represents a parsed internet media type.
     """
 
-    _MEDIA_TYPE_RE = re.compile(r'(\*/\*)|(?P<type>[^/]+)/(\*|((?P<subsubtype>[^+]+)\+)?(?P<subtype>.+))')
+    # Limits on what parse_accept_header() will parse. Accept headers that
+    # exceed these are treated as if they were absent.
+    max_accept_header_length = 4096
+    max_accept_entries = 64
+    max_params = 8
+
     def __init__(self, value, priority=0):
         value = str(value).strip()
-        media_type = value.split(';')
-        media_type, params = media_type[0].strip(), dict((i.strip() for i in p.split('=', 1)) for p in media_type[1:] if '=' in p)
-
-        mt = self._MEDIA_TYPE_RE.match(media_type)
-        if not mt:
-            raise ValueError("Not a correctly formatted internet media type (%r)" % media_type)
-        mt = mt.groupdict()
-
-        try:
-            self.quality = float(params.pop('q', 1))
-        except ValueError:
-            self.quality = 1
-
-        self.type = mt.get('type'), mt.get('subtype'), mt.get('subsubtype')
-        self.specifity = len([t for t in self.type if t])
+        parsed = self._parse(value, len(value) + 1)
+        if parsed is None:
+            raise ValueError("Not a correctly formatted internet media type (%r)" % value)
+        self._init(value, priority, *parsed)
+
+    def _init(self, value, priority, type, quality, params):
+        self.type = type
+        self.specifity = (type[0] is not None) + (type[1] is not None) + (type[2] is not None)
+        self.quality = quality
         self.params = params
         self.value = value
         self.priority = priority
 
+    @classmethod
+    def _from_parsed(cls, value, priority, type, quality, params):
+        media_type = cls.__new__(cls)
+        media_type._init(value, priority, type, quality, params)
+        return media_type
+
+    @staticmethod
+    def _parse(value, max_params):
+        """
+        Parses a single stripped media type into a (type, quality, params)
+        tuple, returning None if it's malformed or has more than max_params
+        parameters.
+        """
+        semicolon = value.find(';')
+        media_type = (value if semicolon < 0 else value[:semicolon]).rstrip()
+
+        slash = media_type.find('/')
+        if slash <= 0 or slash == len(media_type) - 1:
+            return None
+        major, minor = media_type[:slash], media_type[slash+1:]
+        if media_type.startswith('*/*'):
+            type = None, None, None
+        elif minor[0] == '*':
+            type = major, None, None
+        else:
+            plus = minor.find('+')
+            if 0 < plus < len(minor) - 1:
+                type = major, minor[plus+1:], minor[:plus]
+            else:
+                type = major, minor, None
+
+        params, quality = {}, 1
+        while semicolon >= 0:
+            if len(params) >= max_params:
+                return None
+            start = semicolon + 1
+            semicolon = value.find(';', start)
+            param = value[start:] if semicolon < 0 else value[start:semicolon]
+            equals = param.find('=')
+            if equals < 0:
+                continue
+            params[param[:equals].strip()] = param[equals+1:].strip()
+        if 'q' in params:
+            try:
+                quality = float(params.pop('q'))
+            except ValueError:
+                pass
+            if not 0 <= quality <= 1:
+                quality = 1
+        return type, quality, params
+
     def __str__(self):
         return self.value
 
@@ -112,6 +169,16 @@ class MediaType(object):
         """
         return self.type[:imt.specifity] == imt.type[:imt.specifity]
 
+    def sort_key(self):
+        """
+        Returns a key by which media types sort in increasing preference.
+
+        Unlike comparing with > and <, this is a total order: media types with
+        the same quality and specifity are ordered by their number of
+        parameters.
+        """
+        return self.quality, self.specifity, len(self.params)
+
     @classmethod
     def resolve(cls, accept, available_renderers):
         """
@@ -120,13 +187,15 @@ class MediaType(object):
         Call as MediaType.resolve([MediaType], [renderer]).
         """
         assert isinstance(available_renderers, tuple)
-        accept = sorted(accept)
+        accept = sorted(accept, key=cls.sort_key, reverse=True)
 
         renderers, seen = [], set()
+        if not accept:
+            return renderers
 
-        accept_groups = [[accept.pop()]]
-        for imt in accept:
-            if imt.equivalent(accept_groups[-1][0]):
+        accept_groups = [[accept[0]]]
+        for imt in accept[1:]:
+            if imt.sort_key() == accept_groups[-1][0].sort_key():
                 accept_groups[-1].append(imt)
             else:
                 accept_groups.append([imt])
@@ -135,21 +204,40 @@ class MediaType(object):
             for renderer in available_renderers:
                 if renderer in seen:
                     continue
-                for mimetype in renderer.mimetypes:
-                    for imt in accept_group:
-                        if mimetype.provides(imt):
-                            renderers.append(renderer)
-                            seen.add(renderer)
-                            break
+                if any(mimetype.provides(imt) for mimetype in renderer.mimetypes for imt in accept_group):
+                    renderers.append(renderer)
+                    seen.add(renderer)
 
         return renderers
 
     @classmethod
     def parse_accept_header(cls, accept):
-        media_types = []
-        for media_type in accept.split(','):
-            try:
-                media_types.append(MediaType(media_type))
-            except ValueError:
-                pass
+        """
+        Parses an Accept header into a list of MediaTypes, skipping any
+        malformed entries.
+
+        If the header is longer than max_accept_header_length, or has more than
+        max_accept_entries entries, or any entry has more than max_params
+        parameters, an empty list is returned so that the caller falls back to
+        its default. The header is scanned once, so the cost is linear in its
+        length and bounded by max_accept_header_length.
+        """
+        if len(accept) > cls.max_accept_header_length:
+            return []
+        media_types, start, max_params = [], 0, cls.max_params
+        while start <= len(accept):
+            end = accept.find(',', start)
+            if end < 0:
+                end = len(accept)
+            value = accept[start:end].strip()
+            start = end + 1
+            if not value:
+                continue
+            if len(media_types) >= cls.max_accept_entries:
+                return []
+            if value.count(';') > max_params:
+                return []
+            parsed = cls._parse(value, max_params)
+            if parsed is not None:
+                media_types.append(cls._from_parsed(value, 0, *parsed))
         return media_types
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from django_conneg.support.middleware import accept_table
+
+class Command(BaseCommand):
+    help = """Prints the format a negotiated view would choose for each of a list of
+Accept headers, as tab-separated values. Headers are read one per line (e.g.
+as extracted from access logs), and duplicates are ignored."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('view', help="Dotted path to a ContentNegotiatedView subclass")
+        parser.add_argument('accept_headers', nargs='?', default='-',
+                            help="File of Accept headers, or - to read from stdin")
+
+    def handle(self, *args, **options):
+        try:
+            view = import_string(options['view'])
+        except ImportError as e:
+            raise CommandError(e)
+
+        headers_file = sys.stdin if options['accept_headers'] == '-' else open(options['accept_headers'])
+        with headers_file:
+            accept_headers, seen = [], set()
+            for line in headers_file:
+                line = line.strip()
+                if line not in seen:
+                    accept_headers.append(line)
+                    seen.add(line)
+
+        for accept_header, format in accept_table(view, accept_headers):
+            self.stdout.write('{0}\t{1}'.format(accept_header, format or ''))
@@ -0,0 +1,60 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from django_conneg.export import render_batch
+
+class Command(BaseCommand):
+    help = """Renders a batch of contexts through a negotiated view into files.
+
+Jobs are read as JSON objects, one per line, with keys "context",
+"template_name", "formats" and (optionally) "name". Each rendering is written
+to <output-dir>/<name>.<format>."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('view', help="Dotted path to a ContentNegotiatedView subclass")
+        parser.add_argument('jobs', help="File of jobs, or - to read from stdin")
+        parser.add_argument('--output-dir', default='.')
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--processes', action='store_true',
+                            help="Use a process pool rather than a thread pool")
+        parser.add_argument('--max-pending', type=int, default=None)
+        parser.add_argument('--path', default='/',
+                            help="The request path the views will see")
+
+    def handle(self, *args, **options):
+        try:
+            import_string(options['view'])
+        except ImportError as e:
+            raise CommandError(e)
+
+        jobs_file = sys.stdin if options['jobs'] == '-' else open(options['jobs'])
+        with jobs_file:
+            jobs = self.read_jobs(jobs_file)
+            try:
+                stats = render_batch(options['view'], jobs, options['output_dir'],
+                                     workers=options['workers'],
+                                     processes=options['processes'],
+                                     max_pending=options['max_pending'],
+                                     path=options['path'])
+            except ValueError as e:
+                raise CommandError(e)
+
+        self.stdout.write("{0:<10} {1:>8} {2:>8} {3:>12} {4:>10} {5:>12}".format(
+            'format', 'renders', 'errors', 'bytes', 'renders/s', 'bytes/s'))
+        for row in stats.summary():
+            self.stdout.write("{format:<10} {renders:>8} {errors:>8} {bytes:>12} "
+                              "{renders_per_second:>10.1f} {bytes_per_second:>12.0f}".format(**row))
+        self.stdout.write("Finished in {0:.2f}s".format(stats.wall_time))
+        for name, format, failure in stats.failures:
+            self.stderr.write("Failed to render {0} to {1}:\n{2}".format(name, format, failure))
+
+    def read_jobs(self, jobs_file):
+        for i, line in enumerate(jobs_file):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            yield (job.get('context', {}), job.get('template_name'),
+                   job['formats'], job.get('name', i))
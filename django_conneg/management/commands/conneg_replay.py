@@ -0,0 +1,81 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from django_conneg.support import loadtest
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), '..', '..', 'tests', 'replay', 'corpus.jsonl')
+
+class Command(BaseCommand):
+    help = """Replays a corpus of requests against a local WSGI server and reports
+latency percentiles, throughput and RSS for each scenario.
+
+Run it against the sample project with --settings=django_conneg.test_settings.
+With --baseline, exits with an error if any scenario has regressed."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=100,
+                            help="How many times to replay each scenario's requests")
+        parser.add_argument('--baseline', help="Compare results against this file")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed fractional regression against the baseline")
+        parser.add_argument('--write-baseline', help="Write results to this file")
+        parser.add_argument('--no-test-db', action='store_true',
+                            help="Use the configured database rather than creating a test database")
+
+    def handle(self, *args, **options):
+        with open(options['corpus']) as corpus_file:
+            scenarios = loadtest.read_corpus(corpus_file)
+
+        if not options['no_test_db']:
+            old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            self.create_users(scenarios)
+            with loadtest.LocalServer() as server:
+                replayer = loadtest.Replayer(server.host, server.port,
+                                             concurrency=options['concurrency'],
+                                             repeat=options['repeat'])
+                results = replayer.run(scenarios)
+        finally:
+            if not options['no_test_db']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results)
+
+        if options['write_baseline']:
+            with open(options['write_baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = loadtest.compare(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+
+    def create_users(self, scenarios):
+        """
+        Creates active users for all the credentials in the corpus that
+        aren't deliberately wrong (i.e. whose password matches their
+        username).
+        """
+        from django.contrib.auth.models import User
+        for entries in scenarios.values():
+            for entry in entries:
+                if not entry.get('auth'):
+                    continue
+                username, password = entry['auth'].split(':', 1)
+                if username == password and not User.objects.filter(username=username).exists():
+                    User.objects.create_user(username, password=password)
+
+    def report(self, results):
+        self.stdout.write("{0:<32} {1:>8} {2:>9} {3:>9} {4:>9} {5:>10} {6:>8}  {7}".format(
+            'scenario', 'requests', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'RSS MB', 'statuses'))
+        for name, result in results.items():
+            self.stdout.write("{0:<32} {1:>8} {2:>9.2f} {3:>9.2f} {4:>9.2f} {5:>10.1f} {6:>8.1f}  {7}".format(
+                name[:32], result['requests'], result['p50'] * 1000, result['p95'] * 1000,
+                result['p99'] * 1000, result['throughput'], result['rss'] / 1048576.0,
+                ' '.join('%s:%d' % item for item in sorted(result['statuses'].items()))))
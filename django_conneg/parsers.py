@@ -0,0 +1,102 @@
+"""
+Built-in request body parsers, as mixins for negotiated views.
+
+Mix in the parsers a view should accept, and call self.parse() to get the
+parsed body:
+
+    class ImportView(JSONParser, NDJSONParser, CSVParser, JSONView):
+        def post(self, request):
+            for record in self.parse():
+                ...
+
+Bodies of any other type result in a 415 Unsupported Media Type response.
+The NDJSON and CSV parsers return iterators that read the request a line at
+a time, so large uploads needn't be held in memory.
+"""
+
+from __future__ import unicode_literals
+
+import codecs
+import csv
+import json
+
+from django.http import QueryDict
+from django.http.multipartparser import MultiPartParser, MultiPartParserError
+
+from django_conneg.decorators import parser
+from django_conneg.http import HttpBadRequest, HttpUnsupportedMediaType
+
+def _get_charset(request, media_type, default='utf-8'):
+    charset = media_type.params.get('charset', default).strip('"')
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        raise HttpUnsupportedMediaType(request.META.get('CONTENT_TYPE'), ())
+    return charset
+
+def _iter_lines(request, charset):
+    decoder = codecs.getincrementaldecoder(charset)()
+    for line in request:
+        yield decoder.decode(line)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+class JSONParser(object):
+    @parser(format='json', mimetypes=('application/json',), name='JSON')
+    def parse_json(self, request, media_type):
+        charset = _get_charset(request, media_type)
+        try:
+            return json.load(codecs.getreader(charset)(request))
+        except ValueError as e:
+            raise HttpBadRequest(message="Request body isn't valid JSON: %s" % e)
+
+class NDJSONParser(object):
+    @parser(format='ndjson', mimetypes=('application/x-ndjson', 'application/jsonlines'),
+            name='Newline-delimited JSON')
+    def parse_ndjson(self, request, media_type):
+        charset = _get_charset(request, media_type)
+        def records():
+            for i, line in enumerate(_iter_lines(request, charset)):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise HttpBadRequest(message="Line %d of request body isn't valid JSON: %s" % (i + 1, e))
+        return records()
+
+class CSVParser(object):
+    # If True, the first row is taken as a header and rows are returned as
+    # dicts; otherwise, rows are returned as lists.
+    _csv_header = True
+
+    @parser(format='csv', mimetypes=('text/csv',), name='CSV')
+    def parse_csv(self, request, media_type):
+        charset = _get_charset(request, media_type)
+        lines = _iter_lines(request, charset)
+        if self._csv_header:
+            return csv.DictReader(lines)
+        return csv.reader(lines)
+
+class FormParser(object):
+    @parser(format='form', mimetypes=('application/x-www-form-urlencoded', 'multipart/form-data'),
+            name='Form')
+    def parse_form(self, request, media_type):
+        """
+        Returns request.POST. For methods other than POST, Django doesn't parse
+        form bodies itself, so we do so here, leaving any uploaded files in
+        request.FILES. Multipart uploads are streamed to Django's upload
+        handlers.
+        """
+        if request.method != 'POST' and not hasattr(request, '_post'):
+            if media_type.type[:2] == ('multipart', 'form-data'):
+                try:
+                    parser = MultiPartParser(request.META, request, request.upload_handlers, request.encoding)
+                    request._post, request._files = parser.parse()
+                except MultiPartParserError as e:
+                    raise HttpBadRequest(message="Couldn't parse multipart body: %s" % e)
+            else:
+                request._post = QueryDict(request.read(), encoding=request.encoding)
+                request._files = QueryDict(encoding=request.encoding)
+        return request.POST
@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Sent when a renderer's circuit breaker opens, with arguments view_class (a
+# dotted path), format, failures and calls.
+renderer_tripped = Signal()
+
+# Sent when a view skips a renderer whose circuit breaker is open, with
+# arguments view, renderer and request.
+renderer_skipped = Signal()
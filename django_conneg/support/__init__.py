@@ -1 +1,92 @@
+"""
+Helpers shared by the support modules.
+"""
 
+from __future__ import unicode_literals
+
+import functools
+import os
+import stat
+import tempfile
+import threading
+
+from django.core.signals import setting_changed
+
+def view_path(cls_or_obj):
+    """
+    Returns the dotted path of a class (usually a view's), or of the class of
+    an instance, as used in keys and in settings that name views.
+    """
+    cls = cls_or_obj if isinstance(cls_or_obj, type) else type(cls_or_obj)
+    return '{0}.{1}'.format(cls.__module__, cls.__name__)
+
+def private_directory(*names):
+    """
+    Returns a directory in the temporary directory for the current user's
+    files (or a subdirectory of it named by names), creating it if need be.
+
+    Raises OSError if it, or any directory above it, is owned by someone
+    else, is a symlink, or can be written to by others, as other users
+    could then plant files in it.
+    """
+    getuid = getattr(os, 'getuid', None)
+    paths = [os.path.join(tempfile.gettempdir(),
+                          'django-conneg' if getuid is None else 'django-conneg-{0}'.format(getuid()))]
+    for name in names:
+        paths.append(os.path.join(paths[-1], name))
+    for path in paths:
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) or (getuid is not None and st.st_uid != getuid()) or \
+                st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise OSError("{0} isn't a private directory".format(path))
+    return path
+
+def settings_singleton(*setting_names, on_reset=None):
+    """
+    Decorates a function that builds an object from settings, so that it's
+    only called once, and again after any of setting_names changes. Names
+    ending in an underscore (e.g. 'CONNEG_BREAKER_') match as prefixes.
+
+    The decorated function gets a reset() method, which forgets the object
+    and returns it (or None). If on_reset is given, it's called with each
+    object forgotten when a setting changes.
+    """
+    def matches(setting):
+        return any(setting.startswith(name) if name.endswith('_') else setting == name
+                   for name in setting_names)
+
+    def decorator(func):
+        state = {'instance': None}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def get():
+            instance = state['instance']
+            if instance is None:
+                with lock:
+                    if state['instance'] is None:
+                        state['instance'] = func()
+                    instance = state['instance']
+            return instance
+
+        def reset():
+            with lock:
+                instance, state['instance'] = state['instance'], None
+            return instance
+
+        def reset_on_change(setting, **kwargs):
+            if matches(setting):
+                instance = reset()
+                if instance is not None and on_reset is not None:
+                    on_reset(instance)
+
+        get.reset = reset
+        # Held by the function, as the receiver is only weakly referenced.
+        get._reset_on_change = reset_on_change
+        setting_changed.connect(reset_on_change)
+        return get
+    return decorator
@@ -0,0 +1,145 @@
+"""
+Circuit breakers for renderers with latency budgets.
+
+Renderers declared with a budget (in seconds) have their recent calls
+tracked for each view class. A call fails if it raises an exception or takes
+longer than the budget. Once enough of the recent calls have failed, the
+breaker opens, and negotiation skips the renderer in favour of the next
+acceptable one. After a cool-down period one call is let through; if it
+succeeds the breaker closes again, and if not it stays open for another
+cool-down period. A trial whose outcome is never recorded (say, because the
+response came from elsewhere) only holds up further trials for one
+cool-down period. It's configured with these settings:
+
+CONNEG_BREAKER_WINDOW
+    The number of recent calls to consider. Defaults to 20.
+CONNEG_BREAKER_MIN_CALLS
+    The fewest calls in the window before the breaker can open. Defaults
+    to 5.
+CONNEG_BREAKER_FAILURE_RATIO
+    The proportion of calls in the window that must fail for the breaker to
+    open. Defaults to 0.5.
+CONNEG_BREAKER_COOLDOWN
+    The number of seconds a breaker stays open. Defaults to 30.
+
+State is kept per process.
+"""
+
+from __future__ import division, unicode_literals
+
+from collections import deque
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from django_conneg.signals import renderer_tripped
+from django_conneg.support import settings_singleton, view_path
+
+logger = logging.getLogger(__name__)
+
+class _State(object):
+    def __init__(self, window):
+        self.calls = deque(maxlen=window)
+        self.opened = None
+        # When the current trial call was let through, if there is one
+        self.trial = None
+
+class CircuitBreaker(object):
+    def __init__(self, window=20, min_calls=5, failure_ratio=0.5, cooldown=30):
+        self.window, self.min_calls = window, min_calls
+        self.failure_ratio, self.cooldown = failure_ratio, cooldown
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(view, renderer):
+        return view_path(view), renderer.format
+
+    def _state(self, key):
+        state = self._states.get(key)
+        if state is None:
+            state = self._states.setdefault(key, _State(self.window))
+        return state
+
+    def allow(self, view, renderer):
+        """
+        Returns whether renderer may be called. When a breaker has been open
+        for its cool-down period, this returns True once, for a trial call.
+        """
+        if renderer.budget is None:
+            return True
+        with self._lock:
+            state = self._state(self.key(view, renderer))
+            if state.opened is None:
+                return True
+            now = time.time()
+            if state.trial is not None and now - state.trial < self.cooldown:
+                return False
+            if now - state.opened >= self.cooldown:
+                state.trial = now
+                return True
+            return False
+
+    def is_open(self, view, renderer):
+        state = self._states.get(self.key(view, renderer))
+        return state is not None and state.opened is not None
+
+    def retry_after(self, view, renderers):
+        """
+        Returns the whole number of seconds until one of renderers may be
+        called again.
+        """
+        now, waits = time.time(), []
+        for renderer in renderers:
+            state = self._states.get(self.key(view, renderer))
+            if state is None or state.opened is None:
+                return 0
+            waits.append(state.opened + self.cooldown - now)
+        return max(0, int(math.ceil(min(waits)))) if waits else 0
+
+    def record(self, view, renderer, elapsed, failed=False):
+        """
+        Records a call of renderer that took elapsed seconds, and failed if
+        it raised an exception.
+        """
+        if renderer.budget is None:
+            return
+        failed = failed or elapsed > renderer.budget
+        key = self.key(view, renderer)
+        with self._lock:
+            state = self._state(key)
+            if state.trial is not None:
+                state.trial = None
+                if failed:
+                    state.opened = time.time()
+                else:
+                    state.opened = None
+                    state.calls.clear()
+                return
+            state.calls.append(failed)
+            if state.opened is not None or len(state.calls) < self.min_calls:
+                return
+            failures = sum(state.calls)
+            if failures / len(state.calls) < self.failure_ratio:
+                return
+            state.opened = time.time()
+            calls = len(state.calls)
+        logger.warning("Renderer %s for %s tripped after %d of %d calls failed", key[1], key[0], failures, calls)
+        renderer_tripped.send(sender=self, view_class=key[0], format=key[1], failures=failures, calls=calls)
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+
+@settings_singleton('CONNEG_BREAKER_')
+def get_breaker():
+    """
+    Returns the CircuitBreaker configured by settings.
+    """
+    return CircuitBreaker(window=getattr(settings, 'CONNEG_BREAKER_WINDOW', 20),
+                          min_calls=getattr(settings, 'CONNEG_BREAKER_MIN_CALLS', 5),
+                          failure_ratio=getattr(settings, 'CONNEG_BREAKER_FAILURE_RATIO', 0.5),
+                          cooldown=getattr(settings, 'CONNEG_BREAKER_COOLDOWN', 30))
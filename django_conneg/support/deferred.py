@@ -0,0 +1,132 @@
+"""
+Background rendering for renderers declared with deferred=True.
+
+When a deferred renderer is negotiated for a GET request, the render is handed
+to a pool of worker threads and the client gets a 202 Accepted response
+pointing at a status URL. Job state is kept in a Django cache, keyed on the
+view, the request path, the renderer's format, the user and (where the view
+provides one) the representation's ETag, so repeated requests for the same
+representation share one job, across processes if the cache is shared.
+Finished representations are written to the range spool (see
+django_conneg.support.ranges) and served from there by later requests, with
+a random token kept with the job so that only the file the job wrote is
+served.
+
+It's configured with these settings:
+
+CONNEG_DEFERRED_CACHE
+    The alias of the cache that holds job state. Defaults to 'default'. It
+    needs to be a real cache; with a DummyCache no job ever finishes.
+CONNEG_DEFERRED_WORKERS
+    The number of worker threads in each process. Defaults to 2.
+CONNEG_DEFERRED_TIMEOUT
+    The number of seconds after which an unfinished job is presumed lost
+    (e.g. because its process exited) and is queued again by the next
+    request. Defaults to 600.
+CONNEG_DEFERRED_MAX_AGE
+    The number of seconds for which a finished representation is served
+    before it's rendered afresh. Defaults to 3600.
+
+Renders run in threads rather than processes, as they need the view, request
+and context, which generally can't be pickled.
+"""
+
+from __future__ import unicode_literals
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from django_conneg.support import ranges, settings_singleton
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+class JobStore(object):
+    def __init__(self, cache_alias='default', timeout=600, max_age=3600):
+        self.cache_alias = cache_alias
+        self.timeout, self.max_age = timeout, max_age
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def cache_key(self, key):
+        return 'conneg-deferred:' + hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the job for key, or None.
+        """
+        return self.cache.get(self.cache_key(key))
+
+    def claim(self, key):
+        """
+        Records a new pending job for key, returning it if the caller should
+        queue it, or None if there's already a job for key.
+        """
+        job = {'state': PENDING, 'created': time.time()}
+        if self.cache.add(self.cache_key(key), job, self.timeout):
+            return job
+        return None
+
+    def update(self, key, job, state, **kwargs):
+        job = dict(job, state=state, **kwargs)
+        timeout = self.max_age if state in (DONE, FAILED) else self.timeout
+        self.cache.set(self.cache_key(key), job, timeout)
+        return job
+
+    def delete(self, key):
+        self.cache.delete(self.cache_key(key))
+
+def run_job(store, key, job, render):
+    """
+    Calls render() and spools the response it returns as the result of job.
+    """
+    job = store.update(key, job, RUNNING)
+    token = uuid.uuid4().hex
+    try:
+        response = render()
+        if response is NotImplemented:
+            raise ValueError("Deferred renderer declined to render")
+        if response.status_code != 200:
+            response.close()
+            raise ValueError("Deferred renderer returned status %d" % response.status_code)
+        ranges.get_spool().put(key, response, token).close()
+    except Exception as e:
+        logger.exception("Deferred render failed")
+        store.update(key, job, FAILED, message='{0}'.format(e), finished=time.time())
+    else:
+        store.update(key, job, DONE, finished=time.time(), token=token)
+    finally:
+        connections.close_all()
+
+@settings_singleton('CONNEG_DEFERRED_WORKERS', on_reset=lambda executor: executor.shutdown(wait=False))
+def get_executor():
+    """
+    Returns the thread pool that deferred jobs are run in.
+    """
+    return concurrent.futures.ThreadPoolExecutor(getattr(settings, 'CONNEG_DEFERRED_WORKERS', 2))
+
+def submit(store, key, job, render):
+    """
+    Queues job to be run by a worker thread.
+    """
+    return get_executor().submit(run_job, store, key, job, render)
+
+@settings_singleton('CONNEG_DEFERRED_')
+def get_job_store():
+    """
+    Returns the JobStore configured by settings.
+    """
+    return JobStore(cache_alias=getattr(settings, 'CONNEG_DEFERRED_CACHE', 'default'),
+                    timeout=getattr(settings, 'CONNEG_DEFERRED_TIMEOUT', 600),
+                    max_age=getattr(settings, 'CONNEG_DEFERRED_MAX_AGE', 3600))
@@ -0,0 +1,133 @@
+"""
+Helpers for streaming server-sent events (text/event-stream).
+
+Events are taken from an iterator or async iterator. Where keep-alives are
+wanted, or the events come from an async iterator, they're consumed in a
+separate thread and handed over through a bounded queue. If the client reads
+slowly the queue fills and the producer blocks, so a fast source can't get
+arbitrarily far ahead of the connection.
+"""
+
+from __future__ import unicode_literals
+
+import asyncio
+import logging
+import queue
+import threading
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+class Event(object):
+    """
+    An event with optional id, event type and reconnection time (in ms).
+
+    Values from an event stream that aren't Events are sent as data-only
+    events.
+    """
+    def __init__(self, data=None, id=None, event=None, retry=None):
+        self.data, self.id, self.event, self.retry = data, id, event, retry
+
+    def __repr__(self):
+        return "Event(%r, id=%r, event=%r)" % (self.data, self.id, self.event)
+
+# Yielded by iter_events() when no event arrived within the keep-alive interval.
+KEEPALIVE = object()
+_END = object()
+
+def _field(name, value):
+    # Field values can't contain line breaks.
+    return '{0}: {1}\n'.format(name, ' '.join('{0}'.format(value).splitlines()))
+
+def encode_event(event, data):
+    """
+    Returns the wire format of an Event whose data has already been
+    serialized to a string.
+    """
+    lines = []
+    if event.id is not None:
+        lines.append(_field('id', event.id))
+    if event.event:
+        lines.append(_field('event', event.event))
+    if event.retry is not None:
+        lines.append(_field('retry', int(event.retry)))
+    for line in data.splitlines() or ['']:
+        lines.append('data: {0}\n'.format(line))
+    return ''.join(lines) + '\n'
+
+def encode_comment(comment=''):
+    return ': {0}\n\n'.format(' '.join(comment.splitlines()))
+
+def is_async_iterable(events):
+    return hasattr(events, '__aiter__')
+
+def _produce(events, buffer, stopped):
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        if is_async_iterable(events):
+            async def consume():
+                async for event in events:
+                    if not put(event):
+                        break
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(consume())
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+        else:
+            for event in events:
+                if not put(event):
+                    break
+    except Exception:
+        logger.exception("Event stream producer failed")
+    finally:
+        try:
+            close = getattr(events, 'close', None)
+            if callable(close) and not is_async_iterable(events):
+                close()
+        finally:
+            # Events may come from QuerySets, whose connections belong to
+            # this thread and would otherwise be left open.
+            connections.close_all()
+            put(_END)
+
+def iter_events(events, keepalive=None, buffer_size=16):
+    """
+    Yields the events from an iterator or async iterator, yielding KEEPALIVE
+    whenever keepalive seconds pass without one.
+
+    At most buffer_size events are read ahead of the consumer. When the
+    returned generator is closed (e.g. because the client went away) the
+    producer stops at the next event.
+    """
+    if keepalive is None and not is_async_iterable(events):
+        for event in events:
+            yield event
+        return
+
+    buffer, stopped = queue.Queue(buffer_size), threading.Event()
+    producer = threading.Thread(target=_produce, args=(events, buffer, stopped))
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            try:
+                event = buffer.get(timeout=keepalive)
+            except queue.Empty:
+                yield KEEPALIVE
+                continue
+            if event is _END:
+                break
+            yield event
+    finally:
+        stopped.set()
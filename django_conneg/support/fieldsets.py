@@ -0,0 +1,77 @@
+"""
+Field selections ("sparse fieldsets") for JSON-like renderers.
+
+A selection is given as a list of dotted paths, e.g. ['title', 'author.name'],
+and represented as a tree of dicts in which None stands for a whole subtree:
+
+    {'title': None, 'author': {'name': None}}
+
+A selection of None selects everything.
+"""
+
+from __future__ import unicode_literals
+
+import re
+
+_SEPARATOR_RE = re.compile(r'[\s,]+')
+
+def split_fields(value):
+    """
+    Splits a comma- or space-separated list of field paths.
+    """
+    return [field for field in _SEPARATOR_RE.split(value) if field]
+
+def parse_fields(paths):
+    """
+    Returns the selection tree for an iterable of dotted field paths.
+    """
+    selection = {}
+    for path in paths:
+        node, names = selection, path.split('.')
+        for name in names[:-1]:
+            child = node.get(name, {})
+            if child is None:
+                break
+            node = node.setdefault(name, child)
+        else:
+            node[names[-1]] = None
+    return selection
+
+def restrict(selection, allowed, prefix=''):
+    """
+    Returns selection limited to what allowed permits, raising ValueError
+    with the offending path if it selects a field that isn't allowed.
+
+    Either may be None, meaning everything.
+    """
+    if allowed is None:
+        return selection
+    if selection is None:
+        return allowed
+    result = {}
+    for name, child in selection.items():
+        if name not in allowed:
+            raise ValueError(prefix + name)
+        result[name] = restrict(child, allowed[name], prefix + name + '.')
+    return result
+
+def select_paths(paths, selection, separator='__'):
+    """
+    Returns those of paths (e.g. Django field paths) that fall within
+    selection, or that lead towards something selected.
+    """
+    if selection is None:
+        return list(paths)
+    selected = []
+    for path in paths:
+        node = selection
+        for name in path.split(separator):
+            if node is None:
+                break
+            if name not in node:
+                node = False
+                break
+            node = node[name]
+        if node is not False:
+            selected.append(path)
+    return selected
@@ -0,0 +1,90 @@
+"""
+Incremental JSON encoding for responses too large to build in memory.
+
+Wrap a lazy iterable in StreamedList and pass the structure containing it to
+iterencode(). Anything that doesn't contain a StreamedList is encoded in one
+go by the json module; each StreamedList is consumed one item at a time as
+the response is written.
+"""
+
+from __future__ import unicode_literals
+
+import json
+
+class StreamedList(object):
+    """
+    An iterable to be encoded as a JSON array without being materialized.
+    """
+    def __init__(self, iterable):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.iterable)
+
+class _ContainsStream(Exception):
+    pass
+
+def _reject_streams(o):
+    if isinstance(o, StreamedList):
+        raise _ContainsStream
+    raise TypeError("Object of type %r is not JSON serializable" % type(o))
+
+def _iterencode(value, indent, level=0):
+    """
+    Returns an iterator over the JSON encoding of value, as nested level
+    levels deep.
+
+    Anything without a StreamedList in it is encoded by json.dumps() in one
+    go; dicts and lists that do contain one are walked, so that the
+    StreamedList can be encoded an item at a time where it's found.
+    """
+    if isinstance(value, StreamedList):
+        return _iterencode_container(((None, item) for item in value), False, indent, level)
+    try:
+        text = json.dumps(value, indent=indent, default=_reject_streams)
+    except _ContainsStream:
+        if isinstance(value, dict):
+            return _iterencode_container(value.items(), True, indent, level)
+        return _iterencode_container(((None, item) for item in value), False, indent, level)
+    if indent is not None and level:
+        text = text.replace('\n', '\n' + ' ' * (indent * level))
+    return iter((text,))
+
+def _iterencode_container(items, is_dict, indent, level):
+    if indent is None:
+        separator, newline, closing = ', ', '', ''
+    else:
+        separator = ','
+        newline = '\n' + ' ' * (indent * (level + 1))
+        closing = '\n' + ' ' * (indent * level)
+    opening, end = '{}' if is_dict else '[]'
+
+    yield opening
+    empty = True
+    for key, item in items:
+        yield newline if empty else separator + newline
+        empty = False
+        if is_dict:
+            # As the json module does, giving non-string keys as strings of
+            # their encodings (e.g. 1 becomes "1" and None becomes "null")
+            yield json.dumps(key if isinstance(key, str) else json.dumps(key)) + ': '
+        for chunk in _iterencode(item, indent, level + 1):
+            yield chunk
+    yield end if empty else closing + end
+
+def iterencode(value, indent=None, buffer_size=8192):
+    """
+    Yields the JSON encoding of value in chunks of roughly buffer_size.
+    """
+    buf, size = [], 0
+    for chunk in _iterencode(value, indent):
+        buf.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield ''.join(buf)
+            buf, size = [], 0
+    if buf:
+        yield ''.join(buf)
@@ -0,0 +1,169 @@
+"""
+Replays a corpus of recorded requests against a local WSGI server.
+
+This exercises the whole stack (middleware, negotiated dispatch, error views
+and renderers) rather than individual functions. A corpus is a file of JSON
+objects, one per line, with keys:
+
+    method    defaults to GET
+    path      required
+    accept    the Accept header to send, if any
+    auth      'username:password' for HTTP Basic authentication, if any
+    scenario  a name to group results under; defaults to the method, path and
+              Accept header
+
+Each scenario is replayed in turn at the given concurrency, and reported
+with its latency percentiles, throughput and the server process's resident
+set size once it's finished. The server runs in the same process as the
+client threads, so RSS includes both.
+"""
+
+from __future__ import division, unicode_literals
+
+import base64
+from collections import OrderedDict, defaultdict
+import concurrent.futures
+import json
+import math
+import resource
+import threading
+import time
+
+import http.client as http_client
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.core.wsgi import get_wsgi_application
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class _QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def read_corpus(corpus_file):
+    """
+    Returns an OrderedDict of scenario names to lists of request dicts.
+    """
+    scenarios = OrderedDict()
+    for line in corpus_file:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        entry.setdefault('method', 'GET')
+        scenario = entry.get('scenario') or ' '.join(filter(None, [entry['method'], entry['path'], entry.get('accept')]))
+        scenarios.setdefault(scenario, []).append(entry)
+    return scenarios
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of a sorted list, by the nearest-rank method.
+    """
+    if not values:
+        return None
+    rank = max(int(math.ceil(p / 100 * len(values))) - 1, 0)
+    return values[rank]
+
+def current_rss():
+    """
+    Returns the resident set size of this process in bytes, falling back to
+    the peak RSS where the current value isn't available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError):
+        # ru_maxrss is in kilobytes on Linux and bytes on OS X; we only get
+        # here on the latter.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class LocalServer(object):
+    """
+    Runs the Django WSGI application on an ephemeral port in a thread.
+    """
+    def __init__(self, host='127.0.0.1', port=0):
+        self.httpd = make_server(host, port, get_wsgi_application(),
+                                 server_class=_ThreadingWSGIServer,
+                                 handler_class=_QuietWSGIRequestHandler)
+        self.host, self.port = self.httpd.server_address[:2]
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class Replayer(object):
+    def __init__(self, host, port, concurrency=8, repeat=1, timeout=30):
+        self.host, self.port = host, port
+        self.concurrency, self.repeat, self.timeout = concurrency, repeat, timeout
+
+    def send(self, entry):
+        headers = {}
+        if entry.get('accept'):
+            headers['Accept'] = entry['accept']
+        if entry.get('auth'):
+            credentials = base64.b64encode(entry['auth'].encode('utf-8')).decode('ascii')
+            headers['Authorization'] = 'Basic ' + credentials
+        connection = http_client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            start = time.time()
+            connection.request(entry['method'], entry['path'], headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status, time.time() - start
+        finally:
+            connection.close()
+
+    def run_scenario(self, entries):
+        entries = entries * self.repeat
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as executor:
+            start = time.time()
+            results = list(executor.map(self.send, entries))
+            wall_time = time.time() - start
+
+        latencies = sorted(latency for status, latency in results)
+        statuses = defaultdict(int)
+        for status, latency in results:
+            statuses[status] += 1
+        return {'requests': len(results),
+                'statuses': dict((str(k), v) for k, v in statuses.items()),
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'throughput': len(results) / (wall_time or 1e-9),
+                'rss': current_rss()}
+
+    def run(self, scenarios):
+        return OrderedDict((name, self.run_scenario(entries))
+                           for name, entries in scenarios.items())
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns a list of human-readable regressions of results against baseline.
+
+    A scenario has regressed if its p95 or p99 latency has grown, or its
+    throughput has fallen, by more than the given fraction. Scenarios missing
+    from the baseline are ignored.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for key in ('p95', 'p99'):
+            if result[key] > expected[key] * (1 + tolerance):
+                regressions.append("{0}: {1} rose from {2:.1f}ms to {3:.1f}ms".format(
+                    name, key, expected[key] * 1000, result[key] * 1000))
+        if result['throughput'] < expected['throughput'] * (1 - tolerance):
+            regressions.append("{0}: throughput fell from {1:.1f}/s to {2:.1f}/s".format(
+                name, expected['throughput'], result['throughput']))
+        if set(result['statuses']) != set(expected['statuses']):
+            regressions.append("{0}: status codes changed from {1} to {2}".format(
+                name, expected['statuses'], result['statuses']))
+    return regressions
@@ -1,16 +1,13 @@
 import base64
-try: # Python 3
-    from http.client import UNAUTHORIZED, FORBIDDEN, FOUND
-    import urllib.parse as urllib_parse
-except ImportError: # Python 2.x
-    from httplib import UNAUTHORIZED, FORBIDDEN, FOUND
-    import urlparse as urllib_parse
+from http.client import UNAUTHORIZED, FORBIDDEN, FOUND
+import urllib.parse as urllib_parse
 
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.utils.deprecation import MiddlewareMixin
+from django_conneg.conneg import Conneg
 from django_conneg.http import MediaType
-from django_conneg.views import HTMLView, JSONPView, TextView
+from django_conneg.views import BaseContentNegotiatedView, HTMLView, JSONPView, TextView
 
 class UnauthorizedView(HTMLView, JSONPView, TextView):
     _force_fallback_format = 'txt'
@@ -130,3 +127,111 @@ class BasicAuthMiddleware(MiddlewareMixin):
             # X-Requested-With if the request is being made from JavaScript.
             return False
         return True
+
+
+def _view_conneg(view):
+    view_class = getattr(view, 'view_class', view)
+    if not (isinstance(view_class, type) and issubclass(view_class, BaseContentNegotiatedView)):
+        return None, None
+    return view_class, getattr(view, 'conneg', None) or Conneg(obj=view_class)
+
+def canonical_format(view, accept_header):
+    """
+    Returns the format a negotiated view would prefer for an Accept header.
+
+    view may be a BaseContentNegotiatedView subclass or the function returned
+    by its as_view(). Returns None if the view isn't content-negotiated, or if
+    none of its renderers would be acceptable.
+    """
+    view_class, conneg = _view_conneg(view)
+    if conneg is None:
+        return None
+    return conneg.canonical_format(accept_header, view_class._default_format)
+
+def canonical_accept(view, accept_header):
+    """
+    Returns an Accept header that a negotiated view would resolve to the same
+    formats, in the same order, as accept_header, or None if none of its
+    renderers would be acceptable.
+
+    Each format's mimetypes are listed together, with successively lower
+    quality values, so that the view can still fall back to later formats.
+    """
+    view_class, conneg = _view_conneg(view)
+    if conneg is None:
+        return None
+    formats = []
+    for renderer in conneg.get_renderers(request=None, accept_header=accept_header,
+                                         default_format=view_class._default_format,
+                                         fallback_formats=(), early=True):
+        if renderer.format not in formats:
+            formats.append(renderer.format)
+    media_ranges = []
+    for i, format in enumerate(formats):
+        mimetypes = sorted(set(m.value for r in conneg.renderers_by_format[format] for m in r.mimetypes))
+        q = '' if i == 0 else ';q={0:.2f}'.format(max(1 - i / 100, 0.01))
+        media_ranges.extend(mimetype + q for mimetype in mimetypes)
+    return ', '.join(media_ranges) or None
+
+def accept_table(view, accept_headers):
+    """
+    Returns a list of (accept_header, format) pairs for the given headers.
+
+    This is intended to be dumped for use in configuring a reverse proxy, so
+    that it can normalize Accept headers itself.
+    """
+    return [(accept_header, canonical_format(view, accept_header))
+            for accept_header in accept_headers]
+
+class CanonicalAcceptMiddleware(MiddlewareMixin):
+    """
+    Exposes the format a negotiated view will prefer as a response header.
+
+    Caches in front of Django see Vary: Accept and would otherwise store a
+    separate copy for every distinct Accept header. Keying on this header
+    instead collapses those onto one copy per format. With
+    CONNEG_REWRITE_ACCEPT set, the request's Accept header is also replaced
+    by canonical_accept(), which lists the mimetypes of the formats the view
+    would try, in order, so that requests that map onto the same formats
+    look the same to the view.
+
+    A format chosen by the URL or by the format override parameter is used
+    as is, and the Accept header left alone.
+    """
+
+    def __init__(self, get_response=None):
+        super(CanonicalAcceptMiddleware, self).__init__(get_response)
+        self.format_header = getattr(settings, 'CONNEG_FORMAT_HEADER', 'X-Conneg-Format')
+        self.rewrite_accept = getattr(settings, 'CONNEG_REWRITE_ACCEPT', False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class, conneg = _view_conneg(view_func)
+        if view_class is None:
+            return
+        if view_kwargs.get(view_class._format_url_parameter):
+            # The URL chose the format, so the Accept header doesn't matter
+            request.conneg_format = view_kwargs[view_class._format_url_parameter]
+            return
+        format_override = request.GET.get(view_class._format_override_parameter)
+        if format_override:
+            # As does the query string, with the first format the view has
+            for format in format_override.split(','):
+                if conneg.renderers_by_format.get(format):
+                    request.conneg_format = format
+                    break
+            return
+
+        accept_header = request.META.get('HTTP_ACCEPT')
+        format = canonical_format(view_func, accept_header)
+        if format is None:
+            return
+        request.conneg_format = format
+
+        if self.rewrite_accept and accept_header:
+            request.META['HTTP_ACCEPT'] = canonical_accept(view_func, accept_header)
+
+    def process_response(self, request, response):
+        format = getattr(request, 'conneg_format', None)
+        if format is not None:
+            response[self.format_header] = format
+        return response
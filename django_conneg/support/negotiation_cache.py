@@ -0,0 +1,368 @@
+"""
+Caches the renderers each view class prefers for each Accept header.
+
+Resolved Accept headers are always remembered in each process. They can also
+be shared between processes (e.g. the workers of an application server), so
+that newly started workers needn't re-derive what their siblings already
+have. This is configured with the CONNEG_NEGOTIATION_CACHE setting, which if
+given is a dict with keys:
+
+BACKEND
+    The dotted path of a backend class. Either
+    django_conneg.support.negotiation_cache.MmapBackend, which keeps entries
+    in a memory-mapped file of fixed-size records shared by the processes on
+    a host, or django_conneg.support.negotiation_cache.DjangoCacheBackend,
+    which keeps them in one of the project's Django caches.
+OPTIONS
+    Keyword arguments for the backend.
+MAX_ENTRIES
+    The most entries to keep in each process for each view class. Defaults
+    to 1024.
+
+Entries are versioned by a digest of the view class's dotted path and its
+renderers' names, formats, mimetypes and priorities, so that a deploy that
+changes a view's renderers doesn't pick up stale entries. Each process loads
+the shared entries for a view class the first time that class negotiates,
+and publishes those it resolves itself.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from django_conneg.support import private_directory, settings_singleton, view_path
+
+logger = logging.getLogger(__name__)
+
+# Returned by backends when they don't have an entry. (None is a valid
+# entry, meaning that the Accept header contained nothing parseable.)
+MISSING = object()
+
+def _digest(*parts):
+    value = hashlib.sha1('\0'.join(parts).encode('utf-8', 'surrogatepass')).digest()
+    # Never zero, as MmapBackend uses that to mark empty records.
+    return struct.unpack('<Q', value[:8])[0] | 1
+
+class LocalBackend(object):
+    """
+    Doesn't share entries at all.
+    """
+    def load(self, version):
+        return {}
+
+    def get(self, version, accept):
+        return MISSING
+
+    def publish(self, version, accept, entry):
+        pass
+
+class MmapBackend(object):
+    """
+    Keeps entries in an open-addressed hash table of fixed-size records in a
+    memory-mapped file.
+
+    Each record holds the entry's version, a digest of its Accept header, a
+    CRC, the header itself and the indexes of the resolved renderers.
+    Records are written without locking; a reader that sees a partly-written
+    record will find its CRC doesn't match, and ignore it. Entries whose
+    Accept header doesn't fit in a record aren't shared.
+
+    By default the file is kept in a directory private to the current user.
+    Symlinks aren't followed, and a file owned by someone else is refused.
+    """
+    magic = b'CNEG'
+    layout_version = 1
+    _header = struct.Struct('<4sHHII')
+    _record = struct.Struct('<QQIHH')
+    _no_renderers = 0xffff
+
+    def __init__(self, path=None, slots=4096, record_size=256, probes=8):
+        self.path = path or os.path.join(private_directory(), 'negotiation.cache')
+        self.probes = probes
+        fd = self._open(self.path, os.O_CREAT)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            layout = self._read_layout(fd)
+            if layout is not None:
+                # Another process created the file; use its layout.
+                slots, record_size = layout
+            self.slots, self.record_size = slots, record_size
+            size = self._header.size + slots * record_size
+            if layout is None and os.fstat(fd).st_size:
+                # The file has some other layout. Other processes may have it
+                # mapped, and would crash if it shrank under them, so a new
+                # file takes its place instead.
+                new_fd = self._create_replacement(size)
+                self._unlock_and_close(fd)
+                fd = new_fd
+            elif layout is None:
+                self._initialize(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            self._unlock_and_close(fd)
+
+    @staticmethod
+    def _open(path, flags=0):
+        fd = os.open(path, os.O_RDWR | getattr(os, 'O_NOFOLLOW', 0) | flags, 0o600)
+        getuid = getattr(os, 'getuid', None)
+        if getuid is not None and os.fstat(fd).st_uid != getuid():
+            os.close(fd)
+            raise OSError("{0} is owned by another user".format(path))
+        return fd
+
+    @staticmethod
+    def _unlock_and_close(fd):
+        # mmap keeps a duplicate of fd open, so the lock has to be released
+        # explicitly.
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _read_layout(self, fd):
+        """
+        Returns the (slots, record_size) of a file with this class's layout,
+        or None.
+        """
+        header = os.pread(fd, self._header.size, 0)
+        if len(header) != self._header.size:
+            return None
+        magic, layout_version, _, slots, record_size = self._header.unpack(header)
+        if magic != self.magic or layout_version != self.layout_version:
+            return None
+        return slots, record_size
+
+    def _initialize(self, fd, size):
+        os.ftruncate(fd, size)
+        os.pwrite(fd, self._header.pack(self.magic, self.layout_version, 0, self.slots, self.record_size), 0)
+
+    def _create_replacement(self, size):
+        """
+        Writes an empty file alongside self.path and renames it into place,
+        returning a locked file descriptor for it.
+        """
+        fd, path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._initialize(fd, size)
+            os.replace(path, self.path)
+        except BaseException:
+            os.close(fd)
+            os.unlink(path)
+            raise
+        return fd
+
+    def _offsets(self, key):
+        for i in range(self.probes):
+            yield self._header.size + (key + i) % self.slots * self.record_size
+
+    def _read(self, offset):
+        """
+        Returns (version, key, accept, entry) for a record, or None if it's
+        empty or corrupt.
+        """
+        record = self._map[offset:offset + self.record_size]
+        version, key, crc, accept_length, entry_length = self._record.unpack_from(record)
+        if not version:
+            return None
+        payload_length = accept_length + (0 if entry_length == self._no_renderers else entry_length)
+        payload = record[self._record.size:self._record.size + payload_length]
+        if len(payload) != payload_length or crc != zlib.crc32(record[:16] + record[20:24] + payload) & 0xffffffff:
+            return None
+        accept = payload[:accept_length].decode('utf-8', 'surrogatepass')
+        entry = None if entry_length == self._no_renderers else tuple(bytearray(payload[accept_length:]))
+        return version, key, accept, entry
+
+    def load(self, version):
+        entries = {}
+        for slot in range(self.slots):
+            record = self._read(self._header.size + slot * self.record_size)
+            if record and record[0] == version:
+                entries[record[2]] = record[3]
+        return entries
+
+    def get(self, version, accept):
+        key = _digest(accept)
+        for offset in self._offsets(key):
+            if not self._map[offset:offset + 8].strip(b'\0'):
+                break
+            record = self._read(offset)
+            if record and record[:3] == (version, key, accept):
+                return record[3]
+        return MISSING
+
+    def publish(self, version, accept, entry):
+        key = _digest(accept)
+        accept = accept.encode('utf-8', 'surrogatepass')
+        if entry is None:
+            payload, entry_length = accept, self._no_renderers
+        elif max(entry or (0,)) < 256:
+            payload, entry_length = accept + bytes(bytearray(entry)), len(entry)
+        else:
+            return
+        if self._record.size + len(payload) > self.record_size:
+            return
+
+        offsets = list(self._offsets(key))
+        # Use the first empty record, or the one already holding this entry,
+        # and otherwise evict one of the probed records.
+        target = offsets[key % len(offsets)]
+        for offset in offsets:
+            record = self._read(offset)
+            if record is None or record[:2] == (version, key):
+                target = offset
+                break
+
+        fields = struct.pack('<QQ', version, key), struct.pack('<HH', len(accept), entry_length)
+        crc = zlib.crc32(fields[0] + fields[1] + payload) & 0xffffffff
+        record = fields[0] + struct.pack('<I', crc) + fields[1] + payload
+        self._map[target:target + len(record)] = record
+
+class DjangoCacheBackend(object):
+    """
+    Keeps each view class's entries as a single dict in a Django cache.
+
+    Newly resolved entries are batched up, and written (merged with whatever
+    other processes have written in the meantime) once there are flush_every
+    of them or flush_interval seconds have passed. If timeout is given it's
+    passed on to the cache; otherwise the cache's default timeout applies.
+    """
+    def __init__(self, alias='default', key_prefix='conneg-negotiation', timeout=None,
+                 flush_every=16, flush_interval=10, max_entries=1024):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.key_prefix, self.timeout = key_prefix, timeout
+        self.flush_every, self.flush_interval = flush_every, flush_interval
+        self.max_entries = max_entries
+        self._pending, self._flushed = {}, {}
+        self._lock = threading.Lock()
+
+    def _key(self, version):
+        return '{0}:{1:x}'.format(self.key_prefix, version)
+
+    def load(self, version):
+        self._flushed.setdefault(version, time.time())
+        return dict(self.cache.get(self._key(version)) or {})
+
+    def get(self, version, accept):
+        return MISSING
+
+    def publish(self, version, accept, entry):
+        with self._lock:
+            pending = self._pending.setdefault(version, {})
+            pending[accept] = entry
+            if len(pending) < self.flush_every and \
+               time.time() - self._flushed.get(version, 0) < self.flush_interval:
+                return
+            del self._pending[version]
+            self._flushed[version] = time.time()
+        entries = self.load(version)
+        for accept in list(entries)[:max(len(entries) + len(pending) - self.max_entries, 0)]:
+            del entries[accept]
+        entries.update(pending)
+        if self.timeout is None:
+            self.cache.set(self._key(version), entries)
+        else:
+            self.cache.set(self._key(version), entries, self.timeout)
+
+class NegotiationCache(object):
+    """
+    Maps (view class version, Accept header) to a tuple of indexes into the
+    view's renderers, in order of preference, or None if the header had no
+    parseable media types.
+    """
+    # Longer headers are uncommon enough not to be worth caching.
+    max_accept_length = 512
+
+    def __init__(self, backend=None, max_entries=1024):
+        self.backend = backend or LocalBackend()
+        self.max_entries = max_entries
+        self._versions = weakref.WeakKeyDictionary()
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def version(self, cls, renderers):
+        """
+        Returns the version for a class whose (sorted) renderers are given.
+        """
+        version = self._versions.get(cls)
+        if version is None:
+            version = _digest(view_path(cls),
+                              *('{0} {1} {2} {3}'.format(r.__name__, r.format, r.priority,
+                                                         ' '.join(sorted(m.value for m in r.mimetypes)))
+                                for r in renderers))
+            self._versions[cls] = version
+        return version
+
+    def _get_entries(self, version):
+        entries = self._entries.get(version)
+        if entries is None:
+            with self._lock:
+                entries = self._entries.get(version)
+                if entries is None:
+                    try:
+                        entries = self.backend.load(version)
+                    except Exception:
+                        logger.exception("Couldn't load shared negotiation cache entries")
+                        entries = {}
+                    self._entries[version] = entries
+        return entries
+
+    def get(self, version, accept):
+        if len(accept) > self.max_accept_length:
+            return MISSING
+        entries = self._get_entries(version)
+        entry = entries.get(accept, MISSING)
+        if entry is MISSING:
+            entry = self.backend.get(version, accept)
+            if entry is not MISSING:
+                self._add(entries, accept, entry)
+        return entry
+
+    def set(self, version, accept, entry):
+        if len(accept) > self.max_accept_length:
+            return
+        self._add(self._get_entries(version), accept, entry)
+        try:
+            self.backend.publish(version, accept, entry)
+        except Exception:
+            logger.exception("Couldn't publish negotiation cache entry")
+
+    def _add(self, entries, accept, entry):
+        if len(entries) >= self.max_entries:
+            entries.clear()
+        entries[accept] = entry
+
+@settings_singleton('CONNEG_NEGOTIATION_CACHE')
+def get_cache():
+    """
+    Returns the NegotiationCache configured by CONNEG_NEGOTIATION_CACHE.
+    """
+    config = getattr(settings, 'CONNEG_NEGOTIATION_CACHE', None) or {}
+    backend = None
+    if config.get('BACKEND'):
+        try:
+            backend = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+        except Exception:
+            # Negotiation works without a shared cache, so this shouldn't
+            # take requests down.
+            logger.exception("Couldn't create negotiation cache backend; not sharing entries")
+    return NegotiationCache(backend, max_entries=config.get('MAX_ENTRIES', 1024))
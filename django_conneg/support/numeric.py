@@ -0,0 +1,169 @@
+"""
+Bulk simplification of NumPy arrays and pandas objects.
+
+numpy and pandas are both optional; when they can't be imported
+is_numeric() never matches and nothing else here is reached. Conversion
+to Python primitives is done a column or array at a time using
+ndarray.tolist(), rather than by recursing over individual elements.
+"""
+
+from __future__ import unicode_literals
+
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+def is_numeric(value):
+    """
+    Returns True if value is a NumPy or pandas object we know how to simplify.
+    """
+    if numpy is not None and isinstance(value, (numpy.ndarray, numpy.generic)):
+        return True
+    if pandas is not None and isinstance(value, (pandas.DataFrame, pandas.Series, pandas.Index)):
+        return True
+    return False
+
+def _local_epoch_seconds(seconds):
+    """
+    Returns seconds since the epoch for an int64 array of wall-clock times
+    (given as seconds since the epoch as if they were UTC) in local time, as
+    time.mktime() would.
+    """
+    if not time.daylight:
+        return seconds + time.timezone
+    # The offset depends on the date, so fall back to mktime(), but only
+    # once for each distinct time.
+    unique, inverse = numpy.unique(seconds, return_inverse=True)
+    local = numpy.array([time.mktime(time.gmtime(s)[:8] + (-1,)) for s in unique.tolist()], dtype='int64')
+    return local[inverse].reshape(seconds.shape)
+
+def simplify_array(array, simplify=None):
+    """
+    Returns a (possibly nested) list of Python primitives for a NumPy array.
+
+    datetime64 values become integer milliseconds since the epoch, as
+    timedelta64 values become integer milliseconds. datetime64 values are
+    treated as JSONView treats naive datetime objects: they're taken to be
+    in local time, and truncated to whole seconds. Byte strings are decoded
+    as UTF-8, with undecodable bytes replaced by U+FFFD. NaN, infinities and
+    NaT
+    become None. Arrays of arbitrary Python objects are passed to simplify,
+    if given; otherwise NotImplemented is returned, as it is for dtypes that
+    have no JSON equivalent.
+    """
+    kind, missing = array.dtype.kind, None
+    if kind == 'm':
+        missing = numpy.isnat(array)
+        array = array.astype('timedelta64[ms]').astype('int64')
+    elif kind == 'M':
+        missing = numpy.isnat(array)
+        seconds = numpy.where(missing, 0, array.astype('datetime64[s]').astype('int64'))
+        array = _local_epoch_seconds(seconds) * 1000
+    elif kind == 'f':
+        missing = ~numpy.isfinite(array)
+    elif kind == 'S':
+        array = numpy.char.decode(array, 'utf-8', 'replace')
+    elif kind == 'O':
+        return simplify(array.tolist()) if simplify else NotImplemented
+    elif kind not in 'biuU':
+        return NotImplemented
+
+    if missing is not None and missing.any():
+        array = array.astype(object)
+        array[missing] = None
+    return array.tolist()
+
+def simplify_series(series, simplify=None):
+    """
+    Returns a list of Python primitives for a pandas Series or Index.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pandas.DatetimeTZDtype):
+        if isinstance(series, pandas.Index):
+            series = series.tz_convert('UTC').tz_localize(None)
+        else:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+    elif pandas.api.types.is_extension_array_dtype(dtype):
+        # Nullable and categorical columns; pandas.NA isn't something
+        # simplify can deal with, so swap it for None on the way out.
+        return simplify_array(series.to_numpy(dtype=object, na_value=None), simplify)
+    return simplify_array(series.to_numpy(), simplify)
+
+def frame_columns(frame, simplify=None):
+    """
+    Returns a list of column names and a list of simplified columns.
+
+    A named or non-default index is included as the leading column(s).
+    Columns that can't be simplified are dropped.
+    """
+    index = frame.index
+    if any(name is not None for name in index.names) or not (
+            isinstance(index, pandas.RangeIndex) and index.start == 0 and index.step == 1):
+        frame = frame.reset_index()
+    names, columns = [], []
+    for name, series in frame.items():
+        column = simplify_series(series, simplify)
+        if column is NotImplemented:
+            continue
+        names.append('{0}'.format(name))
+        columns.append(column)
+    return names, columns
+
+def simplify_frame(frame, orient='records', simplify=None):
+    """
+    Simplifies a DataFrame, either as a list of row dicts ('records') or as a
+    dict of column lists ('columns').
+    """
+    names, columns = frame_columns(frame, simplify)
+    if orient == 'columns':
+        return dict(zip(names, columns))
+    elif orient == 'records':
+        return [dict(zip(names, row)) for row in zip(*columns)]
+    raise ValueError("Unsupported DataFrame orientation: %r" % orient)
+
+def simplify_numeric(value, simplify=None, orient='records'):
+    """
+    Simplifies any object for which is_numeric() returns True.
+    """
+    if pandas is not None:
+        if isinstance(value, pandas.DataFrame):
+            return simplify_frame(value, orient, simplify)
+        if isinstance(value, (pandas.Series, pandas.Index)):
+            return simplify_series(value, simplify)
+    if isinstance(value, numpy.generic):
+        value = numpy.asarray(value)
+    return simplify_array(value, simplify)
+
+def tabulate(value, simplify=None):
+    """
+    Returns a list of column names and an iterator over rows of primitives.
+
+    This is for renderers of tabular formats (e.g. CSV), and accepts a
+    DataFrame or a two-dimensional NumPy array. Structured arrays use their
+    field names as column names; other arrays have their columns numbered.
+    """
+    if pandas is not None and isinstance(value, pandas.DataFrame):
+        names, columns = frame_columns(value, simplify)
+        return names, zip(*columns)
+    elif isinstance(value, numpy.ndarray) and value.dtype.names:
+        candidates = [(name, value[name]) for name in value.dtype.names]
+    elif isinstance(value, numpy.ndarray) and value.ndim == 2:
+        candidates = [('{0}'.format(i), value[:, i]) for i in range(value.shape[1])]
+    else:
+        raise TypeError("Can't tabulate object of type %r" % type(value))
+
+    names, columns = [], []
+    for name, column in candidates:
+        column = simplify_array(column, simplify)
+        if column is not NotImplemented:
+            names.append(name)
+            columns.append(column)
+    return names, zip(*columns)
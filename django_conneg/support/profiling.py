@@ -0,0 +1,202 @@
+"""
+Opt-in sampling profiler for renderers.
+
+A fraction of renderer calls are run under cProfile (or tracemalloc), and the
+results aggregated per view class and renderer format. It's configured with
+the following settings:
+
+CONNEG_PROFILE_RATE
+    The fraction of renderer calls to profile. Defaults to 0, which disables
+    profiling entirely.
+CONNEG_PROFILE_VIEWS
+    If given, a list of dotted paths of the view classes to profile.
+CONNEG_PROFILE_FORMATS
+    If given, a list of renderer formats to profile.
+CONNEG_PROFILE_MODE
+    'cprofile' (the default) to collect timings, or 'tracemalloc' to collect
+    memory allocations. If it's anything else, or tracemalloc isn't
+    available, an error is logged and nothing is profiled.
+CONNEG_PROFILE_DIR
+    Where to write aggregated stats. Defaults to a 'profiles' directory in a
+    directory in the system temporary directory that's private to the
+    current user. A directory given here is created readable only by the
+    current user.
+CONNEG_PROFILE_MAX_BYTES
+    Once the files in CONNEG_PROFILE_DIR take up more than this (by default
+    50MB), no more are written.
+CONNEG_PROFILE_FLUSH_EVERY
+    The number of samples aggregated in memory for a view and format before
+    being written out. Defaults to 10.
+
+Each process writes to its own files, named <view>.<format>.<pid>.prof for
+cProfile; these can be combined with pstats.Stats(*filenames). Only one call
+is profiled at a time in each process, as cProfile can't profile several
+threads at once; other calls that would have been sampled are skipped.
+Streaming responses are only profiled up to the point the renderer returns.
+"""
+
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import cProfile
+import logging
+import os
+import pstats
+import random
+import threading
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from django.conf import settings
+
+from django_conneg.support import private_directory, settings_singleton, view_path
+
+logger = logging.getLogger(__name__)
+
+class Profiler(object):
+    def __init__(self, rate=0, views=None, formats=None, mode='cprofile', directory=None,
+                 max_bytes=50 * 1024 * 1024, flush_every=10):
+        if mode not in ('cprofile', 'tracemalloc'):
+            raise ValueError("Unknown profiling mode: %r" % mode)
+        if mode == 'tracemalloc' and tracemalloc is None:
+            raise ValueError("tracemalloc isn't available")
+        self.rate, self.mode = rate, mode
+        self.views = frozenset(views) if views else None
+        self.formats = frozenset(formats) if formats else None
+        self.directory = directory
+        self.max_bytes, self.flush_every = max_bytes, flush_every
+
+        self._running = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._samples = defaultdict(int)
+        self._full = False
+
+    def get_directory(self):
+        """
+        Returns the directory to write stats to, creating it if need be, and
+        raising OSError if the default directory isn't private to the current
+        user.
+        """
+        if self.directory is None:
+            return private_directory('profiles')
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        return self.directory
+
+    def should_profile(self, view, renderer):
+        if not self.rate:
+            return False
+        if self.formats is not None and renderer.format not in self.formats:
+            return False
+        if self.views is not None and view_path(view) not in self.views:
+            return False
+        return random.random() < self.rate
+
+    def profile(self, view, renderer, *args, **kwargs):
+        """
+        Calls renderer with the given arguments, profiling it if no other
+        call is already being profiled.
+        """
+        if not self._running.acquire(False):
+            return renderer(*args, **kwargs)
+        try:
+            key = (view_path(view), renderer.format)
+            if self.mode == 'cprofile':
+                profile = cProfile.Profile()
+                result = profile.runcall(renderer, *args, **kwargs)
+                self.add(key, pstats.Stats(profile))
+            else:
+                # Tracing slows everything down, so it's only left running if
+                # something else started it.
+                started = not tracemalloc.is_tracing()
+                if started:
+                    tracemalloc.start()
+                try:
+                    before = tracemalloc.take_snapshot()
+                    result = renderer(*args, **kwargs)
+                    after = tracemalloc.take_snapshot()
+                finally:
+                    if started:
+                        tracemalloc.stop()
+                self.add(key, after.compare_to(before, 'lineno'))
+            return result
+        finally:
+            self._running.release()
+
+    def add(self, key, stats):
+        with self._lock:
+            if self.mode == 'cprofile':
+                if key in self._stats:
+                    self._stats[key].add(stats)
+                else:
+                    self._stats[key] = stats
+            else:
+                aggregated = self._stats.setdefault(key, defaultdict(lambda: [0, 0]))
+                for stat in stats:
+                    totals = aggregated[str(stat.traceback)]
+                    totals[0] += stat.size_diff
+                    totals[1] += stat.count_diff
+            self._samples[key] += 1
+            if self._samples[key] % self.flush_every == 0:
+                self.flush(key)
+
+    def filename(self, key, directory):
+        suffix = 'prof' if self.mode == 'cprofile' else 'tracemalloc.txt'
+        return os.path.join(directory, '{0}.{1}.{2}.{3}'.format(key[0], key[1], os.getpid(), suffix))
+
+    def disk_usage(self, directory):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return 0
+        return sum(os.path.getsize(os.path.join(directory, name)) for name in names)
+
+    def flush(self, key):
+        """
+        Writes out the stats aggregated so far for key. Must be called with
+        self._lock held.
+        """
+        try:
+            directory = self.get_directory()
+        except OSError:
+            logger.exception("Not writing profile for %s.%s", *key)
+            return
+        filename = self.filename(key, directory)
+        if not os.path.exists(filename) and self.disk_usage(directory) > self.max_bytes:
+            if not self._full:
+                logger.warning("Not writing profile to %s; %s is over CONNEG_PROFILE_MAX_BYTES",
+                               filename, directory)
+                self._full = True
+            return
+        if self.mode == 'cprofile':
+            self._stats[key].dump_stats(filename)
+        else:
+            lines = sorted(self._stats[key].items(), key=lambda item: -item[1][0])[:100]
+            with open(filename, 'w') as f:
+                f.write("# {0} samples; size_diff count_diff location\n".format(self._samples[key]))
+                for location, (size, count) in lines:
+                    f.write("{0} {1} {2}\n".format(size, count, location))
+
+@settings_singleton('CONNEG_PROFILE_')
+def get_profiler():
+    """
+    Returns the Profiler configured by settings, or one that profiles
+    nothing if they're invalid.
+    """
+    try:
+        return Profiler(rate=getattr(settings, 'CONNEG_PROFILE_RATE', 0),
+                        views=getattr(settings, 'CONNEG_PROFILE_VIEWS', None),
+                        formats=getattr(settings, 'CONNEG_PROFILE_FORMATS', None),
+                        mode=getattr(settings, 'CONNEG_PROFILE_MODE', 'cprofile'),
+                        directory=getattr(settings, 'CONNEG_PROFILE_DIR', None),
+                        max_bytes=getattr(settings, 'CONNEG_PROFILE_MAX_BYTES', 50 * 1024 * 1024),
+                        flush_every=getattr(settings, 'CONNEG_PROFILE_FLUSH_EVERY', 10))
+    except ValueError:
+        # Logged once, when the settings are read, rather than failing every
+        # render
+        logger.exception("Invalid profiling settings; not profiling")
+        return Profiler()
@@ -0,0 +1,159 @@
+"""
+Serialization of QuerySets and model instances without per-object queries.
+
+Fields are given as paths in the usual Django style (e.g. 'author__name').
+Paths along forward relations are fetched in the main query with
+.values(), which joins in the related tables much as select_related()
+would. Paths that cross a many-valued relation (many-to-many or reverse
+foreign key) are fetched as prefetch_related() would, with one extra
+.values() query per relation for each chunk of objects, and for relations
+beneath those, one more per relation for each level. Related objects are
+listed in primary key order. No model instances are constructed.
+
+There's no default field list: which fields may be exposed is for the caller
+to decide, so as not to leak the likes of password hashes.
+"""
+
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import itertools
+
+from django.db.models.query import QuerySet
+
+def plan_fields(model, fields):
+    """
+    Splits field paths into those that can be fetched with .values() in the
+    main query, and those that traverse a many-valued relation.
+
+    The latter are returned as a dict mapping the path to the many-valued
+    relation onto a list of paths beneath it; an empty path means that the
+    related objects' primary keys were asked for.
+    """
+    values_fields, many_fields = [], {}
+    for field in fields:
+        path, opts = field.split('__'), model._meta
+        for i, name in enumerate(path):
+            f = opts.pk if name == 'pk' else opts.get_field(name)
+            if f.many_to_many or f.one_to_many:
+                many_fields.setdefault('__'.join(path[:i+1]), []).append('__'.join(path[i+1:]))
+                break
+            if f.is_relation and i + 1 < len(path):
+                opts = f.related_model._meta
+        else:
+            values_fields.append(field)
+    return values_fields, many_fields
+
+def _nest(row, fields):
+    """
+    Turns a flat dict keyed by field paths into nested dicts.
+    """
+    result = {}
+    for field in fields:
+        path = field.split('__')
+        target = result
+        for name in path[:-1]:
+            if not isinstance(target.get(name), dict):
+                target[name] = {}
+            target = target[name]
+        if not isinstance(target.get(path[-1]), dict):
+            target[path[-1]] = row[field]
+    return result
+
+def _related_model(model, path):
+    for name in path.split('__'):
+        model = model._meta.get_field(name).related_model
+    return model
+
+def _attach(result, prefix, value):
+    """
+    Puts value into a nested dict at the place named by a field path.
+    """
+    path = prefix.split('__')
+    target = result
+    for name in path[:-1]:
+        target = target.setdefault(name, {})
+    target[path[-1]] = value
+
+def _fetch_many(model, pks, prefix, subfields):
+    """
+    Returns a dict mapping each of pks that has any objects related by
+    prefix (a path ending in a many-valued relation) onto a list of them,
+    as dicts of the fields in subfields, or as primary keys if subfields is
+    [''].
+
+    Many-valued relations beneath prefix are fetched with further queries,
+    rather than in the same join, which would repeat each related object
+    for each of its own related objects.
+    """
+    related_model = _related_model(model, prefix)
+    values_fields, many_fields = plan_fields(related_model, [s or 'pk' for s in subfields])
+    related_pk = prefix + '__pk'
+    lookups = dict((field, related_pk if field == 'pk' else prefix + '__' + field) for field in values_fields)
+    rows = model._default_manager.filter(pk__in=pks) \
+                                 .values('pk', related_pk, *sorted(set(lookups.values()) - {related_pk})) \
+                                 .order_by('pk', related_pk)
+    related, objects = defaultdict(list), defaultdict(list)
+    for row in rows:
+        # Objects without any related objects still come back from the
+        # join, with NULLs for the related columns.
+        if row[related_pk] is None:
+            continue
+        if subfields == ['']:
+            related[row['pk']].append(row[related_pk])
+            continue
+        obj = _nest(dict((field, row[lookup]) for field, lookup in lookups.items()), values_fields)
+        related[row['pk']].append(obj)
+        objects[row[related_pk]].append(obj)
+    for sub_prefix, sub_subfields in many_fields.items():
+        nested = _fetch_many(related_model, list(objects), sub_prefix, sub_subfields)
+        for pk, objs in objects.items():
+            for obj in objs:
+                _attach(obj, sub_prefix, list(nested.get(pk, ())))
+    return related
+
+def iter_queryset(queryset, fields, chunk_size=2000):
+    """
+    Yields a dict of the given fields for each object in queryset.
+
+    The main query is read with .iterator(), so only chunk_size rows are held
+    in memory at once.
+    """
+    model = queryset.model
+    values_fields, many_fields = plan_fields(model, fields)
+
+    lookups = ['pk'] + [field for field in values_fields if field != 'pk']
+    rows = queryset.prefetch_related(None).values(*lookups).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        related = {}
+        if many_fields:
+            pks = [row['pk'] for row in chunk]
+            for prefix, subfields in many_fields.items():
+                related[prefix] = _fetch_many(model, pks, prefix, subfields)
+        for row in chunk:
+            result = _nest(row, values_fields)
+            for prefix in many_fields:
+                _attach(result, prefix, related[prefix].get(row['pk'], []))
+            yield result
+
+def simplify_instance(instance, fields):
+    """
+    Returns a dict of the given fields for a model instance.
+
+    Local fields are read straight off the instance; only if a field path
+    follows a relation is the database queried, and then just once.
+    """
+    model = type(instance)
+    local = {'pk': model._meta.pk.attname}
+    for f in model._meta.concrete_fields:
+        local[f.name] = local[f.attname] = f.attname
+    if all(field in local for field in fields):
+        return dict((field, getattr(instance, local[field])) for field in fields)
+    queryset = model._default_manager.filter(pk=instance.pk)
+    return next(iter_queryset(queryset, fields), None)
+
+def is_queryset(value):
+    return isinstance(value, QuerySet)
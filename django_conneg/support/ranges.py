@@ -0,0 +1,269 @@
+"""
+Byte-range (Range and If-Range) support for rendered representations.
+
+Representations can be spooled to files, keyed on the view, the request path,
+the renderer's format and an ETag, so that resumed and parallel-chunk
+downloads of large exports are served from the spool rather than rendered
+afresh. The spool is configured with these settings:
+
+CONNEG_RANGE_SPOOL_DIR
+    Where to keep spooled representations. Defaults to a 'spool' directory
+    in a directory in the system temporary directory that's private to the
+    current user. Anyone who can write to it can have their files served as
+    representations, so a directory given here is created readable only by
+    the current user.
+CONNEG_RANGE_SPOOL_MAX_BYTES
+    Once the spool takes up more than this (by default 1GB), the least
+    recently used representations are removed.
+
+Only single byte ranges are supported. Requests for several ranges, or for
+ranges that can't be satisfied, get the whole representation with a 200.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from django import http
+from django.conf import settings
+
+from django_conneg.support import private_directory, settings_singleton
+
+logger = logging.getLogger(__name__)
+
+def _iter_file(f, start=0, length=None, chunk_size=64 * 1024):
+    try:
+        f.seek(start)
+        while length is None or length > 0:
+            chunk = f.read(chunk_size if length is None else min(chunk_size, length))
+            if not chunk:
+                break
+            if length is not None:
+                length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+class SpooledResponse(http.StreamingHttpResponse):
+    """
+    A response whose body is read from a spooled file.
+    """
+    def __init__(self, path, length, **kwargs):
+        self.path, self.length = path, length
+        self.file = open(path, 'rb')
+        super(SpooledResponse, self).__init__(_iter_file(self.file), **kwargs)
+        self['Content-Length'] = str(length)
+
+    def close(self):
+        # The body's generator doesn't close the file if it's never started
+        # (e.g. for HEAD requests, or if the body is replaced)
+        self.file.close()
+        super(SpooledResponse, self).close()
+
+    def read_range(self, start, end):
+        """
+        Returns an iterator over bytes start to end (inclusive) of the body.
+        """
+        return _iter_file(open(self.path, 'rb'), start, end - start + 1)
+
+class Spool(object):
+    def __init__(self, directory=None, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_directory(self):
+        """
+        Returns the spool directory, creating it if need be, and raising
+        OSError if the default directory isn't private to the current user.
+        """
+        if self.directory is None:
+            return private_directory('spool')
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        return self.directory
+
+    def path(self, key):
+        return os.path.join(self.get_directory(), hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest())
+
+    def get(self, key, token=None):
+        """
+        Returns a SpooledResponse for key, or None if it isn't spooled (or,
+        if token is given, if it wasn't spooled with that token).
+        """
+        try:
+            path = self.path(key)
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            if token is not None and meta.get('token') != token:
+                return None
+            response = self._response(path, meta)
+        except (IOError, OSError, ValueError):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            response.file.close()
+            return None
+        return response
+
+    def _response(self, path, meta):
+        response = SpooledResponse(path, os.path.getsize(path))
+        for header, value in meta['headers']:
+            response[header] = value
+        return response
+
+    def put(self, key, response, token=None):
+        """
+        Writes response's body to the spool, returning a SpooledResponse to
+        use in its place. A token, if given, has to be passed to get() to
+        fetch it again.
+        """
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        temp_paths = []
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            temp_paths.append(temp_path)
+            with os.fdopen(fd, 'wb') as f:
+                if response.streaming:
+                    for chunk in response.streaming_content:
+                        f.write(chunk)
+                else:
+                    f.write(response.content)
+            meta = {'headers': [(header, value) for header, value in response.items()
+                                if header.lower() != 'content-length']}
+            if token is not None:
+                meta['token'] = token
+            fd, meta_temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            temp_paths.append(meta_temp_path)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(meta, f)
+            os.replace(temp_path, path)
+            os.replace(meta_temp_path, path + '.json')
+        except Exception:
+            for name in temp_paths:
+                if os.path.exists(name):
+                    os.unlink(name)
+            raise
+        finally:
+            response.close()
+        self.evict(directory, keep=os.path.basename(path))
+        return self._response(path, meta)
+
+    def evict(self, directory, keep=None):
+        """
+        Removes the least recently used representations (other than the one
+        named keep) until the spool is within max_bytes.
+        """
+        files = []
+        for name in os.listdir(directory):
+            if name == keep or name.endswith(('.json', '.tmp')):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            for filename in (name, name + '.json'):
+                try:
+                    os.unlink(os.path.join(directory, filename))
+                except OSError:
+                    pass
+            total -= size
+
+def parse_range(header, length):
+    """
+    Returns (start, end), inclusive, for a Range header asking for a single
+    satisfiable byte range of a body of the given length, or None.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    start, sep, end = header[6:].strip().partition('-')
+    start, end = start.strip(), end.strip()
+    if not sep or ',' in end or not (start or end):
+        return None
+    if (start and not start.isdigit()) or (end and not end.isdigit()):
+        return None
+    try:
+        if not start:
+            start, end = max(length - int(end), 0), length - 1
+            if start > end:
+                return None
+        else:
+            start, end = int(start), min(int(end), length - 1) if end else length - 1
+    except ValueError:
+        return None
+    if start > end or start >= length:
+        return None
+    return start, end
+
+def if_range_matches(if_range, response):
+    """
+    Returns whether a (possibly absent) If-Range header matches response's
+    strong ETag or Last-Modified date.
+    """
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        etag = response.get('ETag')
+        return bool(etag) and not etag.startswith('W/') and etag == if_range
+    return response.get('Last-Modified') == if_range
+
+def has_validator(response):
+    etag = response.get('ETag')
+    return bool(etag and not etag.startswith('W/')) or 'Last-Modified' in response
+
+def range_response(request, response):
+    """
+    Returns a 206 Partial Content response for the request's Range header if
+    it can be satisfied from response, and otherwise response itself.
+
+    The response needs a 200 status code, a strong ETag or Last-Modified
+    date, and a body that isn't streamed (unless it's a SpooledResponse).
+    """
+    if response.status_code != 200 or not has_validator(response):
+        return response
+    if isinstance(response, SpooledResponse):
+        length = response.length
+    elif not response.streaming:
+        length = len(response.content)
+    else:
+        return response
+    response['Accept-Ranges'] = 'bytes'
+
+    if request.method != 'GET' or not if_range_matches(request.META.get('HTTP_IF_RANGE'), response):
+        return response
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), length)
+    if byte_range is None:
+        return response
+
+    start, end = byte_range
+    if isinstance(response, SpooledResponse):
+        partial = http.StreamingHttpResponse(response.read_range(start, end))
+        response.file.close()
+    else:
+        partial = http.HttpResponse(response.content[start:end + 1])
+    for header, value in response.items():
+        if header.lower() != 'content-length':
+            partial[header] = value
+    partial.status_code = 206
+    partial['Content-Range'] = 'bytes {0}-{1}/{2}'.format(start, end, length)
+    partial['Content-Length'] = str(end - start + 1)
+    partial.renderer = getattr(response, 'renderer', None)
+    return partial
+
+@settings_singleton('CONNEG_RANGE_SPOOL_')
+def get_spool():
+    """
+    Returns the Spool configured by settings.
+    """
+    return Spool(directory=getattr(settings, 'CONNEG_RANGE_SPOOL_DIR', None),
+                 max_bytes=getattr(settings, 'CONNEG_RANGE_SPOOL_MAX_BYTES', 1024 * 1024 * 1024))
@@ -0,0 +1,76 @@
+"""
+A cross-request cache of objects' simplified forms.
+
+Objects with a simplify_for_json method can opt in by also defining a
+json_cache_key method, returning a hashable key that changes whenever their
+simplified form would (for a model instance, say, its pk and an updated_at
+timestamp), or None to not be cached this time. Entries are kept per view
+class and per process, and the least recently used are evicted once there
+are more than CONNEG_SIMPLIFIED_CACHE_MAX_ENTRIES (by default 1024; 0
+disables the cache).
+
+Simplified forms are shared between responses, so they mustn't be modified,
+and mustn't depend on the request.
+"""
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import threading
+
+from django.conf import settings
+
+from django_conneg.support import settings_singleton, view_path
+
+# Returned by SimplifiedCache.get() when it doesn't have an entry.
+MISSING = object()
+
+class SimplifiedCache(object):
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(view, value):
+        """
+        Returns the cache key for value as simplified by view, or None if it
+        shouldn't be cached.
+        """
+        if not callable(getattr(value, 'json_cache_key', None)):
+            return None
+        version = value.json_cache_key()
+        if version is None:
+            return None
+        return view_path(view), view_path(value), version
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return MISSING
+            return self._entries[key]
+
+    def set(self, key, simplified):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = simplified
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+@settings_singleton('CONNEG_SIMPLIFIED_CACHE_MAX_ENTRIES')
+def get_cache():
+    """
+    Returns the SimplifiedCache configured by settings.
+    """
+    return SimplifiedCache(getattr(settings, 'CONNEG_SIMPLIFIED_CACHE_MAX_ENTRIES', 1024))
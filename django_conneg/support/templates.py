@@ -0,0 +1,189 @@
+"""
+Template lookup and rendering for HTMLView and TextView.
+
+Looked-up templates (and failed lookups) are kept per process, keyed on the
+template names and the engine, so that renderers don't go through every
+engine's loaders on each call. This is on unless settings.DEBUG is set, so
+that edited templates are picked up in development; set
+CONNEG_TEMPLATE_CACHE to True or False to override that.
+
+With Django templates, context processors are run lazily: a processor is
+only called once the template looks up a variable that isn't in the view's
+context, and processors are called in turn until one provides it. Templates
+that only use their view's context don't run any. Other engines (such as
+Jinja2) run them up front, as usual.
+
+Template output can also be streamed. Jinja2 templates are rendered
+incrementally through Template.generate(); Django templates are streamed a
+top-level node at a time, which only helps templates that don't extend
+another.
+"""
+
+from __future__ import unicode_literals
+
+import threading
+
+from django import http
+from django.conf import settings
+from django.template import Context, TemplateDoesNotExist, loader
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+
+from django_conneg.support import settings_singleton
+from django_conneg.utils import content_type_arg
+
+try:
+    from django.template.backends.jinja2 import Template as Jinja2Template
+except ImportError: # Jinja2 isn't installed
+    Jinja2Template = None
+
+# Cached for failed lookups.
+_NOT_FOUND = object()
+
+class TemplateCache(object):
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, template_name, using=None):
+        """
+        Returns the template for template_name (a name or sequence of names
+        to try), or None if there isn't one.
+        """
+        key = (template_name, using)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._load(template_name, using)
+            with self._lock:
+                if len(self._templates) >= self.max_entries:
+                    self._templates.clear()
+                self._templates[key] = template
+        return None if template is _NOT_FOUND else template
+
+    @staticmethod
+    def _load(template_name, using=None):
+        try:
+            if isinstance(template_name, (list, tuple)):
+                return loader.select_template(template_name, using=using)
+            return loader.get_template(template_name, using=using)
+        except TemplateDoesNotExist:
+            return _NOT_FOUND
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+class LazyProcessors(dict):
+    """
+    The output of a request's context processors, running them only as
+    variables are looked up.
+
+    As with RequestContext, later processors override earlier ones, so the
+    processors are run from last to first, and only fill in keys that
+    haven't been set yet.
+    """
+    # Looked up by template tags for their own purposes ({% for %} checks
+    # for an enclosing loop), rather than on behalf of templates
+    internal_names = frozenset(['forloop'])
+
+    def __init__(self, request, processors):
+        super(LazyProcessors, self).__init__()
+        self.request = request
+        self._pending = list(processors)
+
+    def _run_until(self, key=None):
+        if key in self.internal_names:
+            return
+        while self._pending and (key is None or not dict.__contains__(self, key)):
+            processor = self._pending.pop()
+            for name, value in (processor(self.request) or {}).items():
+                self.setdefault(name, value)
+
+    def __contains__(self, key):
+        self._run_until(key)
+        return dict.__contains__(self, key)
+
+    def __getitem__(self, key):
+        self._run_until(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        self._run_until(key)
+        return dict.get(self, key, default)
+
+    def __iter__(self):
+        self._run_until()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self._run_until()
+        return dict.keys(self)
+
+    def items(self):
+        self._run_until()
+        return dict.items(self)
+
+def make_context(template, context, request):
+    """
+    Returns a django.template.Context for a Django template, like the one
+    RequestContext would make, but with lazily run context processors.
+    """
+    engine = template.template.engine
+    result = Context(autoescape=engine.autoescape)
+    if request is not None:
+        result.request = request
+        # Below the view's context, as with RequestContext
+        result.dicts.append(LazyProcessors(request, engine.template_context_processors))
+    # A copy, so that templates assigning variables don't change the view's
+    # context
+    result.update(context or {})
+    return result
+
+def _iter_django_template(template, context):
+    template = template.template
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            for node in template.nodelist:
+                yield node.render_annotated(context)
+
+def _jinja2_context(template, context, request):
+    context = dict(context or {})
+    if request is not None:
+        context['request'] = request
+        context['csrf_input'] = csrf_input_lazy(request)
+        context['csrf_token'] = csrf_token_lazy(request)
+        for processor in template.backend.template_context_processors:
+            context.update(processor(request))
+    return context
+
+def render(template, context, request, content_type, stream=False):
+    """
+    Returns a response with the rendered template, streamed if stream is
+    true.
+    """
+    kwargs = {content_type_arg: content_type}
+    if isinstance(template, DjangoTemplate):
+        context = make_context(template, context, request)
+        if stream:
+            return http.StreamingHttpResponse(_iter_django_template(template, context), **kwargs)
+        return http.HttpResponse(template.template.render(context), **kwargs)
+    if stream and Jinja2Template is not None and isinstance(template, Jinja2Template):
+        context = _jinja2_context(template, context, request)
+        return http.StreamingHttpResponse(template.template.generate(context), **kwargs)
+    return http.HttpResponse(template.render(context, request), **kwargs)
+
+@settings_singleton('TEMPLATES', 'DEBUG', 'CONNEG_TEMPLATE_CACHE')
+def _get_cache():
+    return TemplateCache()
+
+def get_template(template_name, using=None):
+    """
+    Returns the template for template_name (a name or sequence of names to
+    try), or None, using the cache if it's enabled.
+    """
+    if not getattr(settings, 'CONNEG_TEMPLATE_CACHE', not settings.DEBUG):
+        template = TemplateCache._load(template_name, using)
+        return None if template is _NOT_FOUND else template
+    return _get_cache().get(template_name, using)
@@ -1,21 +1,29 @@
-import imp
+import importlib.util
 
 INSTALLED_APPS = (
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
     'django_conneg',
     'django_conneg.tests',
 )
 
 SECRET_KEY = 'test secret key'
 
+# For conneg_replay's local server
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost', 'testserver']
+
 # Use django_jenkins if it's installed.
-try:
-    imp.find_module('django_jenkins')
-except ImportError:
-    pass
-else:
+if importlib.util.find_spec('django_jenkins'):
     INSTALLED_APPS += ('django_jenkins',)
 
-DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3'}}
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+
+TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'APP_DIRS': True,
+    'OPTIONS': {'context_processors': ['django.contrib.auth.context_processors.auth']},
+}]
 
 LOGIN_URL = '/login/'
 
@@ -23,7 +31,7 @@ ROOT_URLCONF = 'django_conneg.tests.urls'
 
 BASIC_AUTH_ALLOW_HTTP = True
 
-MIDDLEWARE_CLASSES = (
+MIDDLEWARE = (
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django_conneg.support.middleware.BasicAuthMiddleware',
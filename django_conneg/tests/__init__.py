@@ -1,2 +1,23 @@
 from .basic_auth_middleware import *
-from .priorities import *
\ No newline at end of file
+from .priorities import *
+from .renderers import *
+from .numeric_simplification import *
+from .json_streaming import *
+from .canonical_accept import *
+from .renderer_profiling import *
+from .format_override import *
+from .request_parsing import *
+from .accept_parsing import *
+from .negotiation_cache import *
+from .event_stream import *
+from .range_requests import *
+from .batch_requests import *
+from .sparse_fields import *
+from .renderer_budgets import *
+from .deferred_rendering import *
+from .simplify_memo import *
+from .template_rendering import *
+from .suffix_routing import *
+from .queryset_simplification import *
+from .batch_export import *
+from .settings_singletons import *
\ No newline at end of file
@@ -0,0 +1,107 @@
+import random
+import time
+import unittest
+from unittest import mock
+
+from django.test.client import RequestFactory
+
+from django_conneg.conneg import Conneg
+from django_conneg.http import HttpNotAcceptable, MediaType
+from django_conneg.views import HTMLView, JSONView
+
+class AcceptView(HTMLView, JSONView):
+    pass
+
+class AcceptParsingTestCase(unittest.TestCase):
+    conneg = Conneg(obj=AcceptView)
+
+    pathological = [
+        'text/html,' * 100000,
+        'a' * 1024 * 1024,
+        ', '.join('application/x-%d' % i for i in range(10000)),
+        'text/html' + ';a=b' * 10000,
+        ',' * 4000,
+        ';;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;',
+        '/' * 4000,
+        '+' * 4000,
+        'text/html;q=nan',
+        'text/html;q=1e309',
+        'text/html;q=-1',
+        'text/html;q=',
+        'text/☃, é/é+é;q=0.5',
+        '*/*;q=0.1, */*;q=0.2',
+        '*',
+        '/',
+        'text/',
+        '/html',
+        '',
+    ]
+
+    def testTypes(self):
+        self.assertEqual(MediaType('*/*').type, (None, None, None))
+        self.assertEqual(MediaType('text/*').type, ('text', None, None))
+        self.assertEqual(MediaType('text/html').type, ('text', 'html', None))
+        self.assertEqual(MediaType('application/xhtml+xml').type, ('application', 'xml', 'xhtml'))
+        self.assertEqual(MediaType('application/xhtml+').type, ('application', 'xhtml+', None))
+        media_type = MediaType(' text/html; charset=utf-8 ;q=0.5;level')
+        self.assertEqual((media_type.quality, media_type.params), (0.5, {'charset': 'utf-8'}))
+        for value in ('text', 'text/', '/html', ''):
+            self.assertRaises(ValueError, MediaType, value)
+
+    def testQuality(self):
+        for value in ('nan', '1e309', '-1', '2', '', 'high'):
+            self.assertEqual(MediaType('text/html;q=%s' % value).quality, 1)
+
+    def testLimits(self):
+        self.assertEqual(MediaType.parse_accept_header('text/html' + ' ' * MediaType.max_accept_header_length), [])
+        self.assertEqual(MediaType.parse_accept_header(', '.join(['text/html'] * (MediaType.max_accept_entries + 1))), [])
+        self.assertEqual(MediaType.parse_accept_header('text/html' + ';a=b' * (MediaType.max_params + 1)), [])
+        self.assertEqual(len(MediaType.parse_accept_header(', '.join(['text/html'] * MediaType.max_accept_entries))),
+                         MediaType.max_accept_entries)
+
+    def testPathological(self):
+        for accept in self.pathological:
+            start = time.time()
+            media_types = MediaType.parse_accept_header(accept)
+            self.assertTrue(time.time() - start < 0.1, accept[:40])
+            self.assertTrue(len(media_types) <= MediaType.max_accept_entries)
+            self.conneg.get_renderers(None, accept_header=accept)
+
+    def testFuzz(self):
+        rng = random.Random(0)
+        alphabet = 'abtx*/+;=,q. 0123456789é\t'
+        for i in range(2000):
+            accept = ''.join(rng.choice(alphabet) for j in range(rng.randint(0, 200)))
+            media_types = MediaType.parse_accept_header(accept)
+            self.assertTrue(len(media_types) <= MediaType.max_accept_entries)
+            for media_type in media_types:
+                self.assertTrue(0 <= media_type.quality <= 1)
+            self.conneg.get_renderers(None, accept_header=accept)
+
+    def testNotAcceptableOrdering(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT='text/plain;level=1;q=0.5, image/*, text/csv;q=0.5, image/png')
+        view = AcceptView()
+        view.conneg, view.format_override = Conneg(obj=view), None
+        with mock.patch.object(AcceptView, 'error_view') as error_view:
+            view.error_406(request, HttpNotAcceptable(()))
+        self.assertEqual(error_view.call_args[0][1]['error']['accept_header_parsed'],
+                         ['image/png', 'image/*', 'text/plain;level=1;q=0.5', 'text/csv;q=0.5'])
+
+    def testResolveOrdering(self):
+        # jQuery's default for dataType: 'json'
+        renderers = self.conneg.get_renderers(None, accept_header='application/json, text/javascript, */*; q=0.01')
+        self.assertEqual(renderers[0].format, 'json')
+        renderers = self.conneg.get_renderers(None, accept_header='text/html;q=0.1, application/json;q=0.2, */*;q=0.05')
+        self.assertEqual([renderer.format for renderer in renderers][:2], ['json', 'html'])
+        self.assertEqual(len(renderers), len(set(renderers)))
+
+def benchmark(iterations=10000):
+    accept = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+    for header in [accept] + AcceptParsingTestCase.pathological[:4]:
+        start = time.time()
+        for i in range(iterations):
+            MediaType.parse_accept_header(header)
+        print("{0:>10} chars: {1:.2f}us per parse".format(len(header), (time.time() - start) / iterations * 1e6))
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,23 +1,24 @@
 import base64
-try:
-    from http.client import OK, FORBIDDEN, FOUND, UNAUTHORIZED
-except ImportError:
-    from httplib import OK, FORBIDDEN, FOUND, UNAUTHORIZED
+from http.client import OK, FORBIDDEN, FOUND, UNAUTHORIZED
 
-from django.contrib.auth.models import User
 from django.test import TestCase
 from django.test.utils import override_settings
 
-import mock
+from unittest import mock
 
 test_username = 'username'
 test_password = 'password'
 
+# User is imported within these, as this module is imported while
+# django_conneg.tests is being loaded as an app, before models are ready.
+
 def mocked_authenticate(username, password):
+    from django.contrib.auth.models import User
     if username == test_username and password == test_password:
         return User(username='active')
 
 def mocked_authenticate_inactive(username, password):
+    from django.contrib.auth.models import User
     if username == test_username and password == test_password:
         return User(username='inactive', is_active=False)
 
@@ -25,13 +26,12 @@ def basic_auth(username, password):
     return {'HTTP_AUTHORIZATION': 'Basic ' + base64.b64encode(':'.join([username, password]).encode('utf-8')).decode('utf-8')}
 
 @override_settings(LOGIN_URL='/login/',
-                   MIDDLEWARE_CLASSES=('django.contrib.sessions.middleware.SessionMiddleware',
-                                       'django.contrib.auth.middleware.AuthenticationMiddleware',
-                                       'django_conneg.support.middleware.BasicAuthMiddleware'),
+                   ROOT_URLCONF='django_conneg.tests.urls',
+                   MIDDLEWARE=('django.contrib.sessions.middleware.SessionMiddleware',
+                               'django.contrib.auth.middleware.AuthenticationMiddleware',
+                               'django_conneg.support.middleware.BasicAuthMiddleware'),
                    BASIC_AUTH_ALLOW_HTTP = True)
 class BasicAuthTestCase(TestCase):
-    urls = 'django_conneg.tests.urls'
-
     def testOptionalWithout(self):
         response = self.client.get('/optional-auth/')
         self.assertEqual(response.status_code, OK)
@@ -55,7 +55,7 @@ class BasicAuthTestCase(TestCase):
         response = self.client.get('/login-required/', HTTP_ACCEPT='text/html')
         self.assertEqual(response.status_code, FOUND)
         self.assertEqual(response['Location'],
-                         'http://testserver/login/?next=/login-required/')
+                         '/login/?next=/login-required/')
 
     def testRequiredWithoutJSON(self):
         response = self.client.get('/login-required/', HTTP_ACCEPT='application/json')
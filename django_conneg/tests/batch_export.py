@@ -0,0 +1,115 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_conneg.decorators import renderer
+from django_conneg.export import RenderStats, file_writer, render_batch
+from django_conneg.http import HttpGone
+from django_conneg.views import JSONView
+
+class ExportView(JSONView):
+    _json_indent = None
+
+    @renderer(format='txt', mimetypes=('text/plain',), name='Text')
+    def render_txt(self, request, context, template_name):
+        if context.get('missing'):
+            raise HttpGone
+        if context.get('broken'):
+            raise ValueError("Broken")
+        return self.render_json(request, context, template_name)
+
+class BatchExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def render(self, jobs, **kwargs):
+        results = []
+        callback = lambda *args: results.append(args)
+        stats = render_batch(ExportView, jobs, callback, **kwargs)
+        return stats, sorted(results, key=lambda result: (str(result[0]), result[1]))
+
+    def testRenderBatch(self):
+        jobs = [({'n': i}, None, ['json', 'txt'], 'job%d' % i) for i in range(5)]
+        stats, results = self.render(jobs, workers=2, max_pending=1)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0], ('job0', 'json', 200, 'application/json', b'{"n": 0}'))
+        self.assertEqual(results[1][1:3], ('txt', 200))
+        self.assertEqual([(row['format'], row['renders'], row['errors']) for row in stats.summary()],
+                         [('json', 5, 0), ('txt', 5, 0)])
+
+    def testFailures(self):
+        jobs = [({'broken': True}, None, ['json', 'txt']),
+                ({'missing': True}, None, ['txt']),
+                ({}, None, ['txt', 'nonexistent'])]
+        with self.assertLogs('django_conneg.export', 'ERROR'):
+            stats, results = self.render(jobs, workers=2)
+        self.assertEqual([result[:3] for result in results],
+                         [(0, 'json', 200), (0, 'txt', 500), (1, 'txt', 410),
+                          (2, 'nonexistent', 406), (2, 'txt', 200)])
+        self.assertEqual([failure[:2] for failure in stats.failures], [(0, 'txt')])
+        self.assertIn('ValueError: Broken', stats.failures[0][2])
+        self.assertEqual(dict(stats.errors), {'txt': 2, 'nonexistent': 1})
+
+    def testConnectionsClosedPerThread(self):
+        jobs = [({'n': i}, None, ['json']) for i in range(20)]
+        with mock.patch('django_conneg.export.connections') as connections:
+            self.render(jobs, workers=3)
+        self.assertEqual(connections.close_all.call_count, 3)
+
+    def testRenderStats(self):
+        stats = RenderStats()
+        stats.add('json', 200, 10, 0.5)
+        stats.add('json', 500, 0, 0.25, 'a', 'Traceback')
+        stats.finished = stats.started + 2
+        self.assertEqual(stats.summary(), [{'format': 'json', 'renders': 2, 'errors': 1, 'bytes': 10,
+                                            'render_time': 0.75, 'renders_per_second': 1.0,
+                                            'bytes_per_second': 5.0}])
+        self.assertEqual(stats.failures, [('a', 'json', 'Traceback')])
+
+    def testFileWriter(self):
+        write = file_writer(self.directory)
+        write('item', 'json', 200, 'application/json', b'{}')
+        write('other', 'json', 404, None, b'')
+        self.assertEqual(os.listdir(self.directory), ['item.json'])
+        for name in ('../item', 'a/b', '..', '', 'a\0b'):
+            self.assertRaises(ValueError, write, name, 'json', 200, 'application/json', b'{}')
+        self.assertEqual(os.listdir(self.directory), ['item.json'])
+
+    def testCommand(self):
+        jobs_filename = os.path.join(self.directory, 'jobs.jsonl')
+        output_dir = os.path.join(self.directory, 'out')
+        os.mkdir(output_dir)
+        with open(jobs_filename, 'w') as f:
+            f.write(json.dumps({'context': {'n': 1}, 'formats': ['json', 'txt'], 'name': 'one'}) + '\n\n')
+            f.write(json.dumps({'context': {'n': 2}, 'formats': ['json']}) + '\n')
+        stdout = io.StringIO()
+        call_command('conneg_export', 'django_conneg.tests.batch_export.ExportView', jobs_filename,
+                     output_dir=output_dir, workers=2, stdout=stdout)
+        self.assertEqual(sorted(os.listdir(output_dir)), ['2.json', 'one.json', 'one.txt'])
+        with open(os.path.join(output_dir, 'one.json'), 'rb') as f:
+            self.assertEqual(f.read(), b'{"n": 1}')
+        self.assertIn('Finished in', stdout.getvalue())
+
+    def testCommandRejectsPaths(self):
+        jobs_filename = os.path.join(self.directory, 'jobs.jsonl')
+        with open(jobs_filename, 'w') as f:
+            f.write(json.dumps({'formats': ['json'], 'name': '../escaped'}) + '\n')
+        output_dir = os.path.join(self.directory, 'out')
+        os.mkdir(output_dir)
+        with self.assertRaises(CommandError):
+            call_command('conneg_export', 'django_conneg.tests.batch_export.ExportView', jobs_filename,
+                         output_dir=output_dir, workers=1, stdout=io.StringIO())
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'escaped.json')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import threading
+import unittest
+
+from django.urls import re_path as url
+from django.http import Http404
+from django.test.client import RequestFactory
+
+from django_conneg.batch import BatchView
+from django_conneg.http import HttpConflict
+from django_conneg.parsers import JSONParser
+from django_conneg.views import HTMLView, JSONView
+
+class ItemView(JSONView):
+    threads = set()
+
+    def get(self, request, pk):
+        type(self).threads.add(threading.current_thread().name)
+        if pk == '0':
+            raise Http404
+        return self.render(request, {'pk': int(pk), 'q': request.GET.get('q')}, None)
+
+class CreateView(JSONParser, JSONView):
+    def post(self, request):
+        data = self.parse()
+        if data.get('conflict'):
+            raise HttpConflict(message="Already exists")
+        self.context.update(created=data, user=getattr(request.user, 'username', None))
+        return self.render()
+
+class PageView(HTMLView):
+    def get(self, request):
+        return self.render()
+
+class ConcurrentBatchView(BatchView):
+    _batch_workers = 4
+
+urlpatterns = [
+    url(r'^items/(?P<pk>\d+)/$', ItemView.as_view()),
+    url(r'^items/$', CreateView.as_view()),
+    url(r'^page/$', PageView.as_view()),
+    url(r'^plain/$', lambda request: None),
+    url(r'^batch/$', BatchView.as_view()),
+]
+
+class User(object):
+    username = 'alice'
+
+class BatchTestCase(unittest.TestCase):
+    def batch(self, sub_requests, view=BatchView):
+        request = RequestFactory().post('/batch/', json.dumps(sub_requests),
+                                        content_type='application/json', HTTP_ACCEPT='application/json')
+        request.urlconf = __name__
+        request.user = User()
+        response = view.as_view()(request)
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    def testBatch(self):
+        status_code, content = self.batch([{'path': '/items/1/?q=x', 'id': 'a'},
+                                           {'path': '/items/0/'},
+                                           {'path': '/missing/'},
+                                           {'path': '/items/', 'method': 'post', 'body': {'name': 'b'}},
+                                           {'path': '/items/', 'method': 'POST', 'body': {'conflict': True}},
+                                           {'path': '/plain/'},
+                                           {'path': '/batch/'}])
+        self.assertEqual(status_code, 200)
+        responses = content['responses']
+        self.assertEqual([r['status'] for r in responses], [200, 404, 404, 200, 409, 400, 400])
+        self.assertEqual(responses[0]['id'], 'a')
+        self.assertEqual(responses[0]['content_type'], 'application/json')
+        self.assertEqual(responses[0]['body']['pk'], 1)
+        self.assertEqual(responses[0]['body']['q'], 'x')
+        self.assertEqual(responses[3]['body']['created'], {'name': 'b'})
+        self.assertEqual(responses[3]['body']['user'], 'alice')
+
+    def testBatchFormat(self):
+        status_code, content = self.batch([{'path': '/page/'}])
+        self.assertEqual(content['responses'][0]['status'], 406)
+
+    def testConcurrent(self):
+        ItemView.threads = set()
+        status_code, content = self.batch([{'path': '/items/%d/' % i} for i in range(1, 9)],
+                                          ConcurrentBatchView)
+        self.assertEqual([r['body']['pk'] for r in content['responses']], list(range(1, 9)))
+        self.assertNotIn(threading.current_thread().name, ItemView.threads)
+
+    def testInvalid(self):
+        for sub_requests in ({'requests': 'x'}, [{'path': 'relative'}], [{'path': '/', 'method': 'TRACE'}],
+                             [{'path': '/items/1/'}] * (BatchView._batch_max_requests + 1)):
+            self.assertEqual(self.batch(sub_requests)[0], 400)
+
+if __name__ == '__main__':
+    unittest.main()
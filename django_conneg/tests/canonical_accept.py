@@ -0,0 +1,77 @@
+import unittest
+
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.support import middleware as conneg_middleware
+from django_conneg.support.middleware import accept_table, canonical_format, CanonicalAcceptMiddleware
+from django_conneg.views import HTMLView, JSONView
+
+class CanonicalView(HTMLView, JSONView):
+    pass
+
+class CanonicalAcceptTestCase(unittest.TestCase):
+    def testCanonicalFormat(self):
+        view = CanonicalView.as_view()
+        self.assertEqual(canonical_format(view, 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'), 'html')
+        self.assertEqual(canonical_format(view, 'application/json, text/html;q=0.5'), 'json')
+        self.assertEqual(canonical_format(view, 'application/json, text/javascript, */*; q=0.01'), 'json')
+        self.assertEqual(canonical_format(view, 'image/png'), None)
+
+    def testDefaultFormat(self):
+        for accept_header in (None, '', 'not a media type'):
+            self.assertEqual(canonical_format(CanonicalView, accept_header), 'html')
+
+    def testNonNegotiatedView(self):
+        self.assertEqual(canonical_format(lambda request: None, 'text/html'), None)
+
+    def testAcceptTable(self):
+        self.assertEqual(accept_table(CanonicalView, ['application/json', 'text/html']),
+                         [('application/json', 'json'), ('text/html', 'html')])
+
+    @override_settings(CONNEG_REWRITE_ACCEPT=True)
+    def testMiddleware(self):
+        middleware = CanonicalAcceptMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/', HTTP_ACCEPT='application/json;q=0.9, text/plain;q=0.1')
+        middleware.process_view(request, CanonicalView.as_view(), (), {})
+        self.assertEqual(request.META['HTTP_ACCEPT'], 'application/json')
+        response = middleware.process_response(request, HttpResponse())
+        self.assertEqual(response['X-Conneg-Format'], 'json')
+
+    @override_settings(CONNEG_FORMAT_HEADER='X-Format')
+    def testMiddlewareDefaults(self):
+        middleware = CanonicalAcceptMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/', HTTP_ACCEPT='application/json;q=0.9, text/plain;q=0.1')
+        middleware.process_view(request, CanonicalView.as_view(), (), {})
+        self.assertEqual(request.META['HTTP_ACCEPT'], 'application/json;q=0.9, text/plain;q=0.1')
+        response = middleware.process_response(request, HttpResponse())
+        self.assertEqual(response['X-Format'], 'json')
+
+    def testCanonicalAccept(self):
+        # Imported through the module, as the name would shadow this one in
+        # django_conneg.tests
+        canonical_accept = conneg_middleware.canonical_accept
+        self.assertEqual(canonical_accept(CanonicalView, 'application/json;q=0.9, text/html;q=0.5, image/png'),
+                         'application/json, application/xhtml+xml;q=0.99, text/html;q=0.99')
+        self.assertEqual(canonical_accept(CanonicalView, 'image/png'), None)
+
+    @override_settings(CONNEG_REWRITE_ACCEPT=True)
+    def testMiddlewareKeepsFallbacks(self):
+        middleware = CanonicalAcceptMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/', HTTP_ACCEPT='text/html;q=0.2, application/json;q=0.1')
+        middleware.process_view(request, CanonicalView.as_view(), (), {})
+        self.assertEqual(request.conneg_format, 'html')
+        self.assertEqual(request.META['HTTP_ACCEPT'], 'application/xhtml+xml, text/html, application/json;q=0.99')
+
+    @override_settings(CONNEG_REWRITE_ACCEPT=True)
+    def testMiddlewareFormatOverride(self):
+        middleware = CanonicalAcceptMiddleware(lambda request: HttpResponse())
+        for query, format in (('json', 'json'), ('csv,html', 'html'), ('csv', None)):
+            request = RequestFactory().get('/', {'format': query}, HTTP_ACCEPT='text/html')
+            middleware.process_view(request, CanonicalView.as_view(), (), {})
+            self.assertEqual(getattr(request, 'conneg_format', None), format)
+            self.assertEqual(request.META['HTTP_ACCEPT'], 'text/html')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from django import http
+from django.core.cache import caches
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.decorators import renderer
+from django_conneg.support import deferred, ranges
+from django_conneg.views import JSONView
+
+class ReportView(JSONView):
+    release = None
+    renders = 0
+    fail = False
+
+    def get(self, request):
+        self.context['rows'] = [1, 2, 3]
+        return self.render()
+
+    @renderer(format='csv', mimetypes=('text/csv',), name='CSV', deferred=True)
+    def render_csv(self, request, context, template_name):
+        type(self).renders += 1
+        self.release.wait(5)
+        if self.fail:
+            raise ValueError("Broken")
+        return http.HttpResponse('\n'.join(map(str, context['rows'])), content_type='text/csv')
+
+class DeferredRenderingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(CONNEG_RANGE_SPOOL_DIR=self.directory)
+        self.settings.enable()
+        caches['default'].clear()
+        ReportView.release, ReportView.renders, ReportView.fail = threading.Event(), 0, False
+
+    def tearDown(self):
+        ReportView.release.set()
+        # Let this test's jobs finish, so that they don't render for the next
+        executor = deferred.get_executor.reset()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def get(self, path='/report/', accept='text/csv'):
+        request = RequestFactory().get(path, HTTP_ACCEPT=accept)
+        response = ReportView.as_view()(request)
+        if response.streaming:
+            response.body = b''.join(response.streaming_content)
+        else:
+            response.body = response.content
+        return response
+
+    def wait(self, state):
+        store = deferred.get_job_store()
+        for i in range(100):
+            if any((store.get(key) or {}).get('state') == state for key in self.keys()):
+                return
+            time.sleep(0.05)
+        self.fail("Job didn't reach state %s" % state)
+
+    def keys(self):
+        view = ReportView()
+        request = RequestFactory().get('/report/')
+        view.format_override = None
+        return [view.get_deferred_job_key(request, {}, ReportView.render_csv)]
+
+    def testAccepted(self):
+        response = self.get(accept='text/csv, text/plain;q=0.1')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Location'], 'http://testserver/report/?format=csv')
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(response['Content-Type'].split(';')[0], 'text/plain')
+        self.assertIn(b'http://testserver/report/?format=csv', response.body)
+
+    def testNegotiatedAccepted(self):
+        response = self.get(accept='text/csv, application/json;q=0.5')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Content-Type'].split(';')[0], 'application/json')
+        job = json.loads(response.body.decode('utf-8'))['job']
+        self.assertEqual(job['format'], 'csv')
+        self.assertEqual(job['status_url'], 'http://testserver/report/?format=csv')
+
+    def testDeduplicatedAndServed(self):
+        self.assertEqual(self.get().status_code, 202)
+        # The status URL refers to the same job
+        self.assertEqual(self.get('/report/?format=csv', accept='*/*').status_code, 202)
+        self.assertEqual(self.get().status_code, 202)
+        ReportView.release.set()
+        self.wait(deferred.DONE)
+        self.assertEqual(ReportView.renders, 1)
+
+        for path in ('/report/', '/report/?format=csv'):
+            response = self.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/csv')
+            self.assertEqual(response.body, b'1\n2\n3')
+        self.assertEqual(ReportView.renders, 1)
+
+    def testPlantedFileIgnored(self):
+        ReportView.release.set()
+        self.get()
+        self.wait(deferred.DONE)
+        # Stands in for a file written by someone else who guessed the key
+        ranges.get_spool().put(self.keys()[0], http.HttpResponse(b'planted', content_type='text/csv')).close()
+        response = self.get()
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.body, b'planted')
+
+    def testOtherFormatsNotDeferred(self):
+        response = self.get(accept='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ReportView.renders, 0)
+
+    def testFailed(self):
+        ReportView.fail = True
+        ReportView.release.set()
+        with self.assertLogs('django_conneg.support.deferred', 'ERROR'):
+            self.assertEqual(self.get().status_code, 202)
+            self.wait(deferred.FAILED)
+        self.assertEqual(self.get().status_code, 500)
+        # The next request tries again
+        self.assertEqual(self.get().status_code, 202)
+
+    def testNotDeferredForPost(self):
+        ReportView.release.set()
+        class PostReportView(ReportView):
+            def post(self, request):
+                return self.get(request)
+        request = RequestFactory().post('/report/', HTTP_ACCEPT='text/csv')
+        response = PostReportView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'1\n2\n3')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import itertools
+import time
+import unittest
+from unittest import mock
+
+from django.test.client import RequestFactory
+
+from django_conneg.support.eventstream import Event
+from django_conneg.views import EventStreamView
+
+class CounterView(EventStreamView):
+    _event_stream_keepalive = None
+
+    def get(self, request):
+        start = int(self.last_event_id or 0) + 1
+        self.context['events'] = (Event({'n': i}, id=i) for i in range(start, start + 3))
+        self.context['title'] = 'Counter'
+        return self.render()
+
+class AsyncView(EventStreamView):
+    def get(self, request):
+        async def events():
+            for i in range(3):
+                yield i
+        self.context['events'] = events()
+        return self.render()
+
+class SlowView(EventStreamView):
+    _event_stream_keepalive = 0.01
+
+    def get(self, request):
+        def events():
+            time.sleep(0.1)
+            yield 'done'
+        self.context['events'] = events()
+        return self.render()
+
+class EventStreamTestCase(unittest.TestCase):
+    def get(self, view, **extra):
+        extra.setdefault('HTTP_ACCEPT', 'text/event-stream')
+        request = RequestFactory().get('/', **extra)
+        return view.as_view()(request)
+
+    def testEvents(self):
+        response = self.get(CounterView)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(b''.join(response.streaming_content).decode(),
+                         'id: 1\ndata: {"n":1}\n\nid: 2\ndata: {"n":2}\n\nid: 3\ndata: {"n":3}\n\n')
+
+    def testLastEventId(self):
+        response = self.get(CounterView, HTTP_LAST_EVENT_ID='3')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'id: 4\n'))
+
+    def testFormatOverride(self):
+        request = RequestFactory().get('/', {'format': 'sse'})
+        response = CounterView.as_view()(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    def testOtherFormats(self):
+        response = self.get(CounterView, HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def testAsyncGenerator(self):
+        response = self.get(AsyncView)
+        self.assertEqual(b''.join(response.streaming_content).decode(),
+                         'data: 0\n\ndata: 1\n\ndata: 2\n\n')
+
+    def testKeepAlive(self):
+        content = b''.join(self.get(SlowView).streaming_content).decode()
+        self.assertTrue(content.startswith(': keep-alive\n\n'))
+        self.assertTrue(content.endswith('data: "done"\n\n'))
+
+    def testProducerClosesConnections(self):
+        with mock.patch('django_conneg.support.eventstream.connections') as connections:
+            b''.join(self.get(SlowView).streaming_content)
+        self.assertEqual(connections.close_all.call_count, 1)
+
+    def testBackpressure(self):
+        produced = []
+        def events():
+            for i in itertools.count():
+                produced.append(i)
+                yield i
+
+        class InfiniteView(EventStreamView):
+            _event_stream_buffer_size = 4
+            def get(self, request):
+                self.context['events'] = events()
+                return self.render()
+
+        response = self.get(InfiniteView)
+        next(iter(response.streaming_content))
+        time.sleep(0.1)
+        self.assertTrue(len(produced) <= 4 + 2, produced)
+        response.close()
+
+    def testHead(self):
+        produced = []
+        def events():
+            produced.append(1)
+            yield 1
+
+        class OneView(SlowView):
+            def get(self, request):
+                self.context['events'] = events()
+                return self.render()
+
+        request = RequestFactory().head('/', HTTP_ACCEPT='text/event-stream')
+        response = OneView.as_view()(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        response.close()
+        time.sleep(0.05)
+        self.assertEqual(produced, [])
+
+    def testUnsimplifiableSkipped(self):
+        class MixedView(EventStreamView):
+            _event_stream_keepalive = None
+
+            def get(self, request):
+                self.context['events'] = iter([1, object(), 3])
+                return self.render()
+        with self.assertLogs('django_conneg.views', 'WARNING'):
+            content = b''.join(self.get(MixedView).streaming_content)
+        self.assertEqual(content, b'data: 1\n\ndata: 3\n\n')
+
+    def testMultilineData(self):
+        view = EventStreamView()
+        self.assertEqual(view.encode_event(Event('a', id='1\n2', event='tick')),
+                         'id: 1 2\nevent: tick\ndata: "a"\n\n')
+
+if __name__ == '__main__':
+    unittest.main()
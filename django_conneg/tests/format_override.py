@@ -0,0 +1,55 @@
+import unittest
+
+from django.test.client import RequestFactory
+
+from django_conneg.views import HTMLView, JSONView
+
+class OverrideView(HTMLView, JSONView):
+    pass
+
+class FormatOverrideTestCase(unittest.TestCase):
+    def getOverride(self, request, view_class=OverrideView, format_url_parameter=None):
+        return view_class().get_format_override(request, format_url_parameter)
+
+    def testURLParameter(self):
+        request = RequestFactory().get('/', {'format': 'html'})
+        self.assertEqual(self.getOverride(request, format_url_parameter='json'), ['json'])
+
+    def testQueryString(self):
+        request = RequestFactory().get('/', {'format': 'json,html'})
+        self.assertEqual(self.getOverride(request), ['json', 'html'])
+
+    def testSmallForm(self):
+        request = RequestFactory().post('/', {'format': 'json'})
+        self.assertEqual(self.getOverride(request), ['json'])
+
+    def testLargeFormNotParsed(self):
+        request = RequestFactory().post('/', {'format': 'json', 'data': 'x' * (128 * 1024)})
+        self.assertEqual(self.getOverride(request), None)
+        self.assertFalse(hasattr(request, '_post'))
+
+    def testConfigurableLimit(self):
+        class LargeBodyView(OverrideView):
+            _format_override_max_body_size = 1024 * 1024
+        request = RequestFactory().post('/', {'format': 'json', 'data': 'x' * (128 * 1024)})
+        self.assertEqual(self.getOverride(request, LargeBodyView), ['json'])
+
+    def testJSONBodyNotParsed(self):
+        request = RequestFactory().post('/', '{"format": "json"}', content_type='application/json')
+        self.assertEqual(self.getOverride(request), None)
+        self.assertFalse(hasattr(request, '_post'))
+
+    def testOptOut(self):
+        class NoBodyView(OverrideView):
+            _format_override_from_body = False
+        request = RequestFactory().post('/', {'format': 'json'})
+        self.assertEqual(self.getOverride(request, NoBodyView), None)
+        self.assertFalse(hasattr(request, '_post'))
+
+    def testAlreadyParsed(self):
+        request = RequestFactory().post('/', {'format': 'json', 'data': 'x' * (128 * 1024)})
+        request.POST
+        self.assertEqual(self.getOverride(request), ['json'])
+
+if __name__ == '__main__':
+    unittest.main()
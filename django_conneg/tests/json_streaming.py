@@ -0,0 +1,65 @@
+import json
+import unittest
+
+from django.test.client import RequestFactory
+
+from django_conneg.support.jsonstream import StreamedList, iterencode
+from django_conneg.views import JSONView
+
+class StreamedView(JSONView):
+    _json_stream = True
+
+    def get(self, request):
+        self.context['items'] = [1, 2, 3]
+        return self.render()
+
+class JSONStreamingTestCase(unittest.TestCase):
+    values = [{'a': [1, 2], 'b': {'c': None}},
+              [],
+              'string',
+              {'nested': [{'d': 'e'}]}]
+
+    def encode(self, value, indent=None):
+        return ''.join(iterencode(value, indent))
+
+    def testMatchesJSONDumps(self):
+        for value in self.values:
+            for indent in (None, 2):
+                self.assertEqual(self.encode(value, indent), json.dumps(value, indent=indent))
+
+    def testStreamedList(self):
+        for value in self.values:
+            for indent in (None, 2):
+                streamed = {'items': StreamedList(iter([value, value])), 'after': 1}
+                expected = {'items': [value, value], 'after': 1}
+                self.assertEqual(self.encode(streamed, indent), json.dumps(expected, indent=indent))
+
+    def testNestedStreamedLists(self):
+        value = StreamedList([StreamedList(iter([1, 2])), StreamedList(iter([]))])
+        self.assertEqual(json.loads(self.encode(value, 2)), [[1, 2], []])
+
+    def testPlaceholderLikeStrings(self):
+        value = {'a': '\x00conneg-stream:0\x00', 'b': StreamedList(iter(['\x00conneg-stream:1\x00'])), 1: None}
+        self.assertEqual(json.loads(self.encode(value, 2)),
+                         {'a': '\x00conneg-stream:0\x00', 'b': ['\x00conneg-stream:1\x00'], '1': None})
+
+    def testConsumedLazily(self):
+        consumed = []
+        def items():
+            for i in range(3):
+                consumed.append(i)
+                yield i
+        chunks = iterencode({'items': StreamedList(items())}, buffer_size=1)
+        next(chunks)
+        self.assertEqual(consumed, [])
+
+    def testHead(self):
+        request = RequestFactory().head('/', HTTP_ACCEPT='application/json')
+        response = StreamedView.as_view()(request)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.test.utils import override_settings
+
+from django_conneg.conneg import Conneg
+from django_conneg.decorators import renderer
+from django_conneg.support.negotiation_cache import (get_cache, DjangoCacheBackend, LocalBackend, MmapBackend,
+                                                     NegotiationCache, MISSING)
+from django_conneg.views import HTMLView, JSONView, TextView
+
+class CachedView(HTMLView, JSONView):
+    pass
+
+class ExtendedCachedView(CachedView, TextView):
+    pass
+
+class NegotiationCacheTestCase(unittest.TestCase):
+    accept_headers = ['application/json, text/javascript, */*; q=0.01',
+                      'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                      'image/png',
+                      'not a media type']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'negotiation.cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameRenderers(self, accept_header):
+        conneg = Conneg(obj=CachedView)
+        uncached = Conneg(list(conneg.renderers))
+        for i in range(2):
+            self.assertEqual(conneg.get_renderers(None, accept_header=accept_header, default_format='html'),
+                             uncached.get_renderers(None, accept_header=accept_header, default_format='html'))
+
+    def testCachedResolution(self):
+        for backend in (None, MmapBackend(self.path), DjangoCacheBackend(flush_every=1)):
+            config = {'BACKEND': backend and '{0}.{1}'.format(type(backend).__module__, type(backend).__name__)}
+            if isinstance(backend, MmapBackend):
+                config['OPTIONS'] = {'path': self.path}
+            with override_settings(CONNEG_NEGOTIATION_CACHE=config):
+                for accept_header in self.accept_headers:
+                    self.assertSameRenderers(accept_header)
+
+    def testVersions(self):
+        cache = NegotiationCache()
+        versions = set(cache.version(cls, Conneg(obj=cls).renderers)
+                       for cls in (CachedView, ExtendedCachedView))
+        self.assertEqual(len(versions), 2)
+
+        # Overriding a renderer's mimetypes changes the version.
+        class OverriddenView(CachedView):
+            @renderer(format='json', mimetypes=('application/vnd.example+json',), name='JSON')
+            def render_json(self, request, context, template_name):
+                pass
+        class OverriddenView2(CachedView):
+            pass
+        OverriddenView2.__name__ = 'OverriddenView'
+        self.assertNotEqual(cache.version(OverriddenView, Conneg(obj=OverriddenView).renderers),
+                            cache.version(OverriddenView2, Conneg(obj=OverriddenView2).renderers))
+
+    def testMmapBackend(self):
+        backend = MmapBackend(self.path, slots=16, record_size=64)
+        backend.publish(1, 'text/html', (0, 2))
+        backend.publish(1, 'nonsense', None)
+        backend.publish(3, 'text/html', (1,))
+        backend.publish(1, 'text/html' * 10, (0,))
+
+        # Another process opening the file with different settings uses the
+        # layout of the existing file.
+        other = MmapBackend(self.path, slots=1024)
+        self.assertEqual(other.slots, 16)
+        self.assertEqual(other.load(1), {'text/html': (0, 2), 'nonsense': None})
+        self.assertEqual(other.get(3, 'text/html'), (1,))
+        self.assertEqual(other.get(1, 'text/plain'), MISSING)
+        self.assertEqual(other.get(1, 'text/html' * 10), MISSING)
+
+        # Corrupt records are ignored
+        for offset in range(other._header.size, len(other._map), other.record_size):
+            other._map[offset + 30] = 255
+        self.assertEqual(backend.load(1), {})
+
+    def testMmapBackendEviction(self):
+        backend = MmapBackend(self.path, slots=4, record_size=64, probes=2)
+        for i in range(20):
+            backend.publish(1, 'text/x-%d' % i, (i,))
+        self.assertEqual(backend.get(1, 'text/x-19'), (19,))
+        self.assertTrue(len(backend.load(1)) <= 4)
+
+    def testMmapBackendDefaultPath(self):
+        with mock.patch('django_conneg.support.negotiation_cache.tempfile.gettempdir',
+                        return_value=self.directory):
+            backend = MmapBackend()
+            directory = os.path.dirname(backend.path)
+            self.assertEqual(os.path.dirname(directory), self.directory)
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            # Others mustn't be able to write to the directory
+            os.chmod(directory, 0o777)
+            self.assertRaises(OSError, MmapBackend)
+
+    @unittest.skipUnless(hasattr(os, 'O_NOFOLLOW'), "Symlinks are followed on this platform")
+    def testMmapBackendRefusesSymlinks(self):
+        target = os.path.join(self.directory, 'target')
+        open(target, 'w').close()
+        os.symlink(target, self.path)
+        self.assertRaises(OSError, MmapBackend, self.path)
+        self.assertEqual(os.path.getsize(target), 0)
+
+    def testMmapBackendReplacesOtherLayouts(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 4096)
+        # Stands in for another process with the old file mapped, which
+        # would get SIGBUS if the file were truncated.
+        with open(self.path, 'r+b') as f:
+            old_map = mmap.mmap(f.fileno(), 4096)
+        old_inode = os.stat(self.path).st_ino
+        backend = MmapBackend(self.path, slots=16, record_size=64)
+        self.assertNotEqual(os.stat(self.path).st_ino, old_inode)
+        self.assertEqual(old_map[-1:], b'x')
+        old_map.close()
+        backend.publish(1, 'text/html', (0,))
+        self.assertEqual(MmapBackend(self.path).load(1), {'text/html': (0,)})
+        self.assertEqual(os.listdir(self.directory), ['negotiation.cache'])
+
+    def testBackendFailure(self):
+        config = {'BACKEND': 'django_conneg.support.negotiation_cache.MmapBackend',
+                  'OPTIONS': {'path': os.path.join(self.directory, 'missing', 'negotiation.cache')}}
+        with override_settings(CONNEG_NEGOTIATION_CACHE=config):
+            with self.assertLogs('django_conneg.support.negotiation_cache', 'ERROR'):
+                cache = get_cache()
+            self.assertIsInstance(cache.backend, LocalBackend)
+            self.assertSameRenderers('application/json')
+
+    def testDjangoCacheBackend(self):
+        backend = DjangoCacheBackend(key_prefix='conneg-test', flush_every=2, max_entries=3)
+        backend.load(1)
+        backend.publish(1, 'a/a', (0,))
+        self.assertEqual(DjangoCacheBackend(key_prefix='conneg-test').load(1), {})
+        backend.publish(1, 'b/b', None)
+        self.assertEqual(DjangoCacheBackend(key_prefix='conneg-test').load(1), {'a/a': (0,), 'b/b': None})
+        backend.publish(1, 'c/c', (1,))
+        backend.publish(1, 'd/d', (2,))
+        self.assertEqual(len(backend.load(1)), 3)
+
+    def testWarming(self):
+        MmapBackend(self.path).publish(get_cache().version(CachedView, Conneg(obj=CachedView).renderers),
+                                       'application/x-warm', ())
+        with override_settings(CONNEG_NEGOTIATION_CACHE={'BACKEND': 'django_conneg.support.negotiation_cache.MmapBackend',
+                                                         'OPTIONS': {'path': self.path}}):
+            conneg = Conneg(obj=CachedView)
+            version = get_cache().version(CachedView, conneg.renderers)
+            self.assertEqual(get_cache()._get_entries(version), {'application/x-warm': ()})
+
+if __name__ == '__main__':
+    unittest.main()
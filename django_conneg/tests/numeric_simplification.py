@@ -0,0 +1,86 @@
+import datetime
+import unittest
+
+from django_conneg import views
+from django_conneg.support import numeric
+from django_conneg.utils import utc
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+@unittest.skipUnless(numpy, "numpy not installed")
+class NumPySimplificationTestCase(unittest.TestCase):
+    def simplify(self, value):
+        return views.JSONView().simplify_for_json(value)
+
+    def testIntegerArray(self):
+        self.assertEqual(self.simplify(numpy.arange(3)), [0, 1, 2])
+
+    def testNestedArray(self):
+        self.assertEqual(self.simplify(numpy.arange(4).reshape(2, 2)), [[0, 1], [2, 3]])
+
+    def testFloatArrayWithNaN(self):
+        self.assertEqual(self.simplify(numpy.array([1.5, numpy.nan, numpy.inf])), [1.5, None, None])
+
+    def testDatetimeArray(self):
+        value = numpy.array(['1970-01-01T00:00:01', 'NaT'], dtype='datetime64[s]')
+        self.assertEqual(self.simplify(value), [self.simplify(datetime.datetime(1970, 1, 1, 0, 0, 1)), None])
+
+    def testDatetimeConsistent(self):
+        # Either side of a daylight saving change in the default TIME_ZONE
+        for naive in (datetime.datetime(2001, 2, 3, 4, 5, 6, 789000), datetime.datetime(2001, 7, 3, 4, 5, 6)):
+            self.assertEqual(self.simplify(numpy.datetime64(naive)), self.simplify(naive))
+            self.assertEqual(self.simplify(numpy.array([numpy.datetime64(naive)])), [self.simplify(naive)])
+
+    def testInvalidBytes(self):
+        self.assertEqual(self.simplify(numpy.array([b'ok', b'\xff'])), ['ok', '\ufffd'])
+
+    def testScalar(self):
+        self.assertEqual(self.simplify({'a': numpy.float64(2.5)}), {'a': 2.5})
+
+    def testObjectArray(self):
+        value = numpy.array([1, 'a', datetime.datetime], dtype=object)
+        self.assertEqual(self.simplify(value), [1, 'a'])
+
+    def testTabulate(self):
+        names, rows = numeric.tabulate(numpy.arange(4).reshape(2, 2))
+        self.assertEqual((names, list(rows)), (['0', '1'], [(0, 1), (2, 3)]))
+
+@unittest.skipUnless(pandas, "pandas not installed")
+class PandasSimplificationTestCase(unittest.TestCase):
+    def getFrame(self):
+        return pandas.DataFrame({'a': [1, 2],
+                                 'b': pandas.to_datetime(['1970-01-01T00:00:01Z', None])})
+
+    def setUp(self):
+        # As for the equivalent aware datetime
+        self.b = views.JSONView().simplify_for_json(datetime.datetime(1970, 1, 1, 0, 0, 1, tzinfo=utc))
+
+    def testRecords(self):
+        self.assertEqual(views.JSONView().simplify_for_json(self.getFrame()),
+                         [{'a': 1, 'b': self.b}, {'a': 2, 'b': None}])
+
+    def testColumns(self):
+        view = views.JSONView()
+        view._json_dataframe_orient = 'columns'
+        self.assertEqual(view.simplify_for_json(self.getFrame()),
+                         {'a': [1, 2], 'b': [self.b, None]})
+
+    def testIndexIncluded(self):
+        frame = self.getFrame().set_index('a')
+        self.assertEqual(views.JSONView().simplify_for_json(frame),
+                         [{'a': 1, 'b': self.b}, {'a': 2, 'b': None}])
+
+    def testNullableIntegers(self):
+        series = pandas.Series([1, None], dtype='Int64')
+        self.assertEqual(views.JSONView().simplify_for_json(series), [1, None])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import unittest
+
+from django.apps import apps
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from django_conneg.support import querysets
+from django_conneg.views import JSONView
+
+# Models are looked up as needed, as this module is imported while
+# django_conneg.tests is being loaded as an app, before models are ready.
+
+class UsersView(JSONView):
+    _json_indent = None
+
+    def get(self, request):
+        User = apps.get_model('auth', 'User')
+        self.context.update({'user': User.objects.get(username='alice'),
+                             'users': User.objects.order_by('username')})
+        return self.render()
+
+class DeclaredUsersView(UsersView):
+    _json_model_fields = {'auth.user': ('username', 'groups__name')}
+
+class QuerySetSimplificationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User, Group = apps.get_model('auth', 'User'), apps.get_model('auth', 'Group')
+        cls.admins, cls.staff = Group.objects.create(name='admins'), Group.objects.create(name='staff')
+        alice = User.objects.create_user('alice', 'alice@example.com', 'secret')
+        alice.groups.add(cls.admins, cls.staff)
+        Permission = apps.get_model('auth', 'Permission')
+        cls.admins.permissions.add(*Permission.objects.filter(codename__in=('add_group', 'change_group')))
+        User.objects.create_user('bob', 'bob@example.com', 'secret').groups.add(cls.staff)
+        User.objects.create_user('carol', 'carol@example.com', 'secret')
+
+    def get(self, view, **params):
+        request = RequestFactory().get('/', params, HTTP_ACCEPT='application/json')
+        return json.loads(view.as_view()(request).content.decode('utf-8'))
+
+    def testPlanFields(self):
+        User, Permission = apps.get_model('auth', 'User'), apps.get_model('auth', 'Permission')
+        self.assertEqual(querysets.plan_fields(Permission, ['pk', 'codename', 'content_type__app_label']),
+                         (['pk', 'codename', 'content_type__app_label'], {}))
+        self.assertEqual(querysets.plan_fields(User, ['username', 'groups', 'groups__name',
+                                                      'groups__permissions__codename']),
+                         (['username'], {'groups': ['', 'name', 'permissions__codename']}))
+
+    def testIterQuerySet(self):
+        User = apps.get_model('auth', 'User')
+        queryset = User.objects.order_by('username')
+        # One main query, and one for the groups of each chunk of two users
+        with self.assertNumQueries(3):
+            rows = list(querysets.iter_queryset(queryset, ['username', 'groups__name'], chunk_size=2))
+        self.assertEqual(rows, [{'username': 'alice', 'groups': [{'name': 'admins'}, {'name': 'staff'}]},
+                                {'username': 'bob', 'groups': [{'name': 'staff'}]},
+                                {'username': 'carol', 'groups': []}])
+
+    def testNestedManyValued(self):
+        User = apps.get_model('auth', 'User')
+        queryset = User.objects.filter(username__in=('alice', 'carol')).order_by('username')
+        # One query for each level
+        with self.assertNumQueries(3):
+            rows = list(querysets.iter_queryset(queryset, ['username', 'groups__name', 'groups__permissions__codename']))
+        self.assertEqual(rows, [{'username': 'alice', 'groups': [
+                                    {'name': 'admins', 'permissions': [{'codename': 'add_group'},
+                                                                       {'codename': 'change_group'}]},
+                                    {'name': 'staff', 'permissions': []}]},
+                                {'username': 'carol', 'groups': []}])
+
+    def testNullFieldsKept(self):
+        Group = apps.get_model('auth', 'Group')
+        rows = list(querysets.iter_queryset(Group.objects.filter(name='staff'), ['name', 'user__last_login']))
+        self.assertEqual(rows, [{'name': 'staff', 'user': [{'last_login': None}, {'last_login': None}]}])
+
+    def testForwardRelationsJoined(self):
+        Permission = apps.get_model('auth', 'Permission')
+        queryset = Permission.objects.filter(content_type__app_label='auth', codename='add_user')
+        with self.assertNumQueries(1):
+            rows = list(querysets.iter_queryset(queryset, ['codename', 'content_type__app_label']))
+        self.assertEqual(rows, [{'codename': 'add_user', 'content_type': {'app_label': 'auth'}}])
+
+    def testPrefetchIgnored(self):
+        User = apps.get_model('auth', 'User')
+        queryset = User.objects.filter(username='bob').prefetch_related('user_permissions')
+        with self.assertNumQueries(1):
+            rows = list(querysets.iter_queryset(queryset, ['username']))
+        self.assertEqual(rows, [{'username': 'bob'}])
+
+    def testFetchMany(self):
+        User = apps.get_model('auth', 'User')
+        pks = list(User.objects.order_by('username').values_list('pk', flat=True))
+        related = querysets._fetch_many(User, pks, 'groups', [''])
+        self.assertEqual(sorted(related[pks[0]]), sorted([self.admins.pk, self.staff.pk]))
+        self.assertEqual(related[pks[1]], [self.staff.pk])
+        # Users without groups are left out, rather than given [None]
+        self.assertNotIn(pks[2], related)
+        related = querysets._fetch_many(User, pks[1:], 'groups', ['name'])
+        self.assertEqual(dict(related), {pks[1]: [{'name': 'staff'}]})
+
+    def testSimplifyInstance(self):
+        User = apps.get_model('auth', 'User')
+        alice = User.objects.get(username='alice')
+        with self.assertNumQueries(0):
+            self.assertEqual(querysets.simplify_instance(alice, ['pk', 'username']),
+                             {'pk': alice.pk, 'username': 'alice'})
+        with self.assertNumQueries(2):
+            result = querysets.simplify_instance(alice, ['username', 'groups__name'])
+        self.assertEqual(result, {'username': 'alice', 'groups': [{'name': 'admins'}, {'name': 'staff'}]})
+
+    def testUndeclaredModelsDropped(self):
+        for params in ({}, {'fields': 'user,users'}):
+            with self.assertLogs('django_conneg.views', 'WARNING'):
+                result = self.get(UsersView, **params)
+            self.assertNotIn('user', result)
+            self.assertNotIn('users', result)
+
+    def testDeclaredModels(self):
+        result = self.get(DeclaredUsersView)
+        self.assertEqual(result['user'], {'username': 'alice', 'groups': [{'name': 'admins'}, {'name': 'staff'}]})
+        self.assertEqual([user['username'] for user in result['users']], ['alice', 'bob', 'carol'])
+        self.assertEqual(self.get(DeclaredUsersView, fields='users.username')['users'][2], {'username': 'carol'})
+
+    def testJSONFieldsAttribute(self):
+        User = apps.get_model('auth', 'User')
+        User.json_fields = ('username',)
+        try:
+            result = self.get(UsersView)
+        finally:
+            del User.json_fields
+        self.assertEqual(result['user'], {'username': 'alice'})
+        self.assertNotIn('password', result['users'][0])
+
+if __name__ == '__main__':
+    unittest.main()
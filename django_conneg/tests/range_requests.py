@@ -0,0 +1,181 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.decorators import renderer
+from django_conneg.support import ranges
+from django_conneg.support.ranges import SpooledResponse, parse_range
+from django_conneg.views import JSONView
+
+class ExportView(JSONView):
+    _allow_range_requests = True
+    _json_indent = None
+    renders = 0
+
+    def get(self, request):
+        self.context['rows'] = list(range(100))
+        return self.render()
+
+    def get_representation_etag(self, request, context, renderer):
+        return 'v1'
+
+    @renderer(format='json', mimetypes=('application/json',), name='JSON')
+    def render_json(self, request, context, template_name):
+        type(self).renders += 1
+        return super(ExportView, self).render_json(request, context, template_name)
+
+class LastModifiedView(JSONView):
+    _allow_range_requests = True
+
+    def get(self, request):
+        self.context['additional_headers']['Last-Modified'] = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        return self.render()
+
+class RangeParsingTestCase(unittest.TestCase):
+    def testParseRange(self):
+        for header, expected in [('bytes=0-9', (0, 9)),
+                                 ('bytes=90-', (90, 99)),
+                                 ('bytes=-10', (90, 99)),
+                                 ('bytes=-1000', (0, 99)),
+                                 ('bytes=50-1000', (50, 99)),
+                                 ('bytes=100-', None),
+                                 ('bytes=10-5', None),
+                                 ('bytes=-0', None),
+                                 ('bytes=0-1,5-6', None),
+                                 ('bytes=-', None),
+                                 ('bytes=+1-2', None),
+                                 ('items=0-9', None),
+                                 ('', None)]:
+            self.assertEqual(parse_range(header, 100), expected, header)
+
+class RangeRequestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(CONNEG_RANGE_SPOOL_DIR=self.directory)
+        self.settings.enable()
+        ExportView.renders = 0
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def get(self, view, method='get', user=None, **extra):
+        request = getattr(RequestFactory(), method)('/export/', HTTP_ACCEPT='application/json', **extra)
+        if user is not None:
+            request.user = user
+        response = view.as_view()(request)
+        if response.streaming:
+            response.body = b''.join(response.streaming_content)
+        else:
+            response.body = response.content
+        return response
+
+    def testSpooled(self):
+        full = self.get(ExportView)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full['ETag'], '"v1"')
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        partial = self.get(ExportView, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.body, full.body[10:20])
+        self.assertEqual(partial['Content-Range'], 'bytes 10-19/%d' % len(full.body))
+        self.assertEqual(partial['Content-Type'], 'application/json')
+        self.assertEqual(ExportView.renders, 1)
+
+    def testHead(self):
+        path = os.path.join(self.directory, 'body')
+        with open(path, 'wb') as f:
+            f.write(b'[1, 2]')
+        class SpooledView(JSONView):
+            def get(self, request):
+                return SpooledResponse(path, 6)
+        response = self.get(SpooledView, method='head')
+        self.assertEqual((response.status_code, response.body), (200, b''))
+        self.assertEqual(response['Content-Length'], '6')
+        response.close()
+        self.assertTrue(response.file.closed)
+
+    def testHeadValidators(self):
+        full = self.get(ExportView)
+        for i in range(2):
+            response = self.get(ExportView, method='head')
+            self.assertEqual((response.status_code, response.body), (200, b''))
+            self.assertEqual(response['ETag'], '"v1"')
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            self.assertEqual(response['Content-Length'], str(len(full.body)))
+        self.assertEqual(ExportView.renders, 1)
+
+    def testDefaultDirectory(self):
+        with mock.patch('tempfile.gettempdir', return_value=self.directory), \
+                override_settings(CONNEG_RANGE_SPOOL_DIR=None):
+            self.get(ExportView)
+            spool_dir = ranges.get_spool().get_directory()
+            self.assertEqual(os.path.dirname(os.path.dirname(spool_dir)), self.directory)
+            self.assertEqual(os.stat(spool_dir).st_mode & 0o777, 0o700)
+            for name in os.listdir(spool_dir):
+                self.assertEqual(os.stat(os.path.join(spool_dir, name)).st_mode & 0o077, 0)
+            self.get(ExportView)
+            self.assertEqual(ExportView.renders, 1)
+            # Files planted by others mustn't be served
+            os.chmod(spool_dir, 0o777)
+            with self.assertLogs('django_conneg.views', 'ERROR'):
+                response = self.get(ExportView)
+            self.assertEqual((response.status_code, ExportView.renders), (200, 2))
+
+    def testTouchFailureClosesFile(self):
+        self.get(ExportView)
+        opened, init = [], SpooledResponse.__init__
+        def spooled_response_init(response, *args):
+            opened.append(response)
+            init(response, *args)
+        with mock.patch.object(SpooledResponse, '__init__', spooled_response_init), \
+                mock.patch('os.utime', side_effect=OSError):
+            self.get(ExportView)
+        self.assertEqual(ExportView.renders, 2)
+        self.assertTrue(opened[0].file.closed)
+
+    def testSpooledPerUser(self):
+        alice, bob = mock.Mock(pk=1, is_authenticated=True), mock.Mock(pk=2, is_authenticated=True)
+        self.get(ExportView, user=alice)
+        self.get(ExportView, user=alice)
+        self.assertEqual(ExportView.renders, 1)
+        self.get(ExportView, user=bob)
+        self.get(ExportView)
+        self.assertEqual(ExportView.renders, 3)
+
+    def testIfRange(self):
+        full = self.get(ExportView)
+        partial = self.get(ExportView, HTTP_RANGE='bytes=-5', HTTP_IF_RANGE='"v1"')
+        self.assertEqual((partial.status_code, partial.body), (206, full.body[-5:]))
+        stale = self.get(ExportView, HTTP_RANGE='bytes=-5', HTTP_IF_RANGE='"v0"')
+        self.assertEqual((stale.status_code, stale.body), (200, full.body))
+
+    def testUnsatisfiable(self):
+        full = self.get(ExportView)
+        for header in ('bytes=100000-', 'bytes=0-1,3-4', 'nonsense'):
+            response = self.get(ExportView, HTTP_RANGE=header)
+            self.assertEqual((response.status_code, response.body), (200, full.body))
+
+    def testLastModified(self):
+        full = self.get(LastModifiedView)
+        partial = self.get(LastModifiedView, HTTP_RANGE='bytes=0-0',
+                           HTTP_IF_RANGE='Wed, 21 Oct 2015 07:28:00 GMT')
+        self.assertEqual((partial.status_code, partial.body), (206, full.body[:1]))
+
+    def testNoValidator(self):
+        class PlainView(JSONView):
+            _allow_range_requests = True
+            def get(self, request):
+                return self.render()
+        response = self.get(PlainView, HTTP_RANGE='bytes=0-0')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Accept-Ranges'))
+
+if __name__ == '__main__':
+    unittest.main()
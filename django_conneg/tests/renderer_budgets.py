@@ -0,0 +1,118 @@
+import time
+import unittest
+
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.decorators import renderer
+from django_conneg.signals import renderer_skipped, renderer_tripped
+from django_conneg.support import breaker
+from django_conneg.views import JSONView
+
+class ChartView(JSONView):
+    _degraded_format = 'csv'
+    delay = 0
+    fail = False
+
+    def get(self, request):
+        return self.render()
+
+    @renderer(format='png', mimetypes=('image/png',), name='Chart', priority=1, budget=0.01)
+    def render_png(self, request, context, template_name):
+        time.sleep(type(self).delay)
+        if type(self).fail:
+            raise ValueError
+        return HttpResponse(b'png', content_type='image/png')
+
+    @renderer(format='csv', mimetypes=('text/csv',), name='CSV')
+    def render_csv(self, request, context, template_name):
+        return HttpResponse('csv', content_type='text/csv')
+
+class RendererBudgetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.settings = override_settings(CONNEG_BREAKER_WINDOW=4, CONNEG_BREAKER_MIN_CALLS=2,
+                                          CONNEG_BREAKER_FAILURE_RATIO=0.5, CONNEG_BREAKER_COOLDOWN=0.2)
+        self.settings.enable()
+        ChartView.delay, ChartView.fail = 0, False
+        self.events = []
+        renderer_tripped.connect(self.record_event)
+        renderer_skipped.connect(self.record_event)
+
+    def tearDown(self):
+        renderer_tripped.disconnect(self.record_event)
+        renderer_skipped.disconnect(self.record_event)
+        self.settings.disable()
+
+    def record_event(self, signal, **kwargs):
+        self.events.append(signal)
+
+    def get(self, accept='image/png, application/json;q=0.5'):
+        return ChartView.as_view()(RequestFactory().get('/', HTTP_ACCEPT=accept))
+
+    def testWithinBudget(self):
+        for i in range(5):
+            response = self.get()
+            self.assertEqual(response['Content-Type'], 'image/png')
+            self.assertFalse(response.has_header('X-Conneg-Degraded'))
+
+    def testSlowRendererTrips(self):
+        ChartView.delay = 0.02
+        for i in range(2):
+            self.assertEqual(self.get()['Content-Type'], 'image/png')
+        self.assertEqual(self.events, [renderer_tripped])
+
+        response = self.get()
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['X-Conneg-Degraded'], 'png')
+        self.assertEqual(self.events, [renderer_tripped, renderer_skipped])
+
+        # The lighter format is preferred if the client accepts it, and
+        # otherwise the service is unavailable.
+        self.assertEqual(self.get('image/png, application/json;q=0.5, text/csv;q=0.1')['Content-Type'], 'text/csv')
+        for accept in ('image/png', 'image/png, text/html;q=0.1'):
+            response = self.get(accept)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['X-Conneg-Degraded'], 'png')
+            self.assertIn(response['Retry-After'], ('0', '1'))
+
+        # After the cool-down a successful trial call closes the breaker.
+        ChartView.delay = 0
+        time.sleep(0.2)
+        self.assertEqual(self.get()['Content-Type'], 'image/png')
+        response = self.get()
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertFalse(response.has_header('X-Conneg-Degraded'))
+
+    def testErrorsTrip(self):
+        ChartView.fail = True
+        for i in range(2):
+            self.assertRaises(ValueError, self.get)
+        self.assertEqual(self.get()['X-Conneg-Degraded'], 'png')
+
+    def testFailedTrial(self):
+        ChartView.delay = 0.02
+        for i in range(2):
+            self.get()
+        time.sleep(0.2)
+        self.assertEqual(self.get()['Content-Type'], 'image/png')
+        self.assertEqual(self.get()['Content-Type'], 'application/json')
+
+    def testUnrecordedTrial(self):
+        circuit_breaker = breaker.get_breaker()
+        png = ChartView.render_png
+        for i in range(2):
+            circuit_breaker.record(ChartView, png, 1)
+        self.assertFalse(circuit_breaker.allow(ChartView, png))
+        time.sleep(0.2)
+        # A trial whose outcome is never recorded doesn't block further
+        # trials beyond the cool-down.
+        self.assertTrue(circuit_breaker.allow(ChartView, png))
+        self.assertFalse(circuit_breaker.allow(ChartView, png))
+        time.sleep(0.2)
+        self.assertTrue(circuit_breaker.allow(ChartView, png))
+        circuit_breaker.record(ChartView, png, 0)
+        self.assertFalse(circuit_breaker.is_open(ChartView, png))
+
+if __name__ == '__main__':
+    unittest.main()
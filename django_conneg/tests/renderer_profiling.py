@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.support.profiling import get_profiler
+from django_conneg.views import JSONView
+
+class ProfiledView(JSONView):
+    pass
+
+class RendererProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def renderMany(self, count, format='json'):
+        for i in range(count):
+            request = RequestFactory().get('/', {'format': format})
+            view = ProfiledView()
+            view.get = lambda request: view.render(request, {'value': i}, None)
+            view.dispatch(request)
+
+    def testDisabledByDefault(self):
+        self.assertFalse(get_profiler().rate)
+
+    def testWritesStats(self):
+        with override_settings(CONNEG_PROFILE_RATE=1,
+                               CONNEG_PROFILE_DIR=self.directory,
+                               CONNEG_PROFILE_FLUSH_EVERY=2):
+            self.renderMany(2)
+        filenames = os.listdir(self.directory)
+        self.assertEqual(len(filenames), 1)
+        self.assertTrue(filenames[0].startswith(__name__ + '.ProfiledView.json.'))
+
+    def testFormatFilter(self):
+        with override_settings(CONNEG_PROFILE_RATE=1,
+                               CONNEG_PROFILE_DIR=self.directory,
+                               CONNEG_PROFILE_FLUSH_EVERY=1,
+                               CONNEG_PROFILE_FORMATS=['html']):
+            self.renderMany(2)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def testMaxBytes(self):
+        with override_settings(CONNEG_PROFILE_RATE=1,
+                               CONNEG_PROFILE_DIR=self.directory,
+                               CONNEG_PROFILE_FLUSH_EVERY=1,
+                               CONNEG_PROFILE_MAX_BYTES=0):
+            open(os.path.join(self.directory, 'existing'), 'w').write('x')
+            self.renderMany(2)
+        self.assertEqual(os.listdir(self.directory), ['existing'])
+
+    def testInvalidMode(self):
+        with override_settings(CONNEG_PROFILE_RATE=1,
+                               CONNEG_PROFILE_DIR=self.directory,
+                               CONNEG_PROFILE_FLUSH_EVERY=1,
+                               CONNEG_PROFILE_MODE='perf'):
+            with self.assertLogs('django_conneg.support.profiling', 'ERROR'):
+                self.renderMany(2)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def testDefaultDirectory(self):
+        with override_settings(CONNEG_PROFILE_RATE=1, CONNEG_PROFILE_FLUSH_EVERY=1), \
+                mock.patch('tempfile.gettempdir', return_value=self.directory):
+            self.renderMany(1)
+            directory = get_profiler().get_directory()
+            self.assertEqual(os.path.dirname(os.path.dirname(directory)), self.directory)
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            self.assertEqual(len(os.listdir(directory)), 1)
+            # Others mustn't be able to plant files in it
+            os.chmod(directory, 0o777)
+            with self.assertLogs('django_conneg.support.profiling', 'ERROR'):
+                self.renderMany(1)
+
+    def testTracemallocStopped(self):
+        with override_settings(CONNEG_PROFILE_RATE=1,
+                               CONNEG_PROFILE_DIR=self.directory,
+                               CONNEG_PROFILE_FLUSH_EVERY=2,
+                               CONNEG_PROFILE_MODE='tracemalloc'):
+            self.renderMany(1)
+            self.assertFalse(tracemalloc.is_tracing())
+            # Tracing started by something else is left running
+            tracemalloc.start()
+            try:
+                self.renderMany(1)
+                self.assertTrue(tracemalloc.is_tracing())
+            finally:
+                tracemalloc.stop()
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
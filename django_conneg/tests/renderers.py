@@ -0,0 +1,69 @@
+import unittest
+
+from django_conneg import conneg, views
+from django_conneg.decorators import renderer
+from django_conneg.http import MediaType
+
+class RendererRegistryTestCase(unittest.TestCase):
+    def getRenderers(self, view):
+        return dict((r.__name__, r) for r in view._conneg_renderers)
+
+    def testCollectedAtClassCreation(self):
+        class TestView(views.ContentNegotiatedView):
+            @renderer(format='foo', mimetypes=('application/x-foo',))
+            def render_foo(self, request, context, template_name):
+                pass
+
+        self.assertIsInstance(TestView._conneg_renderers, tuple)
+        self.assertEqual(list(self.getRenderers(TestView)), ['render_foo'])
+
+    def testInherited(self):
+        self.assertEqual(set(self.getRenderers(views.ErrorView)),
+                         set(['render_html', 'render_json', 'render_js', 'render_text']))
+
+    def testOverride(self):
+        class TestView(views.JSONView):
+            @renderer(format='json', mimetypes=('application/x-json',))
+            def render_json(self, request, context, template_name):
+                pass
+
+        renderers = self.getRenderers(TestView)
+        self.assertEqual(len(renderers), 1)
+        self.assertEqual(renderers['render_json'].mimetypes, set([MediaType('application/x-json')]))
+
+    def testRemoval(self):
+        class TestView(views.HTMLView, views.JSONView):
+            render_json = None
+
+        self.assertEqual(list(self.getRenderers(TestView)), ['render_html'])
+
+    def testInheritMimetypes(self):
+        class TestView(views.JSONView):
+            @renderer(format='json')
+            def render_json(self, request, context, template_name):
+                pass
+
+        renderers = self.getRenderers(TestView)
+        self.assertEqual(renderers['render_json'].mimetypes, set([MediaType('application/json')]))
+        self.assertEqual(renderers['render_json'].func, TestView.__dict__['render_json'].func)
+
+    def testInheritMimetypesFromOtherName(self):
+        class TestView(views.JSONView):
+            @renderer(format='json')
+            def render_json_differently(self, request, context, template_name):
+                pass
+
+        renderers = self.getRenderers(TestView)
+        self.assertEqual(renderers['render_json_differently'].mimetypes,
+                         set([MediaType('application/json')]))
+
+    def testNonViewObject(self):
+        class Mixin(object):
+            @renderer(format='foo', mimetypes=('application/x-foo',))
+            def render_foo(self, request, context, template_name):
+                pass
+
+        self.assertEqual([r.format for r in conneg.Conneg(obj=Mixin()).renderers], ['foo'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import unittest
+
+from http.client import OK, UNSUPPORTED_MEDIA_TYPE, BAD_REQUEST
+
+from django.test.client import RequestFactory
+
+from django_conneg import parsers
+from django_conneg.decorators import parser
+from django_conneg.views import JSONView
+
+class ParsingView(parsers.JSONParser, parsers.NDJSONParser, parsers.CSVParser,
+                  parsers.FormParser, JSONView):
+    def post(self, request):
+        data = self.parse()
+        if not isinstance(data, (dict, list)):
+            data = list(data)
+        return self.render(request, {'data': data}, None)
+    put = post
+
+class ParserTestCase(unittest.TestCase):
+    def post(self, data, content_type, method='post'):
+        request = getattr(RequestFactory(), method)('/', data, content_type=content_type,
+                                                    HTTP_ACCEPT='application/json')
+        response = ParsingView.as_view()(request)
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    def testJSON(self):
+        self.assertEqual(self.post('{"a": [1, 2]}', 'application/json; charset=utf-8'),
+                         (OK, {'data': {'a': [1, 2]}}))
+
+    def testInvalidJSON(self):
+        self.assertEqual(self.post('{"a"', 'application/json')[0], BAD_REQUEST)
+
+    def testNDJSON(self):
+        self.assertEqual(self.post('{"a": 1}\n\n{"b": 2}\n', 'application/x-ndjson'),
+                         (OK, {'data': [{'a': 1}, {'b': 2}]}))
+
+    def testNDJSONStreamed(self):
+        request = RequestFactory().post('/', '{"a": 1}\n{"b": 2}\n', content_type='application/x-ndjson')
+        view = ParsingView()
+        view.request = request
+        view.conneg = ParsingView.as_view().conneg
+        records = view.parse()
+        self.assertEqual(next(records), {'a': 1})
+        self.assertFalse(hasattr(request, '_body'))
+
+    def testCSV(self):
+        self.assertEqual(self.post('a,b\n1,"x\ny"\n', 'text/csv'),
+                         (OK, {'data': [{'a': '1', 'b': 'x\ny'}]}))
+
+    def testFormPut(self):
+        self.assertEqual(self.post('a=1&b=2', 'application/x-www-form-urlencoded', 'put'),
+                         (OK, {'data': {'a': '1', 'b': '2'}}))
+
+    def testUnsupported(self):
+        status_code, content = self.post('<a/>', 'application/xml')
+        self.assertEqual(status_code, UNSUPPORTED_MEDIA_TYPE)
+        self.assertEqual(content['error']['content_type'], 'application/xml')
+        self.assertIn('application/json', content['error']['supported_mimetypes'])
+
+    def testSpecificity(self):
+        class SpecificView(ParsingView):
+            @parser(format='special', mimetypes=('application/vnd.special+json',))
+            def parse_special(self, request, media_type):
+                return {'special': True}
+
+            @parser(format='any', mimetypes=('application/*',))
+            def parse_any(self, request, media_type):
+                return {'any': True}
+
+        conneg = SpecificView.as_view().conneg
+        self.assertEqual(conneg.get_parser('application/vnd.special+json').format, 'special')
+        self.assertEqual(conneg.get_parser('application/vnd.other+json').format, 'json')
+        self.assertEqual(conneg.get_parser('application/xml').format, 'any')
+        self.assertEqual(conneg.get_parser('text/xml'), None)
+
+if __name__ == '__main__':
+    unittest.main()
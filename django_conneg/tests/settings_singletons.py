@@ -0,0 +1,34 @@
+import unittest
+
+from django.test.utils import override_settings
+
+from django_conneg.support import settings_singleton, view_path
+from django_conneg.views import JSONView
+
+class SettingsSingletonTestCase(unittest.TestCase):
+    def testViewPath(self):
+        self.assertEqual(view_path(JSONView), 'django_conneg.views.JSONView')
+        self.assertEqual(view_path(JSONView()), 'django_conneg.views.JSONView')
+
+    def testReset(self):
+        built, forgotten = [], []
+
+        @settings_singleton('CONNEG_TEST_', 'CONNEG_OTHER', on_reset=forgotten.append)
+        def get_thing():
+            built.append(object())
+            return built[-1]
+
+        self.assertIs(get_thing(), get_thing())
+        with override_settings(CONNEG_OTHER_SETTING=1):
+            self.assertIs(get_thing(), built[0])
+        with override_settings(CONNEG_TEST_SETTING=1):
+            self.assertIs(get_thing(), built[1])
+        # Both enabling and disabling the override reset it
+        self.assertEqual(forgotten, built)
+        thing = get_thing()
+        self.assertIs(get_thing.reset(), thing)
+        self.assertEqual(len(forgotten), 2)
+        self.assertIsNone(get_thing.reset())
+
+if __name__ == '__main__':
+    unittest.main()
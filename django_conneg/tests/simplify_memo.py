@@ -0,0 +1,90 @@
+import json
+import unittest
+
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.support import simplified
+from django_conneg.views import JSONView
+
+class Tag(object):
+    simplified = 0
+
+    def __init__(self, name, version=1):
+        self.name, self.version = name, version
+
+    def simplify_for_json(self, simplify):
+        Tag.simplified += 1
+        return {'name': self.name, 'version': self.version}
+
+class CachedTag(Tag):
+    def json_cache_key(self):
+        return (self.name, self.version)
+
+class TagsView(JSONView):
+    _json_indent = None
+    tags = ()
+
+    def get(self, request):
+        self.context['items'] = [{'id': i, 'tag': self.tags[i % len(self.tags)]} for i in range(10)]
+        return self.render()
+
+def get(view, **initkwargs):
+    request = RequestFactory().get('/tags/', HTTP_ACCEPT='application/json')
+    return json.loads(view.as_view(**initkwargs)(request).content.decode('utf-8'))
+
+class SimplifyMemoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.settings = override_settings(CONNEG_SIMPLIFIED_CACHE_MAX_ENTRIES=2)
+        self.settings.enable()
+        Tag.simplified = 0
+
+    def tearDown(self):
+        self.settings.disable()
+
+    def testIdentityMemo(self):
+        tags = (Tag('a'), Tag('b'))
+        content = get(TagsView, tags=tags)
+        self.assertEqual([item['tag']['name'] for item in content['items']], ['a', 'b'] * 5)
+        self.assertEqual(Tag.simplified, 2)
+        # The memo only lasts for one render
+        get(TagsView, tags=tags)
+        self.assertEqual(Tag.simplified, 4)
+
+    def testEqualObjectsNotConflated(self):
+        get(TagsView, tags=[Tag('a') for i in range(10)])
+        self.assertEqual(Tag.simplified, 10)
+
+    def testCrossRequestCache(self):
+        get(TagsView, tags=(CachedTag('a'),))
+        get(TagsView, tags=(CachedTag('a'),))
+        self.assertEqual(Tag.simplified, 1)
+        content = get(TagsView, tags=(CachedTag('a', version=2),))
+        self.assertEqual(content['items'][0]['tag'], {'name': 'a', 'version': 2})
+        self.assertEqual(Tag.simplified, 2)
+
+    def testCachedPerView(self):
+        class OtherTagsView(TagsView):
+            pass
+        get(TagsView, tags=(CachedTag('a'),))
+        get(OtherTagsView, tags=(CachedTag('a'),))
+        self.assertEqual(Tag.simplified, 2)
+
+    def testLRUEviction(self):
+        cache = simplified.get_cache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('b'), simplified.MISSING)
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+
+    def testDisabled(self):
+        with override_settings(CONNEG_SIMPLIFIED_CACHE_MAX_ENTRIES=0):
+            get(TagsView, tags=(CachedTag('a'),))
+            get(TagsView, tags=(CachedTag('a'),))
+        self.assertEqual(Tag.simplified, 2)
+
+if __name__ == '__main__':
+    unittest.main()
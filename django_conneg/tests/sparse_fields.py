@@ -0,0 +1,87 @@
+import json
+import unittest
+
+from django.test.client import RequestFactory
+
+from django_conneg.support.fieldsets import parse_fields, restrict, select_paths
+from django_conneg.views import JSONPView
+
+class Unwalkable(object):
+    def simplify_for_json(self, simplify):
+        raise AssertionError("Unselected fields shouldn't be simplified")
+
+class Author(object):
+    def simplify_for_json(self, simplify):
+        return {'name': 'Frank Herbert', 'born': 1920}
+
+class FieldsView(JSONPView):
+    _json_indent = None
+
+    def get(self, request):
+        self.context.update({'book': {'title': 'Dune', 'pages': 412,
+                                      'author': {'name': 'Frank Herbert', 'born': 1920}},
+                             'tags': [{'name': 'sf', 'count': 10}, {'name': 'classic', 'count': 3}],
+                             'expensive': Unwalkable(),
+                             'author': Author()})
+        return self.render()
+
+class RestrictedView(FieldsView):
+    _json_allowed_fields = ('book.title', 'book.author', 'tags')
+    _json_default_fields = ('book.title',)
+
+class LimitedView(FieldsView):
+    _json_max_depth = 2
+    _json_max_list_length = 1
+    _json_default_fields = ('book', 'tags')
+
+class FieldSelectionTestCase(unittest.TestCase):
+    def testParseFields(self):
+        self.assertEqual(parse_fields(['a', 'b.c', 'b.d.e', 'a.x']), {'a': None, 'b': {'c': None, 'd': {'e': None}}})
+        self.assertEqual(parse_fields(['b.c', 'b']), {'b': None})
+
+    def testRestrict(self):
+        allowed = parse_fields(['a', 'b.c'])
+        self.assertEqual(restrict(parse_fields(['a.x', 'b']), allowed), {'a': {'x': None}, 'b': {'c': None}})
+        self.assertEqual(restrict(None, allowed), allowed)
+        self.assertRaises(ValueError, restrict, parse_fields(['b.d']), allowed)
+
+    def testSelectPaths(self):
+        self.assertEqual(select_paths(['id', 'title', 'author__name', 'author__born', 'author'],
+                                      parse_fields(['title', 'author.name'])),
+                         ['title', 'author__name', 'author'])
+
+    def get(self, view, path='/', **extra):
+        extra.setdefault('HTTP_ACCEPT', 'application/json')
+        response = view.as_view()(RequestFactory().get(path, **extra))
+        return response.status_code, response.content.decode('utf-8')
+
+    def testQueryParameter(self):
+        status_code, content = self.get(FieldsView, '/?fields=book.title,book.author.name,tags.name')
+        self.assertEqual(json.loads(content), {'book': {'title': 'Dune', 'author': {'name': 'Frank Herbert'}},
+                                               'tags': [{'name': 'sf'}, {'name': 'classic'}]})
+
+    def testMediaTypeParameter(self):
+        # Ignored, as it's not part of the URL that responses are keyed on
+        status_code, content = self.get(RestrictedView, HTTP_ACCEPT='application/json; fields="book.author tags"')
+        self.assertEqual(json.loads(content), {'book': {'title': 'Dune'}})
+
+    def testSimplifiedThenPruned(self):
+        status_code, content = self.get(FieldsView, '/?fields=author.name')
+        self.assertEqual(json.loads(content), {'author': {'name': 'Frank Herbert'}})
+
+    def testJSONP(self):
+        status_code, content = self.get(FieldsView, '/?fields=book.pages&callback=f')
+        self.assertEqual(content, 'f({"book": {"pages": 412}});')
+
+    def testAllowedAndDefault(self):
+        self.assertEqual(json.loads(self.get(RestrictedView)[1]), {'book': {'title': 'Dune'}})
+        status_code, content = self.get(RestrictedView, '/?fields=book')
+        self.assertEqual(json.loads(content), {'book': {'title': 'Dune', 'author': {'name': 'Frank Herbert', 'born': 1920}}})
+        self.assertEqual(self.get(RestrictedView, '/?fields=book.pages')[0], 400)
+
+    def testLimits(self):
+        self.assertEqual(json.loads(self.get(LimitedView)[1]),
+                         {'book': {'title': 'Dune', 'pages': 412}, 'tags': [{'name': 'sf', 'count': 10}]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import unittest
+
+from django.urls import resolve, reverse, Resolver404
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.support.middleware import CanonicalAcceptMiddleware
+from django_conneg.urls import format_suffix_urls, suffix_regex
+from django_conneg.views import JSONView, TextView
+
+class ItemView(JSONView, TextView):
+    _json_indent = None
+    _force_fallback_format = 'json'
+
+    def get(self, request, pk):
+        self.context.update({'pk': int(pk), 'title': 'Item'})
+        return self.render()
+
+urlpatterns = format_suffix_urls(r'^items/(?P<pk>\d+)/$', ItemView.as_view(), name='item') + \
+              format_suffix_urls(r'^texts/$', ItemView.as_view(), {'pk': '0'}, name='texts', formats=('txt',))
+
+class SuffixRoutingTestCase(unittest.TestCase):
+    def get(self, path, accept='text/plain'):
+        request = RequestFactory().get(path, HTTP_ACCEPT=accept)
+        match = resolve(path, __name__)
+        return match.func(request, *match.args, **match.kwargs)
+
+    def testSuffixRegex(self):
+        self.assertEqual(suffix_regex(r'^items/$', ['json', 'html']), r'^items\.(?P<format>html|json)$')
+        self.assertEqual(suffix_regex(r'^items', ['json'], 'fmt'), r'^items\.(?P<fmt>json)')
+
+    def testResolve(self):
+        self.assertEqual(resolve('/items/1.json', __name__).kwargs, {'pk': '1', 'format': 'json'})
+        self.assertEqual(resolve('/items/1.txt', __name__).kwargs, {'pk': '1', 'format': 'txt'})
+        self.assertEqual(resolve('/items/1/', __name__).kwargs, {'pk': '1'})
+        self.assertEqual(resolve('/texts.txt', __name__).kwargs, {'pk': '0', 'format': 'txt'})
+        for path in ('/items/1.xml', '/texts.json'):
+            self.assertRaises(Resolver404, resolve, path, __name__)
+
+    def testReverse(self):
+        self.assertEqual(reverse('item', __name__, kwargs={'pk': 1}), '/items/1/')
+        self.assertEqual(reverse('item', __name__, kwargs={'pk': 1, 'format': 'json'}), '/items/1.json')
+
+    def testSuffixIgnoresAccept(self):
+        response = self.get('/items/1.json', accept='text/plain')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['pk'], 1)
+        self.assertNotIn('Accept', response.get('Vary', ''))
+
+    def testNegotiated(self):
+        response = self.get('/items/1/', accept='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('Accept', response['Vary'])
+
+    @override_settings(CONNEG_REWRITE_ACCEPT=True)
+    def testMiddleware(self):
+        middleware = CanonicalAcceptMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/items/1.json', HTTP_ACCEPT='text/plain')
+        match = resolve('/items/1.json', __name__)
+        middleware.process_view(request, match.func, match.args, match.kwargs)
+        self.assertEqual(request.META['HTTP_ACCEPT'], 'text/plain')
+        self.assertEqual(request.conneg_format, 'json')
+
+if __name__ == '__main__':
+    unittest.main()
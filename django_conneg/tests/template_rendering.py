@@ -0,0 +1,113 @@
+import os
+import unittest
+from unittest import mock
+
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_conneg.support import templates
+from django_conneg.views import HTMLView, TextView
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates', 'template_rendering')
+
+calls = []
+
+def processor(request):
+    calls.append(request)
+    return {'processed': 'yes'}
+
+TEMPLATES = [{'BACKEND': 'django.template.backends.django.DjangoTemplates',
+              'DIRS': [os.path.join(TEMPLATE_DIR, 'default')],
+              'OPTIONS': {'context_processors': ['django_conneg.tests.template_rendering.processor']}},
+             {'BACKEND': 'django.template.backends.django.DjangoTemplates',
+              'NAME': 'other',
+              'DIRS': [os.path.join(TEMPLATE_DIR, 'other')]}]
+
+class PageView(HTMLView, TextView):
+    template_name = 'page'
+
+    def get(self, request):
+        self.context.update({'title': 'Hello', 'items': [1, 2]})
+        return self.render()
+
+class TemplateRenderingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.settings = override_settings(TEMPLATES=TEMPLATES, CONNEG_TEMPLATE_CACHE=True)
+        self.settings.enable()
+        del calls[:]
+
+    def tearDown(self):
+        self.settings.disable()
+
+    def get(self, accept='text/html', method='get', **initkwargs):
+        request = getattr(RequestFactory(), method)('/page/', HTTP_ACCEPT=accept)
+        response = PageView.as_view(**initkwargs)(request)
+        if response.streaming:
+            response.body = b''.join(response.streaming_content)
+        else:
+            response.body = response.content
+        return response
+
+    def testRender(self):
+        response = self.get()
+        self.assertEqual(response['Content-Type'], 'text/html')
+        self.assertEqual(response.body, b'<h1>Hello</h1>\n<li>1</li><li>2</li>')
+        response = self.get('text/plain')
+        self.assertEqual((response['Content-Type'], response.body), ('text/plain', b'Hello'))
+
+    def testLazyProcessors(self):
+        self.get()
+        self.assertEqual(calls, [])
+        response = self.get(template_name='processed')
+        self.assertEqual(response.body, b'<p>Hello</p>\n<p>yes</p>')
+        self.assertEqual(len(calls), 1)
+
+    def testProcessorOverrides(self):
+        a, b = (lambda request: {'x': 'A'}), (lambda request: {'x': 'B', 'y': 'Y'})
+        # The last processor wins, whatever is looked up first
+        self.assertEqual(templates.LazyProcessors(None, [a, b])['x'], 'B')
+        processors = templates.LazyProcessors(None, [a, b])
+        self.assertEqual((processors['y'], processors['x']), ('Y', 'B'))
+        self.assertEqual(dict(templates.LazyProcessors(None, [a, b]).items()), {'x': 'B', 'y': 'Y'})
+
+    def testCached(self):
+        self.get()
+        with mock.patch.object(templates.loader, 'get_template') as get_template:
+            response = self.get()
+        self.assertFalse(get_template.called)
+        self.assertEqual(response.status_code, 200)
+
+    def testMissingCached(self):
+        self.assertEqual(self.get(template_name='missing').status_code, 406)
+        with mock.patch.object(templates.loader, 'get_template') as get_template:
+            self.assertEqual(self.get(template_name='missing').status_code, 406)
+        self.assertFalse(get_template.called)
+
+    def testUncached(self):
+        with override_settings(CONNEG_TEMPLATE_CACHE=False):
+            self.get()
+            with mock.patch.object(templates.loader, 'get_template',
+                                   wraps=templates.loader.get_template) as get_template:
+                self.get()
+        self.assertTrue(get_template.called)
+
+    def testEngine(self):
+        response = self.get(_template_engines={'html': 'other'})
+        self.assertEqual(response.body, b'<h1>Other Hello</h1>')
+        response = self.get('text/plain', _template_engines={'html': 'other'})
+        self.assertEqual(response.body, b'Hello')
+
+    def testStream(self):
+        response = self.get(_template_stream=True)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/html')
+        self.assertEqual(response.body, b'<h1>Hello</h1>\n<li>1</li><li>2</li>')
+
+    def testHeadStream(self):
+        response = self.get(method='head', _template_stream=True)
+        self.assertEqual((response.streaming, response.body), (True, b''))
+        self.assertEqual(response['Content-Type'], 'text/html')
+        self.assertEqual(calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
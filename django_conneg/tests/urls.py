@@ -1,6 +1,5 @@
-from django.conf.urls.defaults import patterns, url
-from django.conf import settings
-from django.http import HttpResponse, HttpResponseRedirect
+from django.urls import re_path
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django_conneg.views import HTMLView, JSONView
@@ -20,7 +19,12 @@ class LoginRequiredView(HTMLView, JSONView):
         response.is_authenticated = request.user.is_authenticated
         return response
 
-urlpatterns = patterns('',
-    url(r'^optional-auth/$', OptionalAuthView.as_view()),
-    url(r'^login-required/$', LoginRequiredView.as_view()),
-)
+class NotFoundView(HTMLView, JSONView):
+    def get(self, request):
+        raise Http404
+
+urlpatterns = [
+    re_path(r'^optional-auth/$', OptionalAuthView.as_view()),
+    re_path(r'^login-required/$', LoginRequiredView.as_view()),
+    re_path(r'^not-found/$', NotFoundView.as_view()),
+]
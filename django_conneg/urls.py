@@ -0,0 +1,53 @@
+"""
+URL patterns that select a negotiated view's format by a suffix.
+
+    from django_conneg.urls import format_suffix_urls
+
+    urlpatterns = [
+        # ...
+    ] + format_suffix_urls(r'^items/(?P<pk>\\d+)/$', ItemView.as_view(), name='item')
+
+routes /items/1/ to ItemView as usual, and /items/1.json, /items/1.html and
+so on (one suffix for each of the view's formats) straight to the renderers
+for that format. Those responses don't depend on the Accept header, and so
+don't have Vary: Accept, which lets caches store them with one copy per URL.
+Both patterns share a name, so reverse('item', kwargs={'pk': 1, 'format':
+'json'}) gives the suffixed URL.
+"""
+
+from __future__ import unicode_literals
+
+import re
+
+from django.urls import re_path as url
+
+def suffix_regex(regex, formats, format_url_parameter='format'):
+    """
+    Returns a version of regex that also matches a suffix naming one of
+    formats, captured as the named group format_url_parameter.
+
+    Any trailing slash is replaced by the suffix, so '^items/$' becomes
+    '^items\\.(?P<format>html|json)$'.
+    """
+    end = regex.endswith('$')
+    if end:
+        regex = regex[:-1]
+    if regex.endswith('/'):
+        regex = regex[:-1]
+    alternatives = '|'.join(re.escape(format) for format in sorted(formats))
+    return r'{0}\.(?P<{1}>{2}){3}'.format(regex, format_url_parameter, alternatives, '$' if end else '')
+
+def format_suffix_urls(regex, view, kwargs=None, name=None, formats=None):
+    """
+    Returns URL patterns for view (as returned by a negotiated view's
+    as_view()) at regex, and at regex with a suffix for each of formats, or
+    for each format the view has renderers for.
+    """
+    view_class = view.view_class
+    if formats is None:
+        formats = [format for format, renderers in view.conneg.renderers_by_format.items() if renderers]
+    patterns = [url(regex, view, kwargs, name=name)]
+    if formats:
+        patterns.append(url(suffix_regex(regex, formats, view_class._format_url_parameter),
+                            view, kwargs, name=name))
+    return patterns
@@ -13,6 +13,6 @@ except ImportError:
     
     utc = _UTC()
 
-from django.http import HttpResponse
-import inspect
-content_type_arg = 'mimetype' if 'mimetype' in inspect.getargspec(HttpResponse.__init__).args else 'content_type'
+# HttpResponse took a mimetype argument before Django 1.7. Kept for code that
+# still passes **{content_type_arg: ...}.
+content_type_arg = 'content_type'
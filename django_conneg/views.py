@@ -1,36 +1,31 @@
 from __future__ import unicode_literals
 
 import datetime
-try: # Python < 3
-    import httplib as http_client
-    import urlparse as urllib_parse
-    from urllib import urlencode
-    str_types = (unicode, str)
-except ImportError: # Python >= 3
-    import http.client as http_client
-    import urllib.parse as urllib_parse
-    from urllib.parse import urlencode
-    str_types = (str,)
-    unicode = str
+import http.client as http_client
 import inspect
 import itertools
 import logging
 import sys
 import time
-import urllib
+import urllib.parse as urllib_parse
+from urllib.parse import urlencode
 import warnings
 
+from django.conf import settings
 from django.core import exceptions
+from django.db import models
 from django.views.generic import View
 from django.utils.decorators import classonlymethod
 from django import http
 from django.template import RequestContext, TemplateDoesNotExist
-from django.shortcuts import render_to_response, render
 from django.utils.cache import patch_vary_headers
 
-from django_conneg.conneg import Conneg
+from django_conneg.conneg import Conneg, Parser, collect_renderers
 from django_conneg.decorators import renderer
-from django_conneg.http import MediaType, HttpError, HttpNotAcceptable
+from django_conneg.http import MediaType, HttpBadRequest, HttpError, HttpNotAcceptable, HttpUnsupportedMediaType
+from django_conneg.signals import renderer_skipped
+from django_conneg.support import breaker, deferred, eventstream, fieldsets, jsonstream, numeric, profiling
+from django_conneg.support import querysets, ranges, simplified, templates, view_path
 from django_conneg.utils import utc, content_type_arg
 
 logger = logging.getLogger(__name__)
@@ -38,14 +33,46 @@ logger = logging.getLogger(__name__)
 class BaseContentNegotiatedView(View):
     conneg = None
     context = None
+    # Whether the format was given by the URL (see _format_url_parameter
+    # and django_conneg.urls), in which case the Accept header is ignored
+    format_from_url = False
     _default_format = None
     _force_fallback_format = None
     _format_override_parameter = 'format'
     _format_url_parameter = 'format'
     _include_renderer_details_in_context = True
+    # Whether the format override parameter may be given in a form-encoded
+    # request body, and the largest such body (in bytes) that will be parsed
+    # to find it. If None, CONNEG_FORMAT_OVERRIDE_MAX_BODY_SIZE is used.
+    _format_override_from_body = True
+    _format_override_max_body_size = None
+    # Whether to answer Range requests for responses with an ETag or
+    # Last-Modified header. Representations are spooled for reuse when
+    # get_representation_etag() returns an ETag for them.
+    _allow_range_requests = False
+    # A format to try in place of renderers skipped because their circuit
+    # breakers are open (see django_conneg.support.breaker), if the client
+    # would accept it
+    _degraded_format = None
+    # The template engine (by alias) to use for each template extension,
+    # e.g. {'html': 'jinja2'}. Extensions not listed may use any engine.
+    _template_engines = {}
+    # Whether to stream rendered templates
+    _template_stream = False
     
     template_name = None
 
+    # The renderers and parsers defined on this class and its bases, sorted
+    # by attribute name (Conneg orders them by priority). These are filled in
+    # for each subclass as it's created.
+    _conneg_renderers = ()
+    _conneg_parsers = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super(BaseContentNegotiatedView, cls).__init_subclass__(**kwargs)
+        cls._conneg_renderers = collect_renderers(cls)
+        cls._conneg_parsers = collect_renderers(cls, Parser)
+
     @classonlymethod
     def as_view(cls, **initkwargs):
         view = super(BaseContentNegotiatedView, cls).as_view(**initkwargs)
@@ -61,14 +88,8 @@ class BaseContentNegotiatedView(View):
             self.context = {'additional_headers': {}}
 
         format_url_parameter = kwargs.pop(self._format_url_parameter, None)
-        if format_url_parameter:
-            self.format_override = [format_url_parameter]
-        elif request.GET.get(self._format_override_parameter):
-            self.format_override = request.GET[self._format_override_parameter].split(',')
-        elif request.POST.get(self._format_override_parameter):
-            self.format_override = request.POST[self._format_override_parameter].split(',')
-        else:
-            self.format_override = None
+        self.format_from_url = bool(format_url_parameter)
+        self.format_override = self.get_format_override(request, format_url_parameter)
 
         self.request = request
         self.args = args
@@ -77,6 +98,39 @@ class BaseContentNegotiatedView(View):
         self.set_renderers(request)
         return super(BaseContentNegotiatedView, self).dispatch(request, *args, **kwargs)
 
+    def get_format_override(self, request, format_url_parameter=None):
+        """
+        Returns the list of formats explicitly requested, or None.
+
+        The URL parameter is checked first, then the query string. The request
+        body is only checked if it's a small form submission, or has already
+        been parsed, so that large uploads aren't read into memory just to
+        look for the parameter.
+        """
+        if format_url_parameter:
+            return [format_url_parameter]
+        value = request.GET.get(self._format_override_parameter) or \
+                self.get_body_format_override(request)
+        return value.split(',') if value else None
+
+    def get_body_format_override(self, request):
+        if not self._format_override_from_body or request.method != 'POST':
+            return None
+        if not hasattr(request, '_post'):
+            content_type = request.META.get('CONTENT_TYPE', '')
+            if not content_type.startswith(('application/x-www-form-urlencoded', 'multipart/form-data')):
+                return None
+            max_body_size = self._format_override_max_body_size
+            if max_body_size is None:
+                max_body_size = getattr(settings, 'CONNEG_FORMAT_OVERRIDE_MAX_BODY_SIZE', 64 * 1024)
+            try:
+                content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                return None
+            if content_length > max_body_size:
+                return None
+        return request.POST.get(self._format_override_parameter)
+
     def set_renderers(self, request=None, context=None, template_name=None, early=False):
         """
         Makes sure that the renderers attribute on the request is up
@@ -110,7 +164,7 @@ class BaseContentNegotiatedView(View):
     def get_render_params(self, request, context, template_name):
         if not template_name:
             template_name = self.template_name
-            if isinstance(template_name, str_types) and template_name.endswith('.html'):
+            if isinstance(template_name, str) and template_name.endswith('.html'):
                 template_name = template_name[:-5]
         return request or self.request, context or self.context, template_name
 
@@ -130,26 +184,221 @@ class BaseContentNegotiatedView(View):
 
         status_code = context.pop('status_code', http_client.OK)
         additional_headers = context.pop('additional_headers', {})
-
-        for renderer in request.renderers:
-            response = renderer(request, context, template_name)
+        spooled = self._allow_range_requests and status_code == http_client.OK and request.method in ('GET', 'HEAD')
+        deferrable = status_code == http_client.OK and request.method == 'GET'
+
+        for candidate in self.iter_renderers(request):
+            if candidate.deferred and deferrable:
+                response = self.render_deferred(candidate, request, context, template_name)
+            elif spooled:
+                response = self.call_spooled_renderer(candidate, request, context, template_name)
+            else:
+                response = self.call_renderer(candidate, request, context, template_name)
             if response is NotImplemented:
                 continue
-            response.status_code = status_code
-            response.renderer = renderer
+            if not hasattr(response, 'deferred_job'):
+                response.status_code = status_code
+            response.renderer = candidate
             break
         else:
-            tried_mimetypes = list(itertools.chain(*[r.mimetypes for r in request.renderers]))
-            response = self.http_not_acceptable(request, tried_mimetypes)
+            if self.skipped_renderers:
+                response = self.http_service_unavailable(request, self.skipped_renderers)
+            else:
+                tried_mimetypes = list(itertools.chain(*[r.mimetypes for r in request.renderers]))
+                response = self.http_not_acceptable(request, tried_mimetypes)
             response.renderer = None
         for key, value in additional_headers.items():
             response[key] = value
+        skipped = [r for r in self.skipped_renderers if r is not response.renderer]
+        if skipped:
+            response[getattr(settings, 'CONNEG_DEGRADED_HEADER', 'X-Conneg-Degraded')] = \
+                ','.join(r.format for r in skipped)
 
         # We're doing content-negotiation, so tell the user-agent that the
-        # response will vary depending on the accept header.
-        patch_vary_headers(response, ('Accept',))
+        # response will vary depending on the accept header, unless the URL
+        # determined the format.
+        if not self.format_from_url:
+            patch_vary_headers(response, ('Accept',))
+        if self._allow_range_requests:
+            response = ranges.range_response(request, response)
+        return response
+
+    def get_representation_etag(self, request, context, renderer):
+        """
+        Returns a strong ETag for what renderer would render, or None.
+
+        Override this to have representations spooled and reused by later
+        requests with the same path and ETag, including Range requests from
+        resumed downloads. It's only called if _allow_range_requests is true.
+        """
+        return None
+
+    def call_spooled_renderer(self, renderer, request, context, template_name):
+        """
+        Calls a renderer, or fetches its response from the spool if it's
+        already been rendered with the same ETag for the same user.
+        """
+        etag = self.get_representation_etag(request, context, renderer)
+        if not etag:
+            return self.call_renderer(renderer, request, context, template_name)
+        if not etag.startswith('"'):
+            etag = '"%s"' % etag
+        user = getattr(request, 'user', None)
+        user = user.pk if user is not None and user.is_authenticated else None
+        key = [view_path(self), request.get_full_path(), renderer.format, user, etag]
+        spool = ranges.get_spool()
+        try:
+            spool.get_directory()
+        except OSError:
+            logger.exception("Couldn't use the range spool")
+            return self.call_renderer(renderer, request, context, template_name)
+        response = spool.get(key)
+        if response is None:
+            response = self.call_renderer(renderer, request, context, template_name)
+            if response is NotImplemented or response.status_code != http_client.OK:
+                return response
+            try:
+                response = spool.put(key, response)
+            except (IOError, OSError):
+                logger.exception("Couldn't spool representation")
+                if response.streaming:
+                    raise
+        response['ETag'] = etag
+        return response
+
+    def get_deferred_job_key(self, request, context, renderer):
+        """
+        Returns the key identifying what a deferred renderer would render.
+
+        It's made up of the view, the request path and query string (less any
+        format override), the renderer's format, the user, and the ETag from
+        get_representation_etag(), if any.
+        """
+        query = sorted((name, value) for name, value in urllib_parse.parse_qsl(request.META.get('QUERY_STRING', ''), True)
+                       if name != self._format_override_parameter)
+        user = getattr(request, 'user', None)
+        user = user.pk if user is not None and user.is_authenticated else None
+        return ['deferred', view_path(self), request.path, query,
+                renderer.format, user, self.get_representation_etag(request, context, renderer)]
+
+    def render_deferred(self, renderer, request, context, template_name):
+        """
+        Returns the finished representation from a deferred renderer if
+        there is one, and otherwise makes sure it's being rendered in the
+        background and returns a 202 Accepted response.
+        """
+        store = deferred.get_job_store()
+        key = self.get_deferred_job_key(request, context, renderer)
+        job = store.get(key)
+        if job and job['state'] == deferred.DONE:
+            response = ranges.get_spool().get(key, job.get('token', ''))
+            if response is not None:
+                return response
+            store.delete(key)
+            job = None
+        elif job and job['state'] == deferred.FAILED:
+            # Let the next request try again
+            store.delete(key)
+            raise HttpError(http_client.INTERNAL_SERVER_ERROR, "The %s representation couldn't be rendered" % renderer.name)
+        if job is None:
+            job = store.claim(key)
+            if job is not None:
+                context = context.copy()
+                deferred.submit(store, key, job,
+                                lambda: self.call_renderer(renderer, request, context, template_name))
+            else:
+                job = store.get(key) or {'state': deferred.PENDING}
+        return self.deferred_accepted(request, renderer, job)
+
+    def deferred_accepted(self, request, renderer, job):
+        """
+        Returns a 202 Accepted response for an unfinished deferred render, in
+        a format negotiated separately by AcceptedView.
+        """
+        if self.format_override:
+            status_url = request.get_full_path()
+        else:
+            status_url = self.url_for_format(request, renderer.format)
+        status_url = request.build_absolute_uri(status_url)
+        context = {'job': {'state': job['state'],
+                           'format': renderer.format,
+                           'name': renderer.name,
+                           'created': job.get('created'),
+                           'status_url': status_url}}
+        response = AcceptedView.as_view()(request, context, ('conneg/accepted', '202'))
+        response['Location'] = status_url
+        response['Retry-After'] = str(getattr(settings, 'CONNEG_DEFERRED_RETRY_AFTER', 5))
+        response.deferred_job = job
+        return response
+
+    def iter_renderers(self, request):
+        """
+        Yields the negotiated renderers in the order they should be tried.
+
+        Renderers whose circuit breakers are open are skipped, and listed in
+        self.skipped_renderers. In place of the first of them, any negotiated
+        renderers for _degraded_format are tried next.
+        """
+        circuit_breaker = breaker.get_breaker()
+        self.skipped_renderers = []
+        tried = []
+        for candidate in request.renderers:
+            if candidate in tried:
+                continue
+            if circuit_breaker.allow(self, candidate):
+                tried.append(candidate)
+                yield candidate
+                continue
+            self.skipped_renderers.append(candidate)
+            renderer_skipped.send(sender=type(self), view=self, renderer=candidate, request=request)
+            if len(self.skipped_renderers) > 1 or not self._degraded_format:
+                continue
+            for substitute in request.renderers:
+                if substitute.format != self._degraded_format or substitute in tried or \
+                        substitute in self.skipped_renderers:
+                    continue
+                if circuit_breaker.allow(self, substitute):
+                    tried.append(substitute)
+                    yield substitute
+
+    def call_renderer(self, renderer, request, context, template_name):
+        """
+        Calls a renderer, profiling it if CONNEG_PROFILE_RATE says to, and
+        recording how long it took if it has a budget.
+        """
+        start = time.time()
+        try:
+            profiler = profiling.get_profiler()
+            if profiler.should_profile(self, renderer):
+                response = profiler.profile(self, renderer, request, context, template_name)
+            else:
+                response = renderer(request, context, template_name)
+        except HttpError:
+            # The request was at fault, not the renderer
+            breaker.get_breaker().record(self, renderer, time.time() - start)
+            raise
+        except Exception:
+            breaker.get_breaker().record(self, renderer, time.time() - start, failed=True)
+            raise
+        breaker.get_breaker().record(self, renderer, time.time() - start)
         return response
 
+    def parse(self, request=None):
+        """
+        Returns the request body as parsed by the parser for its Content-Type.
+
+        Raises HttpUnsupportedMediaType if there isn't a suitable parser.
+        Parsers may return iterators that consume the request as they go, in
+        which case the body can only be parsed once.
+        """
+        request = request or self.request
+        content_type = request.META.get('CONTENT_TYPE', '')
+        parser = self.conneg.get_parser(content_type)
+        if parser is None:
+            raise HttpUnsupportedMediaType(content_type,
+                                           [m.value for p in self.conneg.parsers for m in p.mimetypes])
+        return parser(request, MediaType(content_type))
+
     def http_not_acceptable(self, request, tried_mimetypes, *args, **kwargs):
         response = http.HttpResponse("""\
 Your Accept header didn't contain any supported media ranges.
@@ -160,11 +409,29 @@ Supported ranges are:
         response.status_code = http_client.NOT_ACCEPTABLE
         return response
 
+    def http_service_unavailable(self, request, skipped_renderers):
+        """
+        Returns the response for when the only acceptable renderers are those
+        whose circuit breakers are open.
+        """
+        response = http.HttpResponse("""\
+The requested representation is temporarily unavailable. Please try again
+later, or ask for a different media type.\n""", **{content_type_arg: "text/plain"})
+        response.status_code = http_client.SERVICE_UNAVAILABLE
+        response['Retry-After'] = str(breaker.get_breaker().retry_after(self, skipped_renderers))
+        return response
+
     def head(self, request, *args, **kwargs):
         handle_get = getattr(self, 'get', None)
         if handle_get:
             response = handle_get(request, *args, **kwargs)
-            response.content = ''
+            if response.streaming:
+                # Setting content isn't possible on streaming responses. Swap
+                # in an empty body without starting the original, which stays
+                # registered with the response and is closed along with it.
+                response.streaming_content = []
+            else:
+                response.content = b''
             return response
         else:
             return self.http_method_not_allowed(request, *args, **kwargs)
@@ -186,16 +453,16 @@ Supported ranges are:
         status_code = context.pop('status_code', http_client.OK)
         additional_headers = context.pop('additional_headers', {})
 
-        for renderer in self.conneg.renderers_by_format.get(format, ()):
-            response = renderer(request, context, template_name)
+        for candidate in self.conneg.renderers_by_format.get(format, ()):
+            response = self.call_renderer(candidate, request, context, template_name)
             if response is not NotImplemented:
                 break
         else:
             response = self.http_not_acceptable(request, ())
-            renderer = None
+            candidate = None
 
         response.status_code = status_code
-        response.renderer = renderer
+        response.renderer = candidate
         for key, value in additional_headers.items():
             response[key] = value
         return response
@@ -208,10 +475,29 @@ Supported ranges are:
             return None
         if isinstance(template_name, (list, tuple)):
             return tuple('.'.join([n, extension]) for n in template_name)
-        if isinstance(template_name, str_types):
+        if isinstance(template_name, str):
             return '.'.join([template_name, extension])
         raise AssertionError('template_name not of correct type: %r' % type(template_name))
 
+    def render_template(self, request, context, template_name, extension, content_type):
+        """
+        Renders the template for template_name with the given extension, or
+        returns NotImplemented if there isn't one.
+
+        The engine is chosen by _template_engines, and the output streamed
+        if _template_stream is true; see django_conneg.support.templates.
+        """
+        template_name = self.join_template_name(template_name, extension)
+        if template_name is None:
+            return NotImplemented
+        template = templates.get_template(template_name, using=self._template_engines.get(extension))
+        if template is None:
+            return NotImplemented
+        try:
+            return templates.render(template, context, request, content_type, stream=self._template_stream)
+        except TemplateDoesNotExist:
+            return NotImplemented
+
     def renderer_for_context(self, request, renderer):
         return {'name': renderer.name,
                 'priority': renderer.priority,
@@ -237,6 +523,7 @@ class ContentNegotiatedView(BaseContentNegotiatedView):
                             http_client.FORBIDDEN: ('conneg/forbidden', '403'),
                             http_client.NOT_ACCEPTABLE: ('conneg/not_acceptable',),
                             http_client.BAD_REQUEST: ('conneg/bad_request', '400'),
+                            http_client.UNSUPPORTED_MEDIA_TYPE: ('conneg/unsupported_media_type', '415'),
                             http_client.SERVICE_UNAVAILABLE: ('conneg/service_unavailable', '503'),
                             'default': ('conneg/error',)}
 
@@ -253,6 +540,13 @@ class ContentNegotiatedView(BaseContentNegotiatedView):
     def http_not_acceptable(self, request, tried_mimetypes, *args, **kwargs):
         raise HttpNotAcceptable(tried_mimetypes)
 
+    def http_service_unavailable(self, request, skipped_renderers):
+        message = "The %s representation is temporarily unavailable" % ', '.join(r.name for r in skipped_renderers)
+        response = self.error(request, HttpError(http_client.SERVICE_UNAVAILABLE, message),
+                              self.args, self.kwargs, http_client.SERVICE_UNAVAILABLE)
+        response['Retry-After'] = str(breaker.get_breaker().retry_after(self, skipped_renderers))
+        return response
+
     def error(self, request, exception, args, kwargs, status_code):
         method_name = 'error_%d' % status_code
         method = getattr(self, method_name, None)
@@ -274,22 +568,29 @@ class ContentNegotiatedView(BaseContentNegotiatedView):
         return self.error_view(request, context, template_names)
 
     def error_406(self, request, exception, *args, **kwargs):
+        format_override = getattr(self, 'format_override', None)
         accept_header_parsed = MediaType.parse_accept_header(request.META.get('HTTP_ACCEPT', ''))
-        accept_header_parsed.sort(reverse=True)
-        accept_header_parsed = map(unicode, accept_header_parsed)
+        accept_header_parsed.sort(key=MediaType.sort_key, reverse=True)
+        accept_header_parsed = [str(media_type) for media_type in accept_header_parsed]
         context = {'error': {'status_code': http_client.NOT_ACCEPTABLE,
                              'tried_mimetypes': exception.tried_mimetypes,
                              'available_renderers': [self.renderer_for_context(request, r) for r in self.conneg.renderers],
                              'format_parameter_name': self._format_override_parameter,
-                             'format_parameter': request.GET.get(self._format_override_parameter) or
-                                                 request.POST.get(self._format_override_parameter),
-                             'format_parameter_parsed': (request.GET.get(self._format_override_parameter, '') or
-                                                         request.POST.get(self._format_override_parameter, '')).split(','),
+                             'format_parameter': ','.join(format_override) if format_override else None,
+                             'format_parameter_parsed': format_override or [''],
                              'accept_header': request.META.get('HTTP_ACCEPT'),
                              'accept_header_parsed': accept_header_parsed}}
         return self.error_view(request, context,
                                self.error_template_names[http_client.NOT_ACCEPTABLE])
 
+    def error_415(self, request, exception, *args, **kwargs):
+        context = {'error': {'status_code': http_client.UNSUPPORTED_MEDIA_TYPE,
+                             'message': exception.args[0] if exception.args else None,
+                             'content_type': getattr(exception, 'content_type', None),
+                             'supported_mimetypes': sorted(set(getattr(exception, 'supported_mimetypes', ())))}}
+        return self.error_view(request, context,
+                               self.error_template_names[http_client.UNSUPPORTED_MEDIA_TYPE])
+
 # For backwards compatibility
 ErrorCatchingView = ContentNegotiatedView
 
@@ -298,24 +599,12 @@ class HTMLView(ContentNegotiatedView):
 
     @renderer(format="html", mimetypes=('text/html', 'application/xhtml+xml'), priority=1, name='HTML')
     def render_html(self, request, context, template_name):
-        template_name = self.join_template_name(template_name, 'html')
-        if template_name is None:
-            return NotImplemented
-        try:
-            return render(request, template_name, context,  content_type='text/html')
-        except TemplateDoesNotExist:
-            return NotImplemented
+        return self.render_template(request, context, template_name, 'html', 'text/html')
 
 class TextView(ContentNegotiatedView):
     @renderer(format="txt", mimetypes=('text/plain',), priority=1, name='Plain text')
     def render_text(self, request, context, template_name):
-        template_name = self.join_template_name(template_name, 'txt')
-        if template_name is None:
-            return NotImplemented
-        try:
-            return render(request, template_name, context,  content_type='text/plain')
-        except TemplateDoesNotExist:
-            return NotImplemented
+        return self.render_template(request, context, template_name, 'txt', 'text/plain')
 
 try:
     import json
@@ -329,17 +618,53 @@ except ImportError:
 if 'json' in locals():
     class JSONView(ContentNegotiatedView):
         _json_indent = 2
+        # How pandas DataFrames are simplified; either 'records' (a list of
+        # row objects) or 'columns' (an object of column lists)
+        _json_dataframe_orient = 'records'
+        # Field lists for models, keyed by model class or 'app_label.model_name'.
+        # Models not listed use their json_fields attribute; models with
+        # neither aren't serialized.
+        _json_model_fields = {}
+        # The number of rows to fetch at a time when simplifying QuerySets
+        _json_queryset_chunk_size = 2000
+        # Whether to stream the response, consuming QuerySets lazily
+        _json_stream = False
+        # The query parameter (or Accept media type parameter) in which
+        # clients may list the fields they want, as dotted paths
+        _json_fields_parameter = 'fields'
+        # The field paths clients may ask for, and those they get if they
+        # don't ask. None means all fields.
+        _json_allowed_fields = None
+        _json_default_fields = None
+        # How many levels of objects may be nested in the output (lists don't
+        # count), and how many items lists may have. Anything nested more
+        # deeply is left out, and longer lists and QuerySets are truncated.
+        _json_max_depth = None
+        _json_max_list_length = None
+        # While a context is being simplified, maps the ids of objects with
+        # simplify_for_json methods to (object, simplified form), so that
+        # objects appearing more than once are only simplified once
+        _json_memo = None
 
         def preprocess_context_for_json(self, context):
             return context
 
         def simplify_for_json(self, value):
             if inspect.ismethod(getattr(value, 'simplify_for_json', None)):
-                return value.simplify_for_json(self.simplify_for_json)
+                return self.simplify_object_for_json(value)
             if isinstance(value, datetime.datetime):
                 if value.tzinfo:
                     value = value.astimezone(utc)
                 return int(time.mktime(value.timetuple()) * 1000)
+            if numeric.is_numeric(value):
+                return numeric.simplify_numeric(value, self.simplify_for_json, self._json_dataframe_orient)
+            # Only models with declared fields are serialized; others are
+            # dropped, as any other unknown object would be.
+            if querysets.is_queryset(value) and self.get_json_fields(value.model):
+                return self.simplify_queryset(value)
+            if isinstance(value, models.Model) and self.get_json_fields(type(value)):
+                fields = self.get_json_fields(type(value))
+                return self.simplify_for_json(querysets.simplify_instance(value, fields))
             if isinstance(value, (list, tuple)):
                 items = []
                 for item in value:
@@ -352,27 +677,167 @@ if 'json' in locals():
                 for key, item in value.items():
                     item = self.simplify_for_json(item)
                     if item is not NotImplemented:
-                        items[unicode(key)] = item
+                        items[str(key)] = item
                 return items
             elif type(value) in (int, float, bool):
                 return value
-            elif type(value) in str_types:
-                return unicode(value)
+            elif type(value) is str:
+                return value
             elif value is None:
                 return value
             else:
                 logger.warning("Failed to simplify object of type %r", type(value))
                 return NotImplemented
 
+        def simplify_object_for_json(self, value):
+            """
+            Simplifies an object with a simplify_for_json method, reusing its
+            simplified form if it's already appeared in the context being
+            simplified, or is in the cross-request cache (see
+            django_conneg.support.simplified).
+            """
+            # Streamed simplified forms can only be consumed once.
+            if self._json_stream:
+                return value.simplify_for_json(self.simplify_for_json)
+            memo = self._json_memo
+            if memo is not None:
+                entry = memo.get(id(value))
+                if entry is not None and entry[0] is value:
+                    return entry[1]
+            cache = simplified.get_cache()
+            key = cache.key(self, value)
+            result = simplified.MISSING if key is None else cache.get(key)
+            if result is simplified.MISSING:
+                result = value.simplify_for_json(self.simplify_for_json)
+                if key is not None:
+                    cache.set(key, result)
+            if memo is not None:
+                # Keep a reference to value, so its id isn't reused.
+                memo[id(value)] = (value, result)
+            return result
+
+        def get_json_fields(self, model):
+            """
+            Returns the field paths to serialize for model, or None if it
+            doesn't declare any.
+            """
+            fields = self._json_model_fields.get(model) or \
+                     self._json_model_fields.get(model._meta.label_lower)
+            return fields or getattr(model, 'json_fields', None)
+
+        def simplify_queryset(self, queryset):
+            rows = querysets.iter_queryset(queryset,
+                                           self.get_json_fields(queryset.model),
+                                           self._json_queryset_chunk_size)
+            rows = (self.simplify_for_json(row) for row in rows)
+            if self._json_stream:
+                return jsonstream.StreamedList(rows)
+            return list(rows)
+
+        def get_json_field_selection(self, request):
+            """
+            Returns the selection tree of fields to render, or None for all.
+
+            Fields are only taken from the query parameter, which is part of
+            the URL, and so of the keys that spooled and deferred
+            representations and caches use.
+            """
+            value = request.GET.get(self._json_fields_parameter)
+            if value is not None:
+                selection = fieldsets.parse_fields(fieldsets.split_fields(value))
+            elif self._json_default_fields is not None:
+                selection = fieldsets.parse_fields(self._json_default_fields)
+            else:
+                selection = None
+            allowed = self._json_allowed_fields
+            try:
+                return fieldsets.restrict(selection, None if allowed is None else fieldsets.parse_fields(allowed))
+            except ValueError as e:
+                raise HttpBadRequest(message="Field %s isn't available" % e.args[0])
+
+        def prune_for_json(self, value, fields=None, depth=0):
+            """
+            Simplifies value as simplify_for_json() does, keeping only the
+            selected fields and applying _json_max_depth and
+            _json_max_list_length.
+
+            Dicts, lists and QuerySets are pruned before their contents are
+            simplified, so unselected branches of them are never walked. Other
+            objects, including those with a simplify_for_json() method, are
+            simplified whole and their result pruned afterwards.
+            """
+            max_depth, max_length = self._json_max_depth, self._json_max_list_length
+            if fields is None and max_depth is None and max_length is None:
+                return self.simplify_for_json(value)
+            is_queryset = querysets.is_queryset(value)
+            if isinstance(value, dict):
+                if max_depth is not None and depth >= max_depth:
+                    return NotImplemented
+                items = {}
+                for key, item in value.items():
+                    key = str(key)
+                    if fields is not None and key not in fields:
+                        continue
+                    item = self.prune_for_json(item, None if fields is None else fields[key], depth + 1)
+                    if item is not NotImplemented:
+                        items[key] = item
+                return items
+            if is_queryset and self.get_json_fields(value.model):
+                model_fields = self.get_json_fields(value.model)
+                model_fields = fieldsets.select_paths(model_fields, fields) or ['pk']
+                if max_length is not None:
+                    value = value[:max_length]
+                rows = querysets.iter_queryset(value, model_fields, self._json_queryset_chunk_size)
+                rows = (self.prune_for_json(row, fields, depth) for row in rows)
+                if self._json_stream:
+                    return jsonstream.StreamedList(rows)
+                return list(rows)
+            if isinstance(value, (list, tuple)):
+                if max_length is not None:
+                    value = value[:max_length]
+                items = []
+                for item in value:
+                    item = self.prune_for_json(item, fields, depth)
+                    if item is not NotImplemented:
+                        items.append(item)
+                return items
+            if isinstance(value, models.Model) and self.get_json_fields(type(value)) and \
+                    not inspect.ismethod(getattr(value, 'simplify_for_json', None)):
+                model_fields = self.get_json_fields(type(value))
+                value = querysets.simplify_instance(value, fieldsets.select_paths(model_fields, fields) or ['pk'])
+            value = self.simplify_for_json(value)
+            if isinstance(value, (dict, list)):
+                return self.prune_for_json(value, fields, depth)
+            return value
+
+        def simplify_context_for_json(self, request, context):
+            """
+            Returns the simplified context for JSON-like renderers, pruned to
+            the fields the client asked for.
+            """
+            context = self.preprocess_context_for_json(context)
+            self._json_memo = {}
+            try:
+                return self.prune_for_json(context, self.get_json_field_selection(request))
+            finally:
+                self._json_memo = None
+
+        def json_response(self, value, content_type, prefix='', suffix=''):
+            if self._json_stream:
+                content = itertools.chain([prefix],
+                                          jsonstream.iterencode(value, self._json_indent),
+                                          [suffix])
+                return http.StreamingHttpResponse(content, **{content_type_arg: content_type})
+            return http.HttpResponse(prefix + json.dumps(value, indent=self._json_indent) + suffix,
+                                     **{content_type_arg: content_type})
+
         def simplify(self, value):
             warnings.warn("JSONView.simplify() has been renamed to simplify_for_json")
             return self.simplify_for_json(value)
 
         @renderer(format='json', mimetypes=('application/json',), name='JSON')
         def render_json(self, request, context, template_name):
-            context = self.preprocess_context_for_json(context)
-            return http.HttpResponse(json.dumps(self.simplify_for_json(context), indent=self._json_indent),
-                                     **{content_type_arg: "application/json"})
+            return self.json_response(self.simplify_context_for_json(request, context), "application/json")
 
     class JSONPView(JSONView):
         # The query parameter to look for the callback name
@@ -390,12 +855,75 @@ if 'json' in locals():
 
         @renderer(format='js', mimetypes=('text/javascript', 'application/javascript'), name='JavaScript (JSONP)')
         def render_js(self, request, context, template_name):
-            context = self.preprocess_context_for_json(context)
             callback_name = request.GET.get(self._default_jsonp_callback_parameter,
                                             self._default_jsonp_callback)
 
-            return http.HttpResponse('%s(%s);' % (callback_name, json.dumps(self.simplify_for_json(context), indent=self._json_indent)),
-                                     **{content_type_arg: "application/javascript"})
+            return self.json_response(self.simplify_context_for_json(request, context), "application/javascript",
+                                      '%s(' % callback_name, ');')
+
+    class EventStreamView(JSONView):
+        """
+        Streams events from the context as server-sent events.
+
+        Put an iterator (or async iterator) of events in the context under
+        the key named by _event_stream_context_key. Each item is sent as an
+        event whose data is the item simplified for JSON; yield
+        django_conneg.support.eventstream.Event instances to set event ids
+        and types. When a client reconnects, the id of the last event it saw
+        is available as self.last_event_id.
+        """
+        _event_stream_context_key = 'events'
+        # Seconds without an event after which to send a comment, to stop
+        # proxies closing the connection. None disables keep-alives.
+        _event_stream_keepalive = 15
+        # The most events to read ahead of a slow client
+        _event_stream_buffer_size = 16
+        # The reconnection time to suggest to clients, in milliseconds
+        _event_stream_retry = None
+
+        def dispatch(self, request, *args, **kwargs):
+            self.last_event_id = request.META.get('HTTP_LAST_EVENT_ID') or None
+            return super(EventStreamView, self).dispatch(request, *args, **kwargs)
+
+        def encode_event(self, event):
+            """
+            Returns the encoding of an event, or None if its data can't be
+            simplified, in which case it's skipped.
+            """
+            if not isinstance(event, eventstream.Event):
+                event = eventstream.Event(event)
+            data = self.simplify_for_json(event.data)
+            if data is NotImplemented:
+                # Part of the way through a response, so there's no way to
+                # report this to the client
+                logger.warning("Skipping event with data that can't be simplified: %r", event.data)
+                return None
+            return eventstream.encode_event(event, json.dumps(data, separators=(',', ':')))
+
+        def iter_event_stream(self, events):
+            if self._event_stream_retry is not None:
+                yield 'retry: %d\n\n' % self._event_stream_retry
+            for event in eventstream.iter_events(events,
+                                                 self._event_stream_keepalive,
+                                                 self._event_stream_buffer_size):
+                if event is eventstream.KEEPALIVE:
+                    yield eventstream.encode_comment('keep-alive')
+                else:
+                    encoded = self.encode_event(event)
+                    if encoded is not None:
+                        yield encoded
+
+        @renderer(format='sse', mimetypes=('text/event-stream',), name='Server-sent events')
+        def render_sse(self, request, context, template_name):
+            events = context.get(self._event_stream_context_key)
+            if events is None:
+                return NotImplemented
+            response = http.StreamingHttpResponse(self.iter_event_stream(events),
+                                                  **{content_type_arg: 'text/event-stream'})
+            response['Cache-Control'] = 'no-cache'
+            # Stop nginx buffering the stream
+            response['X-Accel-Buffering'] = 'no'
+            return response
 
 class ErrorView(HTMLView, JSONPView, TextView):
     _force_fallback_format = ('html', 'json')
@@ -406,3 +934,14 @@ class ErrorView(HTMLView, JSONPView, TextView):
         self.context['status_code'] = context['error']['status_code']
         return self.render()
     post = delete = put = get
+
+class AcceptedView(HTMLView, JSONPView, TextView):
+    """
+    Renders the 202 Accepted response for a deferred render.
+    """
+    _force_fallback_format = ('html', 'json')
+    def get(self, request, context, template_name):
+        self.context.update(context)
+        self.template_name = template_name
+        self.context['status_code'] = http_client.ACCEPTED
+        return self.render()
@@ -71,12 +71,15 @@ setup(
     license='BSD',
     url='https://github.com/ox-it/django-conneg',
     long_description=open('README.rst').read(),
+    python_requires='>=3.6',
     classifiers=['Development Status :: 4 - Beta',
                  'Framework :: Django',
                  'License :: OSI Approved :: BSD License',
                  'Natural Language :: English',
                  'Operating System :: OS Independent',
                  'Programming Language :: Python',
+                 'Programming Language :: Python :: 3',
+                 'Programming Language :: Python :: 3 :: Only',
                  'Topic :: Internet :: WWW/HTTP :: Dynamic Content'],
     keywords=['REST', 'University of Oxford', 'content negotiation', 'Accept header', 'Django'],
     data_files=data_files,